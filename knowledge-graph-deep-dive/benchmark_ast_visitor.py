@@ -0,0 +1,94 @@
+"""
+AST Extraction Micro-Benchmark
+
+Compares the original ast.walk-based extraction in Neo4jCodeAnalyzer (which
+re-walks the whole tree for every function to decide whether it is top-level)
+with the single-pass CodeStructureVisitor, on large generated files.
+
+Usage:
+    python benchmark_ast_visitor.py
+    python benchmark_ast_visitor.py --classes 80 --methods 5 --functions 80
+"""
+
+import argparse
+import ast
+import tempfile
+import time
+from pathlib import Path
+
+from parse_repo_into_neo4j import Neo4jCodeAnalyzer
+
+
+def generate_source(classes: int, methods: int, functions: int) -> str:
+    """Generate a module with the given number of classes, methods per class and top-level functions"""
+    lines = ["import os", "from typing import List", ""]
+    for c in range(classes):
+        lines.append(f"class Generated{c}:")
+        lines.append("    value: int")
+        for m in range(methods):
+            lines.append(f"    def method_{m}(self, a: int, b: List[str]) -> str:")
+            lines.append("        def helper(x):")
+            lines.append("            return x")
+            lines.append("        return helper(str(a))")
+        lines.append("")
+    for f in range(functions):
+        lines.append(f"async def function_{f}(a: int, b: str = 'x') -> int:")
+        lines.append("    return a")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def legacy_extract(analyzer: Neo4jCodeAnalyzer, tree: ast.AST):
+    """The original extraction loop, kept here only as the benchmark baseline"""
+    classes, functions = [], []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ClassDef):
+            methods = [item.name for item in node.body
+                       if isinstance(item, ast.FunctionDef) and not item.name.startswith('_')]
+            classes.append({'name': node.name, 'methods': methods})
+        elif isinstance(node, ast.FunctionDef):
+            # Quadratic: a full walk of the tree for every function found
+            if not any(node in cls_node.body for cls_node in ast.walk(tree) if isinstance(cls_node, ast.ClassDef)):
+                if not node.name.startswith('_'):
+                    functions.append({'name': node.name, 'args': [arg.arg for arg in node.args.args]})
+    return classes, functions
+
+
+def time_call(fn, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark AST structure extraction")
+    parser.add_argument('--classes', type=int, default=40)
+    parser.add_argument('--methods', type=int, default=5)
+    parser.add_argument('--functions', type=int, default=40)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    analyzer = Neo4jCodeAnalyzer()
+
+    print(f"{'lines':>8} {'legacy (s)':>12} {'visitor (s)':>12} {'speedup':>9}")
+    for scale in (0.25, 0.5, 1.0):
+        source = generate_source(max(1, int(args.classes * scale)), args.methods,
+                                 max(1, int(args.functions * scale)))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            file_path = root / "generated.py"
+            file_path.write_text(source, encoding='utf-8')
+
+            # Both sides include parsing so the comparison is end to end
+            legacy = time_call(lambda: legacy_extract(analyzer, ast.parse(source)), args.repeat)
+            visitor = time_call(lambda: analyzer.analyze_python_file(file_path, root, set()), args.repeat)
+
+        print(f"{len(source.splitlines()):>8} {legacy:>12.4f} {visitor:>12.4f} {legacy / visitor:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
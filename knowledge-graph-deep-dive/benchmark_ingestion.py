@@ -0,0 +1,189 @@
+"""
+Ingestion Benchmark Suite
+
+Generates synthetic Python repositories of configurable size and times each
+stage of parse_repo_into_neo4j.py separately:
+- get_python_files (discovery)
+- analyze_python_file (AST analysis)
+- _create_graph (graph write)
+
+The graph write goes to an in-memory stand-in writer by default, so no Neo4j
+is needed. Pass --neo4j to write to the database from .env instead.
+Results are written as JSON so runs can be compared across changes.
+
+Usage:
+    python benchmark_ingestion.py
+    python benchmark_ingestion.py --files 100 500 2000 --classes 5 --methods 8 --import-density 0.2
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List
+
+from dotenv import load_dotenv
+
+from parse_repo_into_neo4j import BATCH_QUERIES, DirectNeo4jExtractor, Neo4jBatchWriter
+
+
+class InMemoryGraphWriter:
+    """Stand-in for Neo4jBatchWriter that keeps rows in memory instead of sending them over Bolt"""
+
+    def __init__(self, batch_size: int = 1000):
+        self.batch_size = batch_size
+        self.rows: Dict[str, List[Dict[str, Any]]] = {kind: [] for kind in BATCH_QUERIES}
+        self.nodes_created = 0
+        self.relationships_created = 0
+        self.transactions = 0
+
+    async def write(self, kind: str, rows: List[Dict[str, Any]]):
+        self.rows[kind].extend(rows)
+        # Node kinds are capitalised labels, relationship kinds are upper case
+        if kind.isupper():
+            self.relationships_created += len(rows)
+        else:
+            self.nodes_created += len(rows)
+        self.transactions += -(-len(rows) // self.batch_size)
+
+
+def generate_repository(root: Path, files: int, classes: int, methods: int, import_density: float, seed: int = 0):
+    """Write a synthetic package of `files` modules under root/synthetic.
+
+    Each module defines `classes` classes with `methods` methods each plus a few
+    top-level functions, and imports each other module with probability
+    `import_density` (a mix of absolute and relative imports).
+    """
+    rng = random.Random(seed)
+    package = root / "synthetic"
+    package.mkdir(parents=True)
+    (package / "__init__.py").write_text('"""Synthetic benchmark package"""\n', encoding='utf-8')
+
+    for i in range(files):
+        lines = ["from typing import Dict, List, Optional", ""]
+        for j in range(files):
+            if j != i and rng.random() < import_density:
+                if rng.random() < 0.5:
+                    lines.append(f"from synthetic.module_{j} import Class{j}_0")
+                else:
+                    lines.append(f"from .module_{j} import function_{j}_0")
+        lines.append("")
+
+        for c in range(classes):
+            lines.append(f"class Class{i}_{c}:")
+            lines.append(f'    """Generated class {c} of module {i}"""')
+            lines.append("    name: str")
+            lines.append("    values: List[int]")
+            for m in range(methods):
+                lines.append(f"    def method_{m}(self, key: str, default: Optional[int] = None) -> Dict[str, int]:")
+                lines.append("        return {key: default or 0}")
+            lines.append("")
+
+        for f in range(3):
+            lines.append(f"def function_{i}_{f}(items: List[str]) -> int:")
+            lines.append("    return len(items)")
+            lines.append("")
+
+        (package / f"module_{i}.py").write_text("\n".join(lines), encoding='utf-8')
+
+
+async def run_case(files: int, args) -> Dict[str, Any]:
+    extractor = DirectNeo4jExtractor(args.neo4j_uri, args.neo4j_user, args.neo4j_password,
+                                     batch_size=args.batch_size, use_parse_cache=False,
+                                     write_concurrency=args.concurrency)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        repo_path = Path(tmp)
+        generate_repository(repo_path, files, args.classes, args.methods, args.import_density, args.seed)
+
+        start = time.perf_counter()
+        python_files = extractor.get_python_files(str(repo_path))
+        discovery_seconds = time.perf_counter() - start
+
+        project_modules = extractor._project_modules(repo_path)
+        start = time.perf_counter()
+        modules_data = [extractor.analyzer.analyze_python_file(f, repo_path, project_modules) for f in python_files]
+        modules_data = [mod for mod in modules_data if mod]
+        analysis_seconds = time.perf_counter() - start
+
+    if args.neo4j:
+        await extractor.initialize()
+        writer = Neo4jBatchWriter(extractor.driver, batch_size=args.batch_size, concurrency=args.concurrency)
+    else:
+        writer = InMemoryGraphWriter(batch_size=args.batch_size)
+
+    try:
+        write_stats = await extractor._create_graph("synthetic", modules_data, writer=writer)
+    finally:
+        await extractor.close()
+
+    lines = sum(mod['line_count'] for mod in modules_data)
+    return {
+        'files': len(python_files),
+        'lines': lines,
+        'stages': {
+            'get_python_files': {'seconds': discovery_seconds},
+            'analyze_python_file': {'seconds': analysis_seconds,
+                                    'files_per_second': len(modules_data) / analysis_seconds if analysis_seconds else None},
+            '_create_graph': write_stats
+        }
+    }
+
+
+async def main():
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Benchmark repository ingestion stage by stage")
+    parser.add_argument('--files', type=int, nargs='+', default=[50, 200, 800],
+                        help="repository sizes (number of modules) to benchmark")
+    parser.add_argument('--classes', type=int, default=4, help="classes per file")
+    parser.add_argument('--methods', type=int, default=6, help="methods per class")
+    parser.add_argument('--import-density', type=float, default=0.05,
+                        help="probability that a module imports any given other module")
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=4, help="concurrent write sessions (--neo4j only)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--neo4j', action='store_true', help="write to Neo4j instead of the in-memory writer")
+    parser.add_argument('--output', default='benchmark_results.json')
+    args = parser.parse_args()
+
+    args.neo4j_uri = os.environ.get('NEO4J_URI', 'bolt://localhost:7687')
+    args.neo4j_user = os.environ.get('NEO4J_USER', 'neo4j')
+    args.neo4j_password = os.environ.get('NEO4J_PASSWORD', 'password')
+
+    cases = []
+    print(f"{'files':>7} {'lines':>9} {'discover (s)':>13} {'analyze (s)':>12} {'write (s)':>10} {'nodes/s':>10}")
+    for files in args.files:
+        case = await run_case(files, args)
+        cases.append(case)
+        stages = case['stages']
+        print(f"{case['files']:>7} {case['lines']:>9} {stages['get_python_files']['seconds']:>13.3f} "
+              f"{stages['analyze_python_file']['seconds']:>12.3f} {stages['_create_graph']['seconds']:>10.3f} "
+              f"{stages['_create_graph']['nodes_per_second']:>10.0f}")
+
+    results = {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'writer': 'neo4j' if args.neo4j else 'in-memory',
+        'parameters': {
+            'classes_per_file': args.classes,
+            'methods_per_class': args.methods,
+            'import_density': args.import_density,
+            'batch_size': args.batch_size,
+            'concurrency': args.concurrency,
+            'seed': args.seed
+        },
+        'cases': cases
+    }
+    Path(args.output).write_text(json.dumps(results, indent=2), encoding='utf-8')
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
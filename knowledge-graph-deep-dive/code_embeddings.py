@@ -0,0 +1,294 @@
+"""
+Code Entity Embeddings
+
+Embeds File, Class, Method and Function summaries from the code graph built by
+parse_repo_into_neo4j.py and stores them in a Neo4j vector index, so that
+llm_code_explorer.py can find the files most related to a question with one
+top-k vector query and expand them in the overview it sends to the LLM.
+
+Embedders are pluggable:
+- OpenAIEmbedder: OpenAI embeddings API (text-embedding-3-small by default)
+- HashingEmbedder: local, deterministic feature hashing; no network, for tests and offline use
+
+Select one with EMBEDDER=openai|hashing|none (default: openai when OPENAI_API_KEY is set).
+"""
+
+import hashlib
+import logging
+import math
+import os
+import re
+import time
+from typing import List, Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+# Embedded nodes get this extra label; the vector index is defined on it
+EMBEDDED_LABEL = 'CodeEntity'
+
+
+class Embedder:
+    """Turns texts into fixed-size vectors. Subclasses set name and dimensions and implement embed()"""
+
+    name: str = 'embedder'
+    dimensions: int = 0
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        raise NotImplementedError
+
+
+class OpenAIEmbedder(Embedder):
+    """Embeddings from the OpenAI API, one request per batch of texts"""
+
+    def __init__(self, client=None, model: str = 'text-embedding-3-small', dimensions: int = 1536):
+        if client is None:
+            from openai import AsyncOpenAI
+            client = AsyncOpenAI(api_key=os.environ.get('OPENAI_API_KEY'))
+        self.client = client
+        self.model = model
+        self.dimensions = dimensions
+        self.name = f"openai:{model}:{dimensions}"
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        response = await self.client.embeddings.create(model=self.model, input=texts, dimensions=self.dimensions)
+        return [item.embedding for item in response.data]
+
+
+class HashingEmbedder(Embedder):
+    """Deterministic bag-of-identifiers embedding using the hashing trick.
+
+    Identifiers are split on case and underscores ("getUserName" -> get, user, name), so
+    questions phrased in words still match code names. Stable across processes and machines.
+    """
+
+    def __init__(self, dimensions: int = 256):
+        self.dimensions = dimensions
+        self.name = f"hashing:{dimensions}"
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed_one(text) for text in texts]
+
+    def _embed_one(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimensions
+        for token in tokenize(text):
+            digest = hashlib.md5(token.encode('utf-8')).digest()
+            index = int.from_bytes(digest[:4], 'little') % self.dimensions
+            vector[index] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector))
+        # The vector index rejects all-zero vectors under cosine similarity
+        return [v / norm for v in vector] if norm else [1.0 / math.sqrt(self.dimensions)] * self.dimensions
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-case word tokens with identifiers split into their parts"""
+    words = re.findall(r'[A-Za-z0-9]+', text)
+    tokens = []
+    for word in words:
+        parts = re.findall(r'[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+', word)
+        tokens.append(word.lower())
+        if len(parts) > 1:
+            tokens.extend(part.lower() for part in parts)
+    return tokens
+
+
+def embedder_from_env() -> Optional[Embedder]:
+    """The embedder selected by EMBEDDER; ingestion and exploration must agree on it"""
+    choice = os.environ.get('EMBEDDER', 'openai' if os.environ.get('OPENAI_API_KEY') else 'none').lower()
+    if choice == 'openai':
+        return OpenAIEmbedder()
+    if choice == 'hashing':
+        return HashingEmbedder()
+    return None
+
+
+def entity_text(entity: Dict[str, Any]) -> str:
+    """Compact natural-language summary of one graph entity, as embedded"""
+    label = entity['label']
+    if label == 'File':
+        text = f"File {entity['path']} (module {entity['full_name']})"
+    elif label == 'Class':
+        text = f"Class {entity['full_name']}"
+    else:
+        returns = f" -> {entity['return_type']}" if entity.get('return_type') else ''
+        text = f"{label} {entity['full_name']}{entity.get('signature') or '()'}{returns}"
+
+    if entity.get('docstring'):
+        # The opening paragraph says what the entity is for; the rest rarely helps retrieval
+        summary = entity['docstring'].strip().split('\n\n')[0]
+        text += f"\n{summary}"
+    if entity.get('members'):
+        text += f"\nDefines: {', '.join(entity['members'][:50])}"
+    return text
+
+
+class EmbeddingIndexer:
+    """Embeds a repository's code entities and answers top-k similarity queries"""
+
+    # One query per label so every scan goes through the label's repo index
+    ENTITY_QUERY = """
+        MATCH (n:File {repo: $repo_name})
+        OPTIONAL MATCH (n)-[:DEFINES]->(d)
+        WITH n, collect(d.name) as members
+        RETURN elementId(n) as id, 'File' as label, n.path as path, n.module_name as full_name,
+               null as signature, null as return_type, null as docstring, members, n.embedding_hash as embedding_hash
+        UNION ALL
+        MATCH (n:Class {repo: $repo_name})
+        OPTIONAL MATCH (n)-[:HAS_METHOD]->(m:Method)
+        WITH n, collect(m.name) as members
+        RETURN elementId(n) as id, 'Class' as label, null as path, n.full_name as full_name,
+               null as signature, null as return_type, n.docstring as docstring, members, n.embedding_hash as embedding_hash
+        UNION ALL
+        MATCH (n:Method {repo: $repo_name})
+        RETURN elementId(n) as id, 'Method' as label, null as path, n.full_name as full_name,
+               n.signature as signature, n.return_type as return_type, n.docstring as docstring, [] as members,
+               n.embedding_hash as embedding_hash
+        UNION ALL
+        MATCH (n:Function {repo: $repo_name})
+        RETURN elementId(n) as id, 'Function' as label, null as path, n.full_name as full_name,
+               n.signature as signature, n.return_type as return_type, n.docstring as docstring, [] as members,
+               n.embedding_hash as embedding_hash
+    """
+
+    WRITE_QUERY = f"""
+        UNWIND $rows AS row
+        MATCH (n) WHERE elementId(n) = row.id
+        SET n:{EMBEDDED_LABEL}, n.embedding = row.embedding, n.embedding_hash = row.embedding_hash
+    """
+
+    # Both searches end by finding the file each hit lives in
+    _SEARCH_RESULT = """
+        WITH node, score ORDER BY score DESC LIMIT $k
+        OPTIONAL MATCH (file:File)-[:DEFINES]->(node)
+        OPTIONAL MATCH (class_file:File)-[:DEFINES]->(:Class)-[:HAS_METHOD]->(node)
+        RETURN coalesce(node.path, file.path, class_file.path) as path, labels(node) as labels,
+               coalesce(node.full_name, node.module_name) as name, score
+    """
+
+    # The vector index spans every repository and cannot be pre-filtered, so over-fetch and filter afterwards
+    SEARCH_QUERY = """
+        CALL db.index.vector.queryNodes($index_name, $candidates, $vector) YIELD node, score
+        WHERE node.repo = $repo_name
+    """ + _SEARCH_RESULT
+
+    # Exact similarity over one repository's entities, found through each label's repo index.
+    # vector.similarity.cosine uses the same [0, 1] scale as the index.
+    SCOPED_SEARCH_QUERY = """
+        CALL {
+            MATCH (node:File {repo: $repo_name}) RETURN node
+            UNION ALL
+            MATCH (node:Class {repo: $repo_name}) RETURN node
+            UNION ALL
+            MATCH (node:Method {repo: $repo_name}) RETURN node
+            UNION ALL
+            MATCH (node:Function {repo: $repo_name}) RETURN node
+        }
+        WITH node WHERE size(node.embedding) = $dimensions
+        WITH node, vector.similarity.cosine(node.embedding, $vector) as score
+    """ + _SEARCH_RESULT
+
+    INDEX_QUERY = """
+        SHOW INDEXES YIELD name, type WHERE name = $index_name AND type = 'VECTOR'
+        RETURN count(*) > 0 as exists
+    """
+
+    def __init__(self, driver, embedder: Embedder, batch_size: int = 256, oversample: int = 10):
+        self.driver = driver
+        self.embedder = embedder
+        self.batch_size = batch_size
+        self.oversample = oversample
+        # One index per dimensionality, so switching embedders never mixes vector sizes
+        self.index_name = f"code_embeddings_{embedder.dimensions}"
+        # Graphs ingested without this embedder have no index; once it exists it stays, so only a hit is cached
+        self._index_exists = False
+
+    async def ensure_index(self):
+        async with self.driver.session() as session:
+            await session.run(f"""
+                CREATE VECTOR INDEX {self.index_name} IF NOT EXISTS
+                FOR (n:{EMBEDDED_LABEL}) ON (n.embedding)
+                OPTIONS {{indexConfig: {{
+                    `vector.dimensions`: {self.embedder.dimensions},
+                    `vector.similarity_function`: 'cosine'
+                }}}}
+            """)
+
+    async def index_repository(self, repo_name: str) -> Dict[str, Any]:
+        """Embed every entity whose summary (or embedder) changed since it was last embedded"""
+        start_time = time.perf_counter()
+        stats = {'embedded': 0, 'unchanged': 0, 'batches': 0}
+        pending = []
+
+        async with self.driver.session() as read_session:
+            result = await read_session.run(self.ENTITY_QUERY, repo_name=repo_name)
+            async for record in result:
+                text = entity_text(dict(record))
+                embedding_hash = hashlib.sha256(f"{self.embedder.name}\0{text}".encode('utf-8')).hexdigest()[:32]
+                if record['embedding_hash'] == embedding_hash:
+                    stats['unchanged'] += 1
+                    continue
+
+                pending.append({'id': record['id'], 'text': text, 'embedding_hash': embedding_hash})
+                if len(pending) >= self.batch_size:
+                    await self._embed_batch(pending, stats)
+                    pending = []
+
+        if pending:
+            await self._embed_batch(pending, stats)
+
+        stats['seconds'] = time.perf_counter() - start_time
+        logger.info(f"Embedded {stats['embedded']} entities ({stats['unchanged']} unchanged) "
+                    f"in {stats['batches']} batches, {stats['seconds']:.2f}s")
+        return stats
+
+    async def _embed_batch(self, pending: List[Dict[str, Any]], stats: Dict[str, Any]):
+        vectors = await self.embedder.embed([item['text'] for item in pending])
+        rows = [
+            {'id': item['id'], 'embedding': vector, 'embedding_hash': item['embedding_hash']}
+            for item, vector in zip(pending, vectors)
+        ]
+        async with self.driver.session() as write_session:
+            await write_session.execute_write(self._write_rows, rows)
+        stats['embedded'] += len(rows)
+        stats['batches'] += 1
+
+    @classmethod
+    async def _write_rows(cls, tx, rows: List[Dict[str, Any]]):
+        result = await tx.run(cls.WRITE_QUERY, rows=rows)
+        await result.consume()
+
+    async def search(self, repo_name: str, text: str, k: int = 20) -> List[Dict[str, Any]]:
+        """Top-k entities of one repository most similar to text, with the file each lives in.
+
+        Returns nothing when the graph has no vector index for this embedder. The index is
+        shared by every repository in the database, so a repository holding a small share of
+        it can get few or none of the k * oversample candidates. When that happens the
+        repository's own entities are ranked exactly instead, at a cost proportional to its size.
+        """
+        async with self.driver.session() as session:
+            if not await self._has_index(session):
+                logger.warning(f"No vector index {self.index_name}; ingest with the same EMBEDDER to create it")
+                return []
+
+            vector = (await self.embedder.embed([text]))[0]
+            hits = await self._run_search(session, self.SEARCH_QUERY, index_name=self.index_name,
+                                          candidates=k * self.oversample, vector=vector, repo_name=repo_name, k=k)
+            if len(hits) < k:
+                hits = await self._run_search(session, self.SCOPED_SEARCH_QUERY, dimensions=self.embedder.dimensions,
+                                              vector=vector, repo_name=repo_name, k=k)
+            return hits
+
+    async def _has_index(self, session) -> bool:
+        if not self._index_exists:
+            result = await session.run(self.INDEX_QUERY, index_name=self.index_name)
+            record = await result.single()
+            self._index_exists = bool(record and record['exists'])
+        return self._index_exists
+
+    @staticmethod
+    async def _run_search(session, query: str, **params) -> List[Dict[str, Any]]:
+        result = await session.run(query, **params)
+        return [
+            {'path': record['path'], 'labels': record['labels'], 'name': record['name'], 'score': record['score']}
+            async for record in result
+        ]
@@ -0,0 +1,106 @@
+"""
+LLM Response Cache
+
+Keeps chat completion results for llm_code_explorer.py so that asking the same
+question against an unchanged graph skips the LLM round trip entirely.
+
+Entries are keyed by (model, prompt hash, repository ingest version): re-ingesting
+the repository changes the version, so answers about the old graph are never served.
+They expire after a TTL and the least recently used entry is evicted beyond max_entries.
+Identical requests that arrive while one is already in flight share its result.
+"""
+
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+
+CacheKey = Tuple[str, str, Optional[str]]
+
+
+def cache_key(model: str, prompt: str, ingest_version: Optional[str], **params) -> CacheKey:
+    """(model, sha256 of the prompt and sampling parameters, ingest version)"""
+    payload = prompt + ''.join(f"\0{name}={params[name]}" for name in sorted(params))
+    return model, hashlib.sha256(payload.encode('utf-8')).hexdigest(), ingest_version
+
+
+class LLMResponseCache:
+    """TTL + LRU cache of completion texts with coalescing of identical in-flight requests"""
+
+    def __init__(self, ttl_seconds: float = 3600.0, max_entries: int = 256):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[CacheKey, Tuple[float, str]]' = OrderedDict()
+        self._in_flight: Dict[CacheKey, asyncio.Future] = {}
+        self.stats = {'hits': 0, 'misses': 0, 'coalesced': 0, 'evictions': 0}
+
+    def get(self, key: CacheKey) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, value = entry
+        if time.monotonic() - stored_at > self.ttl_seconds:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: CacheKey, value: str):
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    async def get_or_create(self, key: CacheKey, create: Callable[[], Awaitable[str]]) -> str:
+        """Cached value for key, or the result of create() - awaited once however many callers ask"""
+        while True:
+            value = self.get(key)
+            if value is not None:
+                self.stats['hits'] += 1
+                return value
+
+            future = self._in_flight.get(key)
+            if future is None:
+                return await self._create(key, create)
+
+            self.stats['coalesced'] += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # The caller that was creating the value got cancelled, not this one: try again,
+                # possibly as the new creator
+                if not future.cancelled():
+                    raise
+
+    async def _create(self, key: CacheKey, create: Callable[[], Awaitable[str]]) -> str:
+        self.stats['misses'] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            value = await create()
+        except Exception as e:
+            # Failures are shared with the waiters but never cached
+            future.set_exception(e)
+            future.exception()  # Mark retrieved so an unawaited failure is not logged
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        else:
+            self.put(key, value)
+            future.set_result(value)
+            return value
+        finally:
+            del self._in_flight[key]
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def summary(self) -> Dict[str, Any]:
+        return dict(self.stats, entries=len(self._entries))
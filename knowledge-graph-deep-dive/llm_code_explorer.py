@@ -6,7 +6,9 @@ Starts with repo overview, selects relevant files, and explores deeply.
 
 Flow:
 1. User asks question about repository
-2. LLM sees all files and picks most relevant ones (2-3)
+2. The file list is collapsed into a directory tree that fits a token budget, expanding
+   the directories whose paths and symbols match the question (boosted by a vector search
+   over code entity embeddings when an embedder is configured); the LLM picks 2-3 files
 3. LLM explores classes/methods in selected files
 4. LLM provides detailed answer based on exploration
 """
@@ -14,21 +16,47 @@ Flow:
 import asyncio
 import json
 import os
+import time
 from typing import List, Dict, Any, Optional
 from neo4j import AsyncGraphDatabase
 from openai import AsyncOpenAI
 from dotenv import load_dotenv
 import logging
 
+from code_embeddings import Embedder, EmbeddingIndexer, embedder_from_env
+from llm_cache import LLMResponseCache, cache_key
+from path_resolver import PathResolver
+from repo_overview import build_overview, estimate_tokens
+
 logger = logging.getLogger(__name__)
 
 
 class LLMCodeExplorer:
     """AI-powered code exploration using repository graph"""
     
-    def __init__(self, neo4j_uri: str, neo4j_user: str, neo4j_password: str, openai_api_key: str):
+    def __init__(self, neo4j_uri: str, neo4j_user: str, neo4j_password: str, openai_api_key: str,
+                 embedder: Optional[Embedder] = None, vector_top_k: int = 40, overview_token_budget: int = 3000,
+                 overview_check_interval: float = 5.0, exploration_concurrency: int = 3,
+                 openai_client=None, response_cache: Optional[LLMResponseCache] = None, model: str = "gpt-4.1-mini"):
         self.neo4j_driver = AsyncGraphDatabase.driver(neo4j_uri, auth=(neo4j_user, neo4j_password))
-        self.openai_client = AsyncOpenAI(api_key=openai_api_key)
+        # Any object with an AsyncOpenAI-compatible chat.completions.create works, e.g. a stub in tests
+        self.openai_client = openai_client or AsyncOpenAI(api_key=openai_api_key)
+        self.model = model
+        # Completions keyed by (model, prompt hash, ingest version); shared across questions
+        self.response_cache = response_cache if response_cache is not None else LLMResponseCache()
+        # Must be the embedder used at ingest time; without one every file goes to the LLM
+        self.embedding_index = EmbeddingIndexer(self.neo4j_driver, embedder) if embedder else None
+        self.vector_top_k = vector_top_k
+        # Cap on the repository layout in the file-selection prompt
+        self.overview_token_budget = overview_token_budget
+        # Overviews are cached per requested repo name and rebuilt only when the Repository
+        # node's ingest_version changes; the version is re-read at most once per interval
+        self.overview_check_interval = overview_check_interval
+        self._overview_cache: Dict[Optional[str], Dict[str, Any]] = {}
+        # Built alongside each overview, keyed by actual repository name
+        self._path_resolvers: Dict[str, PathResolver] = {}
+        # Selected files explored at once, each over its own session
+        self.exploration_concurrency = exploration_concurrency
         
     async def close(self):
         await self.neo4j_driver.close()
@@ -54,10 +82,8 @@ class LLMCodeExplorer:
         print()
         
         # Step 3: Deep exploration of selected files
-        file_explorations = []
-        for file_info in selected_files:
-            exploration = await self._explore_file_deeply(file_info['path'], user_question)
-            file_explorations.append(exploration)
+        file_explorations = await self._explore_selected_files(selected_files, user_question, repo_overview['repo_name'])
+        for file_info, exploration in zip(selected_files, file_explorations):
             print(f"🔍 Explored {file_info['path']}: {len(exploration['classes'])} classes, {len(exploration['functions'])} functions")
         print()
         
@@ -88,32 +114,45 @@ class LLMCodeExplorer:
         }
     
     async def _get_repository_overview(self, repo_name: str = None) -> Dict[str, Any]:
-        """Get high-level repository structure"""
+        """Get high-level repository structure, cached until the repository is re-ingested"""
+        cached = self._overview_cache.get(repo_name)
+        now = time.monotonic()
+        if cached and now - cached['checked_at'] < self.overview_check_interval:
+            return cached['overview']
+        
         async with self.neo4j_driver.session() as session:
             # Get repository info
             if repo_name:
-                repo_query = "MATCH (r:Repository {name: $repo_name}) RETURN r.name as name"
+                repo_query = "MATCH (r:Repository {name: $repo_name}) RETURN r.name as name, r.ingest_version as version"
                 repo_result = await session.run(repo_query, repo_name=repo_name)
-                repo_record = await repo_result.single()
-                actual_repo_name = repo_record['name'] if repo_record else 'Unknown'
             else:
-                # Get any repository (assuming single repo)
-                repo_query = "MATCH (r:Repository) RETURN r.name as name LIMIT 1"
+                # Get any repository when the database hosts only one
+                repo_query = "MATCH (r:Repository) RETURN r.name as name, r.ingest_version as version LIMIT 1"
                 repo_result = await session.run(repo_query)
-                repo_record = await repo_result.single()
-                actual_repo_name = repo_record['name'] if repo_record else 'Unknown'
+            repo_record = await repo_result.single()
+            actual_repo_name = repo_record['name'] if repo_record else 'Unknown'
+            version = repo_record['version'] if repo_record else None
             
-            # Get all files with summary info
+            if cached and (cached['overview']['repo_name'], cached['version']) == (actual_repo_name, version):
+                cached['checked_at'] = now
+                return cached['overview']
+            
+            # Get all files with summary info and symbol names for the lexical pre-filter;
+            # File.repo is indexed, so other repositories are never scanned
             files_query = """
-            MATCH (f:File)
-            OPTIONAL MATCH (f)-[:DEFINES]->(c:Class)
-            OPTIONAL MATCH (f)-[:DEFINES]->(func:Function)
+            MATCH (f:File {repo: $repo_name})
+            OPTIONAL MATCH (f)-[:DEFINES]->(d)
+            OPTIONAL MATCH (d)-[:HAS_METHOD]->(m:Method)
+            WITH f, d, collect(m.name) as method_names
+            WITH f, collect(d) as defs, reduce(acc = [], names IN collect(method_names) | acc + names) as method_names
             RETURN f.path as path, f.module_name as module_name, f.line_count as line_count,
-                   count(DISTINCT c) as class_count, count(DISTINCT func) as function_count
+                   size([x IN defs WHERE x:Class]) as class_count,
+                   size([x IN defs WHERE x:Function]) as function_count,
+                   [x IN defs | x.name] + method_names as symbols
             ORDER BY f.path
             """
             
-            files_result = await session.run(files_query)
+            files_result = await session.run(files_query, repo_name=actual_repo_name)
             files = []
             async for record in files_result:
                 files.append({
@@ -121,29 +160,34 @@ class LLMCodeExplorer:
                     'module_name': record['module_name'],
                     'line_count': record['line_count'],
                     'class_count': record['class_count'],
-                    'function_count': record['function_count']
+                    'function_count': record['function_count'],
+                    'symbols': record['symbols']
                 })
             
-            return {
+            overview = {
                 'repo_name': actual_repo_name,
                 'files': files,
                 'total_files': len(files),
                 'total_classes': sum(f['class_count'] for f in files),
-                'total_functions': sum(f['function_count'] for f in files)
+                'total_functions': sum(f['function_count'] for f in files),
+                'ingest_version': version
             }
+            self._overview_cache[repo_name] = {'overview': overview, 'version': version, 'checked_at': now}
+            self._path_resolvers[actual_repo_name] = PathResolver(files)
+            return overview
     
     async def _select_relevant_files(self, user_question: str, repo_overview: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Use LLM to select 2-3 most relevant files for the question"""
         
-        files_summary = "\n".join([
-            f"• {f['path']} ({f['class_count']} classes, {f['function_count']} functions, {f['line_count']} lines)"
-            for f in repo_overview['files']
-        ])
+        vector_scores = await self._vector_scores(user_question, repo_overview)
+        files_summary, overview_stats = build_overview(repo_overview['files'], user_question,
+                                                       self.overview_token_budget, boost=vector_scores)
         
         prompt = f"""You are analyzing the repository "{repo_overview['repo_name']}" to answer this question:
 "{user_question}"
 
-Here are all the files in the repository:
+Here is the repository layout. Directories related to the question are expanded; the others
+are summarized with their file, class and function counts:
 {files_summary}
 
 Your task: Select the 2-3 most relevant files that would likely contain information to answer the user's question.
@@ -166,117 +210,173 @@ Example format:
 
 Select 2-3 files maximum. Focus on quality over quantity."""
 
-        response = await self.openai_client.chat.completions.create(
-            model="gpt-4.1-mini",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.1
-        )
+        print(f"📏 File-selection prompt: ~{estimate_tokens(prompt)} tokens "
+              f"(overview {overview_stats['tokens']}/{overview_stats['token_budget']}, "
+              f"listed {overview_stats['listed_files']} of {overview_stats['total_files']} files"
+              f"{', truncated' if overview_stats['truncated'] else ''})")
+
+        content = await self._complete(prompt, repo_overview)
         
         try:
-            selected_files = json.loads(response.choices[0].message.content)
+            selected_files = json.loads(content)
             return selected_files[:3]  # Ensure max 3 files
         except json.JSONDecodeError:
             logger.warning("Failed to parse LLM file selection, using fallback")
             # Fallback: select first 2 files
+            files = repo_overview['files']
             return [
-                {"path": repo_overview['files'][0]['path'], "reasoning": "Fallback selection"},
-                {"path": repo_overview['files'][1]['path'], "reasoning": "Fallback selection"}
-            ] if len(repo_overview['files']) >= 2 else []
+                {"path": files[0]['path'], "reasoning": "Fallback selection"},
+                {"path": files[1]['path'], "reasoning": "Fallback selection"}
+            ] if len(files) >= 2 else []
+    
+    async def _complete(self, prompt: str, repo_overview: Dict[str, Any], temperature: float = 0.1) -> str:
+        """Completion text for a single-message prompt, served from the response cache when possible.
+        
+        The prompts embed everything read from the graph, and the key includes the ingest
+        version, so a cached completion is only reused for the same question on the same graph.
+        """
+        key = cache_key(self.model, prompt, repo_overview.get('ingest_version'), temperature=temperature)
+        
+        async def create() -> str:
+            response = await self.openai_client.chat.completions.create(
+                model=self.model,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=temperature
+            )
+            return response.choices[0].message.content
+        
+        return await self.response_cache.get_or_create(key, create)
+    
+    async def _vector_scores(self, user_question: str, repo_overview: Dict[str, Any]) -> Dict[str, float]:
+        """Best embedding similarity per file among the top-k entities; empty without an index"""
+        if not self.embedding_index:
+            return {}
+        
+        hits = await self.embedding_index.search(repo_overview['repo_name'], user_question, k=self.vector_top_k)
+        scores = {}
+        for hit in hits:
+            if hit['path']:
+                scores[hit['path']] = max(scores.get(hit['path'], 0.0), hit['score'])
+        
+        if not scores:
+            logger.warning("Vector search returned nothing (repository not embedded?), using paths and names only")
+        else:
+            print(f"🧭 Vector search matched {len(scores)} of {len(repo_overview['files'])} files")
+        return scores
+    
+    # Everything the answer needs about one file in a single round trip; each aggregating
+    # subquery returns exactly one row, so files without classes or imports still match
+    FILE_DETAILS_QUERY = """
+    MATCH (f:File {repo: $repo_name, path: $file_path})
+    CALL {
+        WITH f
+        MATCH (f)-[:DEFINES]->(c:Class)
+        CALL {
+            WITH c
+            MATCH (c)-[:HAS_METHOD]->(m:Method)
+            WITH m ORDER BY m.line_start
+            RETURN collect({name: m.name, signature: m.signature, return_type: m.return_type, full_name: m.full_name,
+                            docstring: m.docstring, is_async: m.is_async, decorators: m.decorators,
+                            line_start: m.line_start, line_end: m.line_end}) as methods
+        }
+        CALL {
+            WITH c
+            MATCH (c)-[:HAS_ATTRIBUTE]->(a:Attribute)
+            RETURN collect({name: a.name, type: a.type, full_name: a.full_name}) as attributes
+        }
+        WITH c, methods, attributes ORDER BY c.name
+        RETURN collect({name: c.name, full_name: c.full_name, docstring: c.docstring,
+                        line_start: c.line_start, line_end: c.line_end,
+                        methods: methods, attributes: attributes}) as classes
+    }
+    CALL {
+        WITH f
+        MATCH (f)-[:DEFINES]->(func:Function)
+        WITH func ORDER BY func.name
+        RETURN collect({name: func.name, full_name: func.full_name, signature: func.signature,
+                        return_type: func.return_type, docstring: func.docstring, is_async: func.is_async,
+                        decorators: coalesce(func.decorators, []),
+                        line_start: func.line_start, line_end: func.line_end}) as functions
+    }
+    CALL {
+        WITH f
+        MATCH (f)-[:IMPORTS]->(imported:File)
+        WITH imported ORDER BY imported.path
+        RETURN collect({path: imported.path, module: imported.module_name}) as imports
+    }
+    CALL {
+        WITH f
+        MATCH (f)-[:DEFINES]->(d)
+        OPTIONAL MATCH (d)-[:HAS_METHOD]->(m:Method)
+        WITH coalesce(m, d) as caller
+        MATCH (caller)-[:CALLS]->(callee)
+        WITH caller, collect(DISTINCT callee.full_name) as callees ORDER BY caller.full_name
+        RETURN collect({caller: caller.full_name, callees: callees}) as calls
+    }
+    RETURN f.path as file_path, classes, functions, imports, calls
+    """
     
-    async def _explore_file_deeply(self, file_path: str, user_question: str) -> Dict[str, Any]:
-        """Get detailed information about a specific file"""
+    async def _explore_selected_files(self, selected_files: List[Dict[str, Any]], user_question: str,
+                                      repo_name: str) -> List[Dict[str, Any]]:
+        """Explore the selected files concurrently; results come back in selection order"""
+        semaphore = asyncio.Semaphore(self.exploration_concurrency)
+        
+        async def explore(file_info: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                return await self._explore_file_deeply(file_info['path'], user_question, repo_name)
+        
+        return await asyncio.gather(*(explore(file_info) for file_info in selected_files))
+    
+    async def _explore_file_deeply(self, file_path: str, user_question: str, repo_name: str) -> Dict[str, Any]:
+        """Get detailed information about a specific file of one repository"""
+        # The LLM sometimes shortens or mangles paths; map them to a real file before querying
+        actual_file_path = await self._resolve_file_path(file_path, repo_name)
+        if actual_file_path is None:
+            return {'file_path': file_path, 'classes': [], 'functions': [], 'imports': [], 'calls': []}
+        
         async with self.neo4j_driver.session() as session:
+            result = await session.run(self.FILE_DETAILS_QUERY, repo_name=repo_name, file_path=actual_file_path)
+            record = await result.single()
+            if record is None:
+                # Deleted by an ingest since the overview was cached
+                print(f"❌ File '{actual_file_path}' is no longer in the graph")
+                return {'file_path': actual_file_path, 'classes': [], 'functions': [], 'imports': [], 'calls': []}
             
-            # Debug: Check if file exists and what paths are available
-            debug_query = "MATCH (f:File) WHERE f.path CONTAINS $partial_path RETURN f.path as path LIMIT 10"
-            partial_path = file_path.split('/')[-1].replace('.py', '')  # Get just the filename
-            debug_result = await session.run(debug_query, partial_path=partial_path)
-            available_paths = []
-            async for record in debug_result:
-                available_paths.append(record['path'])
-            
-            # Try to find exact match or closest match
-            exact_match = None
-            for path in available_paths:
-                if path == file_path:
-                    exact_match = file_path
-                    break
-                elif file_path.endswith(path) or path.endswith(file_path.split('/')[-1]):
-                    exact_match = path
-                    break
-            
-            if not exact_match and available_paths:
-                print(f"⚠️  File '{file_path}' not found exactly. Available similar files: {available_paths[:3]}")
-                exact_match = available_paths[0]  # Use first similar file
-            elif not available_paths:
-                print(f"❌ No files found matching '{file_path}'")
-                return {'file_path': file_path, 'classes': [], 'functions': [], 'imports': []}
-            
-            # Use the matched file path
-            actual_file_path = exact_match
-            print(f"🔍 Using file: {actual_file_path}")
-            # Get classes in this file
-            classes_query = """
-            MATCH (f:File {path: $file_path})-[:DEFINES]->(c:Class)
-            OPTIONAL MATCH (c)-[:HAS_METHOD]->(m:Method)
-            OPTIONAL MATCH (c)-[:HAS_ATTRIBUTE]->(a:Attribute)
-            RETURN c.name as class_name, c.full_name as class_full_name,
-                   collect(DISTINCT {name: m.name, args: m.args, params_list: m.params_list, return_type: m.return_type, full_name: m.full_name}) as methods,
-                   collect(DISTINCT {name: a.name, type: a.type, full_name: a.full_name}) as attributes
-            ORDER BY c.name
-            """
-            
-            classes_result = await session.run(classes_query, file_path=actual_file_path)
-            classes = []
-            async for record in classes_result:
-                classes.append({
-                    'name': record['class_name'],
-                    'full_name': record['class_full_name'],
-                    'methods': [m for m in record['methods'] if m['name']],  # Filter out null methods
-                    'attributes': [a for a in record['attributes'] if a['name']]  # Filter out null attributes
-                })
-            
-            # Get top-level functions in this file
-            functions_query = """
-            MATCH (f:File {path: $file_path})-[:DEFINES]->(func:Function)
-            RETURN func.name as function_name, func.full_name as function_full_name, 
-                   func.args as args, func.params_list as params_list, func.return_type as return_type
-            ORDER BY func.name
-            """
-            
-            functions_result = await session.run(functions_query, file_path=actual_file_path)
-            functions = []
-            async for record in functions_result:
-                functions.append({
-                    'name': record['function_name'],
-                    'full_name': record['function_full_name'],
-                    'args': record['args'],
-                    'params_list': record['params_list'] or [],
-                    'return_type': record['return_type'] or 'Any'
-                })
-            
-            # Get imports for this file
-            imports_query = """
-            MATCH (f:File {path: $file_path})-[:IMPORTS]->(imported:File)
-            RETURN imported.path as imported_path, imported.module_name as imported_module
-            ORDER BY imported.path
-            """
-            
-            imports_result = await session.run(imports_query, file_path=actual_file_path)
-            imports = []
-            async for record in imports_result:
-                imports.append({
-                    'path': record['imported_path'],
-                    'module': record['imported_module']
-                })
-            
+            print(f"🔍 Using file: {record['file_path']}")
             return {
-                'file_path': actual_file_path,
-                'classes': classes,
-                'functions': functions,
-                'imports': imports
+                'file_path': record['file_path'],
+                'classes': record['classes'],
+                'functions': record['functions'],
+                'imports': record['imports'],
+                'calls': record['calls']
             }
     
+    async def _resolve_file_path(self, file_path: str, repo_name: str) -> Optional[str]:
+        """Closest stored path for a suggested file path, from the repository's in-process suffix index"""
+        if repo_name not in self._path_resolvers:
+            await self._get_repository_overview(repo_name)
+        matches = self._path_resolvers.get(repo_name, PathResolver([])).resolve(file_path)
+        
+        if not matches:
+            print(f"❌ No files found matching '{file_path}'")
+            return None
+        if matches[0] != file_path:
+            print(f"⚠️  File '{file_path}' not found exactly. Closest matches: {matches[:3]}")
+        return matches[0]
+    
+    @staticmethod
+    def _first_line(docstring: str) -> str:
+        return docstring.strip().splitlines()[0] if docstring and docstring.strip() else ''
+    
+    def _format_callable(self, func: Dict[str, Any]) -> str:
+        """One line per method/function: decorators, full signature, line range and docstring summary"""
+        decorators = ''.join(f"@{d} " for d in func.get('decorators') or [])
+        prefix = 'async ' if func.get('is_async') else ''
+        returns = f" -> {func['return_type']}" if func.get('return_type') else ''
+        line = f"{decorators}{prefix}{func['name']}{func.get('signature') or '()'}{returns} [lines {func['line_start']}-{func['line_end']}]"
+        doc = self._first_line(func.get('docstring'))
+        return f"{line}: {doc}" if doc else line
+    
     async def _synthesize_answer(self, user_question: str, repo_overview: Dict[str, Any], 
                                 selected_files: List[Dict[str, Any]], file_explorations: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Use LLM to synthesize final answer based on exploration"""
@@ -291,19 +391,12 @@ Select 2-3 files maximum. Focus on quality over quantity."""
             if exploration['classes']:
                 summary += f"\nClasses ({len(exploration['classes'])}):\n"
                 for cl in exploration['classes']:
-                    summary += f"• {cl['name']}\n"
+                    summary += f"• {cl['name']} (lines {cl['line_start']}-{cl['line_end']})"
+                    summary += f": {self._first_line(cl['docstring'])}\n" if cl['docstring'] else "\n"
                     if cl['methods']:
-                        method_sigs = []
-                        for m in cl['methods'][:5]:
-                            if m.get('params_list'):
-                                # Use detailed parameter info if available
-                                ret_type = m.get('return_type', 'Any')
-                                method_sig = f"{m['name']}({', '.join(m['params_list'])}) -> {ret_type}"
-                            else:
-                                # Fallback to simple args
-                                method_sig = f"{m['name']}({', '.join(m.get('args', []))})"
-                            method_sigs.append(method_sig)
-                        summary += f"  Methods: {'; '.join(method_sigs)}\n"
+                        summary += "  Methods:\n"
+                        for m in cl['methods']:
+                            summary += f"    - {self._format_callable(m)}\n"
                     if cl['attributes']:
                         methods = ', '.join([f"{a['name']}: {a['type']}" for a in cl['attributes'][:3]])
                         summary += f"  Attributes: {methods}\n"
@@ -311,18 +404,16 @@ Select 2-3 files maximum. Focus on quality over quantity."""
             if exploration['functions']:
                 summary += f"\nTop-level Functions ({len(exploration['functions'])}):\n"
                 for func in exploration['functions']:
-                    if func.get('params_list'):
-                        # Use detailed parameter info if available
-                        ret_type = func.get('return_type', 'Any')
-                        func_sig = f"{func['name']}({', '.join(func['params_list'])}) -> {ret_type}"
-                    else:
-                        # Fallback to simple args
-                        func_sig = f"{func['name']}({', '.join(func.get('args', []))})"
-                    summary += f"• {func_sig}\n"
+                    summary += f"• {self._format_callable(func)}\n"
             
             if exploration['imports']:
                 summary += f"\nImports: {', '.join([imp['module'] for imp in exploration['imports'][:5]])}\n"
             
+            if exploration['calls']:
+                summary += "\nCalls:\n"
+                for call in exploration['calls'][:10]:
+                    summary += f"• {call['caller']} -> {', '.join(call['callees'][:5])}\n"
+            
             exploration_summary.append(summary)
         
         exploration_text = "\n".join(exploration_summary)
@@ -352,18 +443,14 @@ Format your response as JSON:
 
 Be specific and actionable. If the exploration didn't find relevant information, say so and suggest what to look for."""
 
-        response = await self.openai_client.chat.completions.create(
-            model="gpt-4.1-mini",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.1
-        )
+        content = await self._complete(prompt, repo_overview)
         
         try:
-            result = json.loads(response.choices[0].message.content)
+            result = json.loads(content)
             return result
         except json.JSONDecodeError:
             return {
-                "answer": response.choices[0].message.content,
+                "answer": content,
                 "code_examples": "",
                 "key_classes_methods": [],
                 "related_files": [],
@@ -371,13 +458,8 @@ Be specific and actionable. If the exploration didn't find relevant information,
             }
 
 
-async def ask_codebase(question: str, repo_name: str = None) -> None:
-    """
-    Easy function to ask questions about your codebase
-    
-    Usage:
-    await ask_codebase("How do I get messages from an agent execution?")
-    """
+def create_explorer() -> Optional[LLMCodeExplorer]:
+    """Explorer configured from the environment (.env); None without OPENAI_API_KEY"""
     load_dotenv()
     
     neo4j_uri = os.environ.get('NEO4J_URI', 'bolt://localhost:7687')
@@ -387,9 +469,33 @@ async def ask_codebase(question: str, repo_name: str = None) -> None:
     
     if not openai_api_key:
         print("❌ Error: OPENAI_API_KEY environment variable not set")
-        return
+        return None
+    
+    # EMBEDDER must match what parse_repo_into_neo4j.py used; see code_embeddings.py
+    response_cache = LLMResponseCache(ttl_seconds=float(os.environ.get('LLM_CACHE_TTL', '3600')),
+                                      max_entries=int(os.environ.get('LLM_CACHE_SIZE', '256')))
+    return LLMCodeExplorer(neo4j_uri, neo4j_user, neo4j_password, openai_api_key,
+                           embedder=embedder_from_env(),
+                           overview_token_budget=int(os.environ.get('OVERVIEW_TOKEN_BUDGET', '3000')),
+                           response_cache=response_cache)
+
+
+async def ask_codebase(question: str, repo_name: str = None, explorer: Optional[LLMCodeExplorer] = None) -> None:
+    """
+    Easy function to ask questions about your codebase
     
-    explorer = LLMCodeExplorer(neo4j_uri, neo4j_user, neo4j_password, openai_api_key)
+    Usage:
+    await ask_codebase("How do I get messages from an agent execution?")
+    
+    Pass a long-lived explorer to share its overview and response caches across
+    questions; otherwise one is created for this question and closed afterwards.
+    """
+    if explorer is not None:
+        return await explorer.explore_repository(question, repo_name)
+    
+    explorer = create_explorer()
+    if explorer is None:
+        return
     
     try:
         result = await explorer.explore_repository(question, repo_name)
@@ -409,15 +515,25 @@ async def main():
         "What providers are available for Pydantic AI?"
     ]
     
-    for question in questions:
-        print(f"\\n{'='*100}")
-        print(f"🔍 EXPLORING: {question}")
-        print('='*100)
-        
-        await ask_codebase(question)
+    # One explorer for the whole session: the driver, overview and LLM responses are reused
+    explorer = create_explorer()
+    if explorer is None:
+        return
+    
+    try:
+        for question in questions:
+            print(f"\\n{'='*100}")
+            print(f"🔍 EXPLORING: {question}")
+            print('='*100)
+            
+            await ask_codebase(question, explorer=explorer)
+            
+            print("\\n" + "="*100 + "\\n")
+            await asyncio.sleep(1)  # Brief pause between questions
         
-        print("\\n" + "="*100 + "\\n")
-        await asyncio.sleep(1)  # Brief pause between questions
+        print(f"🗄️  LLM response cache: {explorer.response_cache.summary()}")
+    finally:
+        await explorer.close()
 
 
 if __name__ == "__main__":
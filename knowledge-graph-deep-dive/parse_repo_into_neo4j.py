@@ -12,18 +12,26 @@ Bypasses all LLM processing for maximum speed.
 """
 
 import asyncio
+import csv
+import hashlib
+import json
 import logging
 import os
+import sqlite3
 import subprocess
 import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import List, Optional, Dict, Any, Set
+from typing import List, Optional, Dict, Any, Set, Iterable, Iterator
 import ast
 
 from dotenv import load_dotenv
 from neo4j import AsyncGraphDatabase
 
+from code_embeddings import Embedder, EmbeddingIndexer, embedder_from_env
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -33,6 +41,636 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+# One UNWIND statement per node and relationship kind. Order matters: nodes are
+# written before any relationship that MATCHes on them. Every node carries the
+# name of its repository in `repo`, and every key is (repo, id) so several
+# repositories can share one database without colliding.
+BATCH_QUERIES = {
+    'Repository': """
+        UNWIND $rows AS row
+        MERGE (r:Repository {name: row.name})
+        ON CREATE SET r.created_at = datetime()
+        SET r.source = coalesce(row.source, r.source)
+    """,
+    'File': """
+        UNWIND $rows AS row
+        MERGE (f:File {repo: row.repo, path: row.path})
+        ON CREATE SET f.created_at = datetime()
+        SET f.name = row.name, f.module_name = row.module_name, f.line_count = row.line_count,
+            f.content_hash = row.content_hash, f.commit_sha = row.commit_sha, f.imports = row.imports
+    """,
+    'Class': """
+        UNWIND $rows AS row
+        MERGE (c:Class {repo: row.repo, full_name: row.full_name})
+        ON CREATE SET c.name = row.name,
+                      c.docstring = row.docstring,
+                      c.decorators = row.decorators,
+                      c.line_start = row.line_start,
+                      c.line_end = row.line_end,
+                      c.created_at = datetime()
+    """,
+    'Method': """
+        UNWIND $rows AS row
+        MERGE (m:Method {repo: row.repo, method_id: row.method_id})
+        ON CREATE SET m.name = row.name,
+                      m.full_name = row.full_name,
+                      m.signature = row.signature,
+                      m.return_type = row.return_type,
+                      m.docstring = row.docstring,
+                      m.is_async = row.is_async,
+                      m.calls = row.calls,
+                      m.decorators = row.decorators,
+                      m.line_start = row.line_start,
+                      m.line_end = row.line_end,
+                      m.created_at = datetime()
+    """,
+    'Attribute': """
+        UNWIND $rows AS row
+        MERGE (a:Attribute {repo: row.repo, attr_id: row.attr_id})
+        ON CREATE SET a.name = row.name,
+                      a.full_name = row.full_name,
+                      a.type = row.type,
+                      a.created_at = datetime()
+    """,
+    'Function': """
+        UNWIND $rows AS row
+        MERGE (f:Function {repo: row.repo, func_id: row.func_id})
+        ON CREATE SET f.name = row.name,
+                      f.full_name = row.full_name,
+                      f.signature = row.signature,
+                      f.return_type = row.return_type,
+                      f.docstring = row.docstring,
+                      f.is_async = row.is_async,
+                      f.calls = row.calls,
+                      f.decorators = row.decorators,
+                      f.line_start = row.line_start,
+                      f.line_end = row.line_end,
+                      f.created_at = datetime()
+    """,
+    'CONTAINS': """
+        UNWIND $rows AS row
+        MATCH (r:Repository {name: row.repo})
+        MATCH (f:File {repo: row.repo, path: row.file_path})
+        MERGE (r)-[:CONTAINS]->(f)
+    """,
+    'DEFINES_CLASS': """
+        UNWIND $rows AS row
+        MATCH (f:File {repo: row.repo, path: row.file_path})
+        MATCH (c:Class {repo: row.repo, full_name: row.class_full_name})
+        MERGE (f)-[:DEFINES]->(c)
+    """,
+    'HAS_METHOD': """
+        UNWIND $rows AS row
+        MATCH (c:Class {repo: row.repo, full_name: row.class_full_name})
+        MATCH (m:Method {repo: row.repo, method_id: row.method_id})
+        MERGE (c)-[:HAS_METHOD]->(m)
+    """,
+    'HAS_ATTRIBUTE': """
+        UNWIND $rows AS row
+        MATCH (c:Class {repo: row.repo, full_name: row.class_full_name})
+        MATCH (a:Attribute {repo: row.repo, attr_id: row.attr_id})
+        MERGE (c)-[:HAS_ATTRIBUTE]->(a)
+    """,
+    'DEFINES_FUNCTION': """
+        UNWIND $rows AS row
+        MATCH (file:File {repo: row.repo, path: row.file_path})
+        MATCH (func:Function {repo: row.repo, func_id: row.func_id})
+        MERGE (file)-[:DEFINES]->(func)
+    """,
+    'IMPORTS': """
+        UNWIND $rows AS row
+        MATCH (source:File {repo: row.repo, path: row.source_path})
+        MATCH (target:File {repo: row.repo, path: row.target_path})
+        MERGE (source)-[:IMPORTS]->(target)
+    """,
+}
+
+# CALLS edges, one statement per (caller label, callee label) so every MATCH uses a (repo, id) constraint
+CALLABLE_KEYS = {'Method': 'method_id', 'Function': 'func_id'}
+CALL_KINDS = {
+    (caller, callee): f"{caller.upper()}_CALLS_{callee.upper()}"
+    for caller in CALLABLE_KEYS for callee in CALLABLE_KEYS
+}
+BATCH_QUERIES.update({
+    kind: f"""
+        UNWIND $rows AS row
+        MATCH (caller:{caller} {{repo: row.repo, {CALLABLE_KEYS[caller]}: row.caller_id}})
+        MATCH (callee:{callee} {{repo: row.repo, {CALLABLE_KEYS[callee]}: row.callee_id}})
+        MERGE (caller)-[:CALLS]->(callee)
+    """
+    for (caller, callee), kind in CALL_KINDS.items()
+})
+
+
+# Kinds that create nodes; every other kind only connects nodes written before it
+NODE_KINDS = {'Repository', 'File', 'Class', 'Method', 'Attribute', 'Function'}
+
+
+# Statements used by incremental re-ingestion to drop stale subgraphs before rewriting them
+INCREMENTAL_QUERIES = {
+    'CLEAR_FILE': """
+        UNWIND $rows AS row
+        MATCH (f:File {repo: row.repo, path: row.path})
+        OPTIONAL MATCH (f)-[:DEFINES]->(d)
+        OPTIONAL MATCH (d)-[:HAS_METHOD|HAS_ATTRIBUTE]->(member)
+        DETACH DELETE member, d
+        WITH DISTINCT f
+        OPTIONAL MATCH (f)-[i:IMPORTS]->()
+        DELETE i
+    """,
+    'DELETE_FILE': """
+        UNWIND $rows AS row
+        MATCH (f:File {repo: row.repo, path: row.path})
+        DETACH DELETE f
+    """,
+}
+
+
+# Labels owned by a repository, leaves first so batched deletes detach as few relationships as possible
+REPOSITORY_LABELS = ['Attribute', 'Method', 'Function', 'Class', 'File']
+
+# Composite (repo, id) uniqueness per label; these also back the MERGEs in BATCH_QUERIES
+REPOSITORY_CONSTRAINTS = {
+    'File': 'path',
+    'Class': 'full_name',
+    'Method': 'method_id',
+    'Function': 'func_id',
+    'Attribute': 'attr_id',
+}
+
+
+def file_content_hash(data: bytes) -> str:
+    """Content hash stored on File nodes to detect changes between ingests"""
+    return hashlib.sha256(data).hexdigest()
+
+
+class Neo4jBatchWriter:
+    """Writes parameter lists to Neo4j with one UNWIND statement per batch.
+    
+    Batches of one write() call run concurrently, each in its own session, with at most
+    `concurrency` in flight. write() returns only once all of its batches are committed,
+    so awaiting kinds in BATCH_QUERIES order keeps nodes ahead of their relationships.
+    """
+
+    def __init__(self, driver, batch_size: int = 1000, concurrency: int = 4):
+        self.driver = driver
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.nodes_created = 0
+        self.relationships_created = 0
+        self.transactions = 0
+        self.retries = 0
+
+    async def write(self, kind: str, rows: List[Dict[str, Any]]):
+        """Write all rows of one kind in explicit write transactions of batch_size rows"""
+        query = BATCH_QUERIES.get(kind) or INCREMENTAL_QUERIES[kind]
+        await asyncio.gather(*[
+            self._write_batch(query, rows[start:start + self.batch_size])
+            for start in range(0, len(rows), self.batch_size)
+        ])
+
+    async def _write_batch(self, query: str, batch: List[Dict[str, Any]]):
+        async with self.semaphore:
+            async with self.driver.session() as session:
+                # execute_write retries transient failures (deadlocks, lock timeouts, leader
+                # switches) with backoff; every extra call of _run_batch is one retry
+                attempts = []
+                counters = await session.execute_write(self._run_batch, query, batch, attempts)
+        self.nodes_created += counters.nodes_created
+        self.relationships_created += counters.relationships_created
+        self.transactions += 1
+        self.retries += len(attempts) - 1
+
+    @staticmethod
+    async def _run_batch(tx, query: str, rows: List[Dict[str, Any]], attempts: List[int]):
+        attempts.append(1)
+        result = await tx.run(query, rows=rows)
+        summary = await result.consume()
+        return summary.counters
+
+
+class CodeStructureVisitor(ast.NodeVisitor):
+    """Collects classes, methods, functions and imports in one linear pass over the AST.
+
+    A scope stack decides what a definition is: a function directly inside a class
+    is a method, one at module level is a top-level function, anything else is nested.
+    
+    Call sites are attributed to the innermost enclosing method or top-level function
+    and qualified against the module's imports once the whole file has been visited.
+    """
+
+    def __init__(self, analyzer: 'Neo4jCodeAnalyzer', module_name: str, project_modules: Set[str]):
+        self.analyzer = analyzer
+        self.module_name = module_name
+        self.project_modules = project_modules
+        self.scope: List[tuple] = []  # (kind, name, record) for each enclosing class/function
+        self.classes: List[Dict[str, Any]] = []
+        self.functions: List[Dict[str, Any]] = []
+        self.imports: Set[str] = set()
+        self.aliases: Dict[str, str] = {}  # local name -> absolute dotted name it was imported as
+        self.caller: Optional[tuple] = None  # (record, class full_name) receiving the current call sites
+        self._call_sites: List[tuple] = []  # (record, class full_name, raw callee names)
+
+    def _qualname(self, name: str) -> str:
+        return '.'.join([entry[1] for entry in self.scope] + [name])
+
+    def _span(self, node) -> Dict[str, Any]:
+        return {
+            'docstring': ast.get_docstring(node),
+            'decorators': [ast.unparse(d) for d in node.decorator_list],
+            'line_start': node.lineno,
+            'line_end': node.end_lineno
+        }
+
+    def visit_ClassDef(self, node: ast.ClassDef):
+        attributes = []
+        for item in node.body:
+            if isinstance(item, ast.AnnAssign) and isinstance(item.target, ast.Name):
+                # Type annotated attributes
+                if not item.target.id.startswith('_'):
+                    attributes.append({
+                        'name': item.target.id,
+                        'type': self.analyzer._get_name(item.annotation) if item.annotation else 'Any'
+                    })
+        
+        cls = {
+            'name': node.name,
+            'full_name': f"{self.module_name}.{self._qualname(node.name)}",
+            'methods': [],
+            'attributes': attributes,
+            **self._span(node)
+        }
+        self.classes.append(cls)
+        
+        self.scope.append(('class', node.name, cls))
+        self.generic_visit(node)
+        self.scope.pop()
+
+    def visit_FunctionDef(self, node):
+        parent_kind, parent = (self.scope[-1][0], self.scope[-1][2]) if self.scope else (None, None)
+        enclosing_caller = self.caller
+        # Decorators run in the enclosing scope, so their calls are not the function's own
+        for decorator in node.decorator_list:
+            self.visit(decorator)
+        
+        if parent_kind == 'class':
+            method = self._callable(node)
+            parent['methods'].append(method)
+            self._start_caller(method, parent['full_name'])
+        elif parent_kind is None:
+            func = self._callable(node)
+            func['full_name'] = f"{self.module_name}.{node.name}"
+            self.functions.append(func)
+            self._start_caller(func, None)
+        # Nested functions are not graph nodes; their call sites count towards the enclosing callable
+        
+        self.scope.append(('function', node.name, None))
+        for child in [node.args, node.returns, *node.body]:
+            if child is not None:
+                self.visit(child)
+        self.scope.pop()
+        self.caller = enclosing_caller
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def _callable(self, node) -> Dict[str, Any]:
+        # The parameter list as written: positional-only, defaults, *args, keyword-only and **kwargs
+        return {
+            'name': node.name,
+            'signature': f"({ast.unparse(node.args)})",
+            'return_type': ast.unparse(node.returns) if node.returns else None,
+            'is_async': isinstance(node, ast.AsyncFunctionDef),
+            **self._span(node)
+        }
+
+    def _start_caller(self, record: Dict[str, Any], class_full_name: Optional[str]):
+        """Make a graph-level callable the target of call sites until its body has been visited"""
+        sites = set()
+        self._call_sites.append((record, class_full_name, sites))
+        self.caller = sites
+
+    def visit_Call(self, node: ast.Call):
+        if self.caller is not None:
+            name = self._dotted_name(node.func)
+            if name:
+                self.caller.add(name)
+        self.generic_visit(node)
+
+    def _dotted_name(self, node) -> Optional[str]:
+        """"a.b.c" for calls through plain names and attributes; None for anything computed"""
+        if isinstance(node, ast.Name):
+            return node.id
+        if isinstance(node, ast.Attribute):
+            base = self._dotted_name(node.value)
+            return f"{base}.{node.attr}" if base else None
+        return None
+
+    def finish(self):
+        """Store each callable's call sites as sorted, fully qualified names (needs every import)"""
+        for record, class_full_name, sites in self._call_sites:
+            record['calls'] = sorted({self._qualify_call(name, class_full_name) for name in sites})
+
+    def _qualify_call(self, name: str, class_full_name: Optional[str]) -> str:
+        head, _, rest = name.partition('.')
+        if head in ('self', 'cls') and class_full_name and rest:
+            return f"{class_full_name}.{rest}"
+        if head == 'cls' and class_full_name:
+            # cls() in a classmethod constructs the class
+            return class_full_name
+        if head in self.aliases:
+            return self.aliases[head] + (f".{rest}" if rest else '')
+        # A name defined in this module (or a builtin, which simply never resolves)
+        return f"{self.module_name}.{name}"
+
+    def visit_Import(self, node: ast.Import):
+        for alias in node.names:
+            if alias.asname:
+                self.aliases[alias.asname] = alias.name
+            else:
+                top = alias.name.split('.')[0]
+                self.aliases[top] = top
+            # Track internal imports only
+            if self.analyzer._is_likely_internal(alias.name, self.project_modules):
+                self.imports.add(alias.name)
+
+    def visit_ImportFrom(self, node: ast.ImportFrom):
+        module = absolute_import_name('.' * node.level + (node.module or ''), self.module_name)
+        if module:
+            for alias in node.names:
+                if alias.name != '*':
+                    self.aliases[alias.asname or alias.name] = f"{module}.{alias.name}"
+        
+        if node.level:
+            # Relative imports keep their leading dots so ModuleIndex can resolve them against the package
+            base = '.' * node.level + (node.module or '')
+        elif node.module and self.analyzer._is_likely_internal(node.module, self.project_modules):
+            base = node.module
+        else:
+            return
+        
+        # from pkg import x: x may be a submodule or a name defined by pkg. ModuleIndex resolves
+        # "pkg.x" to pkg/x.py when that exists and falls back to pkg itself otherwise
+        for alias in node.names:
+            if alias.name == '*':
+                self.imports.add(base)
+            else:
+                self.imports.add(base + alias.name if base.endswith('.') else f"{base}.{alias.name}")
+
+
+class ModuleIndex:
+    """In-memory module_name <-> path index used to resolve imports without Cypher label scans"""
+
+    def __init__(self):
+        self.paths: Dict[str, str] = {}
+        self.modules: Dict[str, str] = {}
+
+    def add(self, file_path: str, module_name: str):
+        self.paths[module_name] = file_path
+        self.modules[file_path] = module_name
+
+    def remove(self, file_path: str):
+        module_name = self.modules.pop(file_path, None)
+        if module_name is not None:
+            self.paths.pop(module_name, None)
+
+    def resolve(self, import_name: str, importer_path: str) -> Optional[str]:
+        """Path of the file an import refers to, or None if it is not part of the repository.
+        
+        Tries the full dotted name, then its package __init__, then walks up one component
+        at a time, so "pkg.mod.Name" resolves to pkg/mod.py and "pkg" to pkg/__init__.py.
+        Cost is proportional to the depth of the name, not to the number of modules.
+        """
+        target = self._absolute(import_name, importer_path)
+        if not target:
+            return None
+        
+        parts = target.split('.')
+        while parts:
+            module_name = '.'.join(parts)
+            file_path = self.paths.get(module_name) or self.paths.get(f"{module_name}.__init__")
+            if file_path:
+                return file_path if file_path != importer_path else None
+            parts.pop()
+        return None
+
+    def _absolute(self, import_name: str, importer_path: str) -> Optional[str]:
+        if not import_name.startswith('.'):
+            return import_name
+        
+        importer_module = self.modules.get(importer_path)
+        if importer_module is None:
+            return None
+        return absolute_import_name(import_name, importer_module)
+
+
+def absolute_import_name(import_name: str, importer_module: str) -> Optional[str]:
+    """Absolute dotted name of a possibly relative import, or None if it climbs above the top package"""
+    level = len(import_name) - len(import_name.lstrip('.'))
+    if level == 0:
+        return import_name
+    
+    # Both pkg/mod.py ("pkg.mod") and pkg/__init__.py ("pkg.__init__") live in package "pkg"
+    package = importer_module.split('.')[:-1]
+    if level - 1 > len(package):
+        return None
+    package = package[:len(package) - (level - 1)]
+    rest = import_name[level:]
+    return '.'.join(package + ([rest] if rest else [])) or None
+
+
+def method_node_id(class_full_name: str, name: str) -> str:
+    return f"{class_full_name}::{name}"
+
+
+def function_node_id(file_path: str, name: str) -> str:
+    return f"{file_path}::{name}"
+
+
+class CallGraph:
+    """Repo-wide symbol table that resolves qualified call names to Method/Function nodes.
+    
+    Call sites arrive already qualified by CodeStructureVisitor, so resolving one is a
+    dict lookup: the whole pass is linear in the number of call sites.
+    """
+
+    def __init__(self):
+        self.symbols: Dict[str, tuple] = {}  # qualified name -> (label, node id)
+        self.callers: List[tuple] = []  # (label, node id, qualified call names) written this run
+        self.stored_callers: List[tuple] = []  # callers left in the graph from a previous ingest
+        self.new_ids: Set[tuple] = set()
+
+    def add_module(self, mod: Dict[str, Any]):
+        for cls in mod['classes']:
+            for method in cls['methods']:
+                node = ('Method', method_node_id(cls['full_name'], method['name']))
+                self._add_symbol(f"{cls['full_name']}.{method['name']}", node)
+                self.callers.append((*node, method['calls']))
+                self.new_ids.add(node)
+        for func in mod['functions']:
+            node = ('Function', function_node_id(mod['file_path'], func['name']))
+            self._add_symbol(func['full_name'], node)
+            self.callers.append((*node, func['calls']))
+            self.new_ids.add(node)
+
+    def add_stored(self, label: str, node_id: str, full_name: str, calls: List[str]):
+        self._add_symbol(full_name, (label, node_id))
+        self.stored_callers.append((label, node_id, calls or []))
+
+    def _add_symbol(self, full_name: str, node: tuple):
+        self.symbols[full_name] = node
+        # Names defined in pkg/__init__.py are imported as pkg.name
+        if '.__init__.' in full_name:
+            self.symbols.setdefault(full_name.replace('.__init__.', '.', 1), node)
+
+    def resolve(self, call_name: str) -> Optional[tuple]:
+        # Calling a class runs its __init__
+        return self.symbols.get(call_name) or self.symbols.get(f"{call_name}.__init__")
+
+    def edges(self, repo_name: str) -> Dict[str, List[Dict[str, Any]]]:
+        """CALLS rows per kind: every new caller, plus stored callers whose callee was just (re)written"""
+        rows = {kind: [] for kind in CALL_KINDS.values()}
+        seen = set()
+        for callers, only_new_targets in ((self.callers, False), (self.stored_callers, True)):
+            for label, node_id, calls in callers:
+                for call_name in calls:
+                    target = self.resolve(call_name)
+                    if not target or (only_new_targets and target not in self.new_ids):
+                        continue
+                    if (label, node_id, target) in seen:
+                        continue
+                    seen.add((label, node_id, target))
+                    rows[CALL_KINDS[(label, target[0])]].append(
+                        {'repo': repo_name, 'caller_id': node_id, 'callee_id': target[1]})
+        return rows
+
+
+# neo4j-admin import layout for node kinds: (file name, [(row key, CSV header)]).
+# The first key identifies the node; CsvExportWriter adds the :ID column for it.
+CSV_NODE_COLUMNS = {
+    'Repository': ('repositories.csv', [('name', 'name'), ('source', 'source')]),
+    'File': ('files.csv', [
+        ('path', 'path'), ('repo', 'repo'), ('name', 'name'), ('module_name', 'module_name'),
+        ('line_count', 'line_count:int'), ('content_hash', 'content_hash'),
+        ('commit_sha', 'commit_sha'), ('imports', 'imports:string[]')
+    ]),
+    'Class': ('classes.csv', [
+        ('full_name', 'full_name'), ('repo', 'repo'), ('name', 'name'), ('docstring', 'docstring'),
+        ('decorators', 'decorators:string[]'),
+        ('line_start', 'line_start:int'), ('line_end', 'line_end:int')
+    ]),
+    'Method': ('methods.csv', [
+        ('method_id', 'method_id'), ('repo', 'repo'), ('name', 'name'), ('full_name', 'full_name'),
+        ('signature', 'signature'), ('return_type', 'return_type'), ('docstring', 'docstring'),
+        ('is_async', 'is_async:boolean'), ('calls', 'calls:string[]'), ('decorators', 'decorators:string[]'),
+        ('line_start', 'line_start:int'), ('line_end', 'line_end:int')
+    ]),
+    'Attribute': ('attributes.csv', [
+        ('attr_id', 'attr_id'), ('repo', 'repo'), ('name', 'name'), ('full_name', 'full_name'), ('type', 'type')
+    ]),
+    'Function': ('functions.csv', [
+        ('func_id', 'func_id'), ('repo', 'repo'), ('name', 'name'), ('full_name', 'full_name'),
+        ('signature', 'signature'), ('return_type', 'return_type'), ('docstring', 'docstring'),
+        ('is_async', 'is_async:boolean'), ('calls', 'calls:string[]'), ('decorators', 'decorators:string[]'),
+        ('line_start', 'line_start:int'), ('line_end', 'line_end:int')
+    ]),
+}
+
+# Relationship kinds: (file name, type, (start key, start ID space), (end key, end ID space))
+CSV_RELATIONSHIP_COLUMNS = {
+    'CONTAINS': ('contains.csv', 'CONTAINS', ('repo', 'Repository'), ('file_path', 'File')),
+    'DEFINES_CLASS': ('defines_class.csv', 'DEFINES', ('file_path', 'File'), ('class_full_name', 'Class')),
+    'HAS_METHOD': ('has_method.csv', 'HAS_METHOD', ('class_full_name', 'Class'), ('method_id', 'Method')),
+    'HAS_ATTRIBUTE': ('has_attribute.csv', 'HAS_ATTRIBUTE', ('class_full_name', 'Class'), ('attr_id', 'Attribute')),
+    'DEFINES_FUNCTION': ('defines_function.csv', 'DEFINES', ('file_path', 'File'), ('func_id', 'Function')),
+    'IMPORTS': ('imports.csv', 'IMPORTS', ('source_path', 'File'), ('target_path', 'File')),
+    **{
+        kind: (f"{kind.lower()}.csv", 'CALLS', ('caller_id', caller), ('callee_id', callee))
+        for (caller, callee), kind in CALL_KINDS.items()
+    },
+}
+
+# Not neo4j-admin's default ';', which decorator arguments and call names can contain; the
+# importer has no escaping inside arrays, so the delimiter must be one no value uses
+CSV_ARRAY_DELIMITER = '\x1f'
+
+
+def csv_node_id(id_space: str, value: str, repo: str) -> str:
+    """Import ID of a node: ID spaces are global to an import, so all but Repository are scoped by repo"""
+    return value if id_space == 'Repository' else f"{repo}|{value}"
+
+
+class CsvExportWriter:
+    """Writes the same rows as Neo4jBatchWriter to headered CSVs for neo4j-admin database import"""
+
+    def __init__(self, output_dir: str):
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.nodes_created = 0
+        self.relationships_created = 0
+        self._files = {}
+        self._writers = {}
+        # The offline importer rejects duplicate IDs, so dedupe what MERGE would have collapsed
+        self._seen = {}
+
+    async def write(self, kind: str, rows: List[Dict[str, Any]]):
+        if kind in CSV_NODE_COLUMNS:
+            file_name, columns = CSV_NODE_COLUMNS[kind]
+            writer = self._writer(kind, file_name, [f':ID({kind})'] + [header for _, header in columns] + [':LABEL'])
+            seen = self._seen.setdefault(kind, set())
+            for row in rows:
+                node_id = csv_node_id(kind, row[columns[0][0]], row.get('repo'))
+                if node_id in seen:
+                    continue
+                seen.add(node_id)
+                writer.writerow([node_id] + [self._format(row.get(key)) for key, _ in columns] + [kind])
+                self.nodes_created += 1
+        else:
+            file_name, rel_type, (start_key, start_space), (end_key, end_space) = CSV_RELATIONSHIP_COLUMNS[kind]
+            writer = self._writer(kind, file_name, [f':START_ID({start_space})', f':END_ID({end_space})', ':TYPE'])
+            seen = self._seen.setdefault(kind, set())
+            for row in rows:
+                edge = (csv_node_id(start_space, row[start_key], row['repo']),
+                        csv_node_id(end_space, row[end_key], row['repo']))
+                if edge in seen:
+                    continue
+                seen.add(edge)
+                writer.writerow([edge[0], edge[1], rel_type])
+                self.relationships_created += 1
+
+    def _writer(self, kind: str, file_name: str, header: List[str]):
+        if kind not in self._writers:
+            handle = open(self.output_dir / file_name, 'w', newline='', encoding='utf-8')
+            self._files[kind] = handle
+            self._writers[kind] = csv.writer(handle)
+            self._writers[kind].writerow(header)
+        return self._writers[kind]
+
+    @staticmethod
+    def _format(value) -> str:
+        if value is None:
+            return ''
+        if isinstance(value, bool):
+            return 'true' if value else 'false'
+        if isinstance(value, list):
+            return CSV_ARRAY_DELIMITER.join(str(v).replace(CSV_ARRAY_DELIMITER, ' ') for v in value)
+        return str(value)
+
+    def import_command(self) -> str:
+        """The neo4j-admin invocation that loads the exported files"""
+        nodes = ' '.join(f"--nodes={self.output_dir / CSV_NODE_COLUMNS[kind][0]}"
+                         for kind in CSV_NODE_COLUMNS if kind in self._files)
+        relationships = ' '.join(f"--relationships={self.output_dir / CSV_RELATIONSHIP_COLUMNS[kind][0]}"
+                                 for kind in CSV_RELATIONSHIP_COLUMNS if kind in self._files)
+        # Docstrings span several lines
+        return (f"neo4j-admin database import full --multiline-fields=true "
+                f"--array-delimiter=U+{ord(CSV_ARRAY_DELIMITER):04X} {nodes} {relationships} neo4j")
+
+    def close(self):
+        for handle in self._files.values():
+            handle.close()
+
+
 class Neo4jCodeAnalyzer:
     """Analyzes code for direct Neo4j insertion"""
     
@@ -62,109 +700,32 @@ class Neo4jCodeAnalyzer:
             'cryptography', 'bcrypt', 'passlib', 'jwt', 'authlib', 'oauthlib'
         }
     
-    def analyze_python_file(self, file_path: Path, repo_root: Path, project_modules: Set[str]) -> Dict[str, Any]:
-        """Extract structure for direct Neo4j insertion"""
+    def analyze_python_file(self, file_path: Path, repo_root: Path, project_modules: Set[str],
+                            raw: Optional[bytes] = None) -> Dict[str, Any]:
+        """Extract structure for direct Neo4j insertion (raw: the file's bytes, if already read)"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            if raw is None:
+                with open(file_path, 'rb') as f:
+                    raw = f.read()
+            content = raw.decode('utf-8')
             
             tree = ast.parse(content)
             relative_path = str(file_path.relative_to(repo_root))
             module_name = relative_path.replace('/', '.').replace('.py', '')
             
-            # Extract structure
-            classes = []
-            functions = []
-            imports = []
-            
-            for node in ast.walk(tree):
-                if isinstance(node, ast.ClassDef):
-                    # Extract class with its methods and attributes
-                    methods = []
-                    attributes = []
-                    
-                    for item in node.body:
-                        if isinstance(item, ast.FunctionDef):
-                            if not item.name.startswith('_'):  # Public methods only
-                                # Extract parameter info with types
-                                params = []
-                                for arg in item.args.args:
-                                    if arg.arg != 'self':
-                                        param_info = {
-                                            'name': arg.arg,
-                                            'type': self._get_name(arg.annotation) if arg.annotation else 'Any'
-                                        }
-                                        params.append(param_info)
-                                
-                                # Get return type annotation
-                                return_type = self._get_name(item.returns) if item.returns else 'Any'
-                                
-                                methods.append({
-                                    'name': item.name,
-                                    'params': params[:5],  # Limit to 5 params
-                                    'return_type': return_type,
-                                    'args': [arg.arg for arg in item.args.args if arg.arg != 'self'][:5]  # Keep for backwards compatibility
-                                })
-                        elif isinstance(item, ast.AnnAssign) and isinstance(item.target, ast.Name):
-                            # Type annotated attributes
-                            if not item.target.id.startswith('_'):
-                                attributes.append({
-                                    'name': item.target.id,
-                                    'type': self._get_name(item.annotation) if item.annotation else 'Any'
-                                })
-                    
-                    classes.append({
-                        'name': node.name,
-                        'full_name': f"{module_name}.{node.name}",
-                        'methods': methods,
-                        'attributes': attributes
-                    })
-                
-                elif isinstance(node, ast.FunctionDef):
-                    # Only top-level functions
-                    if not any(node in cls_node.body for cls_node in ast.walk(tree) if isinstance(cls_node, ast.ClassDef)):
-                        if not node.name.startswith('_'):
-                            # Extract parameter info with types
-                            params = []
-                            for arg in node.args.args:
-                                param_info = {
-                                    'name': arg.arg,
-                                    'type': self._get_name(arg.annotation) if arg.annotation else 'Any'
-                                }
-                                params.append(param_info)
-                            
-                            # Get return type annotation
-                            return_type = self._get_name(node.returns) if node.returns else 'Any'
-                            
-                            # Convert params to simple list format for Neo4j storage
-                            params_list = [f"{p['name']}:{p['type']}" for p in params]
-                            
-                            functions.append({
-                                'name': node.name,
-                                'full_name': f"{module_name}.{node.name}",
-                                'params': params[:5],  # Keep complex format for local processing
-                                'params_list': params_list[:5],  # Simple string format for Neo4j
-                                'return_type': return_type,
-                                'args': [arg.arg for arg in node.args.args][:5]  # Keep for backwards compatibility
-                            })
-                
-                elif isinstance(node, (ast.Import, ast.ImportFrom)):
-                    # Track internal imports only
-                    if isinstance(node, ast.Import):
-                        for alias in node.names:
-                            if self._is_likely_internal(alias.name, project_modules):
-                                imports.append(alias.name)
-                    elif isinstance(node, ast.ImportFrom) and node.module:
-                        if (node.module.startswith('.') or self._is_likely_internal(node.module, project_modules)):
-                            imports.append(node.module)
+            # Extract structure in a single scope-aware traversal
+            visitor = CodeStructureVisitor(self, module_name, project_modules)
+            visitor.visit(tree)
+            visitor.finish()
             
             return {
                 'module_name': module_name,
                 'file_path': relative_path,
-                'classes': classes,
-                'functions': functions,
-                'imports': list(set(imports)),  # Remove duplicates
-                'line_count': len(content.splitlines())
+                'classes': visitor.classes,
+                'functions': visitor.functions,
+                'imports': sorted(visitor.imports),
+                'line_count': len(content.splitlines()),
+                'content_hash': file_content_hash(raw)
             }
             
         except Exception as e:
@@ -241,13 +802,249 @@ class Neo4jCodeAnalyzer:
             return "Any"
 
 
+def repository_name(source: str) -> str:
+    """Repository name for a URL or path; it namespaces every node the repository owns"""
+    return source.rstrip('/').split('/')[-1].replace('.git', '')
+
+
+def repository_source(source: str) -> str:
+    """Where a repository comes from: the absolute path of a local directory, otherwise the URL.
+    
+    Names are only the last path component, so org1/utils and org2/utils share one; the
+    source recorded on the Repository node tells them apart.
+    """
+    path = Path(source).expanduser()
+    if path.is_dir():
+        return str(path.resolve())
+    source = source.rstrip('/')
+    return source[:-len('.git')] if source.endswith('.git') else source
+
+
+class RepositoryNameClash(ValueError):
+    """A repository name is already taken by a repository ingested from a different source"""
+
+
+def remove_directory(path: Path):
+    """Best-effort recursive delete that copes with read-only files (e.g. git objects on Windows)"""
+    def handle_remove_readonly(func, path, exc):
+        try:
+            if os.path.exists(path):
+                os.chmod(path, 0o777)
+                func(path)
+        except PermissionError:
+            logger.warning(f"Could not remove {path} - file in use, skipping")
+    
+    try:
+        shutil.rmtree(path, onerror=handle_remove_readonly)
+    except Exception as e:
+        logger.warning(f"Could not fully remove {path}: {e}. Proceeding anyway...")
+
+
+class RepoSource:
+    """Turns a repository argument into a working tree of Python files on disk.
+    
+    - A local working tree (or any plain directory) is analyzed in place: no copy, no cleanup.
+    - A local bare repository, such as an existing mirror, gets a sparse *.py worktree that
+      shares its object store.
+    - Anything else is a remote URL. It is mirrored once into mirrors_dir with a blobless
+      partial clone (--filter=blob:none) and only fetched on later runs; the checkout is a
+      sparse *.py worktree, so docs, binaries and assets are never downloaded.
+    """
+
+    def __init__(self, source: str, mirrors_dir: Path, checkout_dir: Path):
+        self.source = source
+        self.mirrors_dir = mirrors_dir
+        self.checkout_dir = checkout_dir
+        self.mirror: Optional[Path] = None
+
+    def prepare(self) -> Path:
+        source_path = Path(self.source).expanduser()
+        if source_path.is_dir():
+            if not self._is_bare(source_path):
+                logger.info(f"Using local working tree in place: {source_path}")
+                return source_path
+            self.mirror = source_path
+            logger.info(f"Using existing bare repository: {source_path}")
+        else:
+            self.mirror = self._sync_mirror()
+        
+        return self._checkout_python_files()
+
+    def cleanup(self):
+        """Remove the worktree checkout; local trees and mirrors are left alone"""
+        if self.mirror is None:
+            return
+        logger.info(f"Removing checkout: {self.checkout_dir}")
+        self._git(['worktree', 'remove', '--force', str(self.checkout_dir)], cwd=self.mirror, check=False)
+        if self.checkout_dir.exists():
+            remove_directory(self.checkout_dir)
+        self._git(['worktree', 'prune'], cwd=self.mirror, check=False)
+
+    def _sync_mirror(self) -> Path:
+        # Same-named repositories from different owners get separate mirrors
+        digest = hashlib.sha256(repository_source(self.source).encode('utf-8')).hexdigest()[:8]
+        mirror = self.mirrors_dir / f"{repository_name(self.source)}-{digest}.git"
+        if mirror.exists():
+            logger.info(f"Fetching into existing mirror: {mirror}")
+            self._git(['fetch', '--prune', 'origin'], cwd=mirror)
+        else:
+            logger.info(f"Creating blobless mirror of {self.source} at {mirror}")
+            mirror.parent.mkdir(parents=True, exist_ok=True)
+            self._git(['clone', '--bare', '--filter=blob:none', self.source, str(mirror)])
+            # Bare clones have no fetch refspec; add one so later fetches update the branches
+            self._git(['config', 'remote.origin.fetch', '+refs/heads/*:refs/heads/*'], cwd=mirror)
+        return mirror
+
+    def _checkout_python_files(self) -> Path:
+        if self.checkout_dir.exists():
+            logger.info(f"Removing stale checkout: {self.checkout_dir}")
+            remove_directory(self.checkout_dir)
+        self._git(['worktree', 'prune'], cwd=self.mirror)
+        
+        logger.info(f"Checking out *.py files to: {self.checkout_dir}")
+        self._git(['worktree', 'add', '--no-checkout', '--detach', str(self.checkout_dir), 'HEAD'], cwd=self.mirror)
+        self._git(['sparse-checkout', 'set', '--no-cone', '*.py'], cwd=self.checkout_dir)
+        # Missing blobs for the sparse paths are fetched on demand from the mirror's remote
+        self._git(['checkout'], cwd=self.checkout_dir)
+        return self.checkout_dir
+
+    def _is_bare(self, path: Path) -> bool:
+        result = self._git(['rev-parse', '--is-bare-repository'], cwd=path, check=False)
+        return result.returncode == 0 and result.stdout.strip() == 'true'
+
+    @staticmethod
+    def _git(args: List[str], cwd: Optional[Path] = None, check: bool = True) -> subprocess.CompletedProcess:
+        return subprocess.run(['git', *args], cwd=cwd, check=check, capture_output=True, text=True)
+
+
+# Bump whenever analyze_python_file output changes so stale cache entries are ignored
+ANALYZER_VERSION = 6
+
+
+class ParseCache:
+    """Content-addressed SQLite cache of analyze_python_file results with size-bounded LRU eviction"""
+
+    def __init__(self, path: Path, max_bytes: int = 256 * 1024 * 1024):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        # Lookups run on the pipeline's single cache thread, so the connection is not tied to its creator
+        self.conn = sqlite3.connect(str(path), check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS analyses (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS analyses_last_used ON analyses (last_used)")
+        self.total_bytes = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM analyses").fetchone()[0]
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._pending_writes = 0
+
+    @staticmethod
+    def key(content_hash: str, relative_path: str, project_modules: Set[str]) -> str:
+        """Cache key: module_name depends on the path and import filtering on project_modules"""
+        material = f"{ANALYZER_VERSION}\0{content_hash}\0{relative_path}\0{','.join(sorted(project_modules))}"
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute("SELECT value FROM analyses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        
+        self.hits += 1
+        self.conn.execute("UPDATE analyses SET last_used = ? WHERE key = ?", (time.time(), key))
+        self._note_write()
+        return json.loads(row[0])
+
+    def put(self, key: str, analysis: Dict[str, Any]):
+        value = json.dumps(analysis)
+        previous = self.conn.execute("SELECT size FROM analyses WHERE key = ?", (key,)).fetchone()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO analyses (key, value, size, last_used) VALUES (?, ?, ?, ?)",
+            (key, value, len(value), time.time())
+        )
+        self.total_bytes += len(value) - (previous[0] if previous else 0)
+        if self.total_bytes > self.max_bytes:
+            self._evict()
+        self._note_write()
+
+    def _evict(self):
+        """Drop least recently used entries until the cache is back under 90% of max_bytes"""
+        target = self.max_bytes * 0.9
+        victims = []
+        for key, size in self.conn.execute("SELECT key, size FROM analyses ORDER BY last_used"):
+            if self.total_bytes <= target:
+                break
+            victims.append((key,))
+            self.total_bytes -= size
+        self.conn.executemany("DELETE FROM analyses WHERE key = ?", victims)
+        self.evictions += len(victims)
+
+    def _note_write(self):
+        # Commit in groups rather than per file
+        self._pending_writes += 1
+        if self._pending_writes >= 500:
+            self.conn.commit()
+            self._pending_writes = 0
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+
+# Per-process state for the parallel analysis stage, set up once by the pool initializer
+_worker_analyzer: Optional[Neo4jCodeAnalyzer] = None
+_worker_repo_root: Optional[Path] = None
+_worker_project_modules: Set[str] = set()
+
+
+def _init_analysis_worker(repo_root: str, project_modules: Set[str]):
+    """Process pool initializer: ship repo-wide context once instead of with every file"""
+    global _worker_analyzer, _worker_repo_root, _worker_project_modules
+    _worker_analyzer = Neo4jCodeAnalyzer()
+    _worker_repo_root = Path(repo_root)
+    _worker_project_modules = project_modules
+
+
+def _analyze_file_in_worker(file_path: str, raw: Optional[bytes] = None) -> Optional[Dict[str, Any]]:
+    """Process pool task: analyze one file and return a plain, picklable dict"""
+    return _worker_analyzer.analyze_python_file(Path(file_path), _worker_repo_root, _worker_project_modules, raw)
+
+
 class DirectNeo4jExtractor:
     """Creates nodes and relationships directly in Neo4j"""
     
-    def __init__(self, neo4j_uri: str, neo4j_user: str, neo4j_password: str):
+    def __init__(self, neo4j_uri: str, neo4j_user: str, neo4j_password: str, batch_size: int = 1000,
+                 workers: Optional[int] = None, flush_files: int = 100, incremental: bool = False,
+                 use_parse_cache: bool = True, parse_cache_path: Optional[str] = None,
+                 parse_cache_max_mb: int = 256, queue_size: int = 256, write_concurrency: int = 4,
+                 max_connection_pool_size: Optional[int] = None, max_transaction_retry_time: float = 30.0,
+                 embedder: Optional[Embedder] = None):
         self.neo4j_uri = neo4j_uri
         self.neo4j_user = neo4j_user
         self.neo4j_password = neo4j_password
+        self.batch_size = batch_size
+        self.workers = workers or os.cpu_count() or 1
+        self.flush_files = flush_files
+        self.queue_size = queue_size
+        self.incremental = incremental
+        # Parse results survive between runs in repos/.parse_cache.sqlite next to this script by default
+        self.use_parse_cache = use_parse_cache
+        self.parse_cache_path = parse_cache_path or str(Path(__file__).parent / "repos" / ".parse_cache.sqlite")
+        self.parse_cache_max_mb = parse_cache_max_mb
+        self.parse_cache: Optional[ParseCache] = None
+        self.write_concurrency = write_concurrency
+        # Every in-flight write holds a connection; keep a few spare for metadata queries
+        self.max_connection_pool_size = max_connection_pool_size or write_concurrency + 4
+        self.max_transaction_retry_time = max_transaction_retry_time
+        # Optional: with an embedder, every ingest also refreshes the code entity vector index
+        self.embedder = embedder
         self.driver = None
         self.analyzer = Neo4jCodeAnalyzer()
     
@@ -256,359 +1053,694 @@ class DirectNeo4jExtractor:
         logger.info("Initializing Neo4j connection...")
         self.driver = AsyncGraphDatabase.driver(
             self.neo4j_uri, 
-            auth=(self.neo4j_user, self.neo4j_password)
+            auth=(self.neo4j_user, self.neo4j_password),
+            max_connection_pool_size=self.max_connection_pool_size,
+            max_transaction_retry_time=self.max_transaction_retry_time
         )
         
-        # Clear existing data
-        logger.info("Clearing existing data...")
-        async with self.driver.session() as session:
-            await session.run("MATCH (n) DETACH DELETE n")
-        
-        # Create constraints and indexes
+        # Nothing is wiped here: each repository replaces only its own subgraph (see delete_repository)
         logger.info("Creating constraints and indexes...")
         async with self.driver.session() as session:
-            # Create constraints - using MERGE-friendly approach
-            await session.run("CREATE CONSTRAINT IF NOT EXISTS FOR (f:File) REQUIRE f.path IS UNIQUE")
-            await session.run("CREATE CONSTRAINT IF NOT EXISTS FOR (c:Class) REQUIRE c.full_name IS UNIQUE")
-            # Remove unique constraints for methods/attributes since they can be duplicated across classes
-            # await session.run("CREATE CONSTRAINT IF NOT EXISTS FOR (m:Method) REQUIRE m.full_name IS UNIQUE")
-            # await session.run("CREATE CONSTRAINT IF NOT EXISTS FOR (f:Function) REQUIRE f.full_name IS UNIQUE")
-            # await session.run("CREATE CONSTRAINT IF NOT EXISTS FOR (a:Attribute) REQUIRE a.full_name IS UNIQUE")
+            await self._drop_global_constraints(session)
+            
+            await session.run("CREATE CONSTRAINT IF NOT EXISTS FOR (r:Repository) REQUIRE r.name IS UNIQUE")
+            for label, key in REPOSITORY_CONSTRAINTS.items():
+                await session.run(f"CREATE CONSTRAINT IF NOT EXISTS FOR (n:{label}) REQUIRE (n.repo, n.{key}) IS UNIQUE")
+                # Single-property index so per-repository scans and deletes never touch other repositories
+                await session.run(f"CREATE INDEX IF NOT EXISTS FOR (n:{label}) ON (n.repo)")
             
             # Create indexes for performance
             await session.run("CREATE INDEX IF NOT EXISTS FOR (f:File) ON (f.name)")
+            await session.run("CREATE INDEX IF NOT EXISTS FOR (f:File) ON (f.module_name)")
             await session.run("CREATE INDEX IF NOT EXISTS FOR (c:Class) ON (c.name)")
             await session.run("CREATE INDEX IF NOT EXISTS FOR (m:Method) ON (m.name)")
         
+        if self.embedder:
+            await EmbeddingIndexer(self.driver, self.embedder).ensure_index()
+        
         logger.info("Neo4j initialized successfully")
     
+    @staticmethod
+    async def _drop_global_constraints(session):
+        """Drop the single-property File.path / Class.full_name constraints from older versions of this script.
+        
+        They were global, so two repositories with the same paths or module names collided.
+        """
+        result = await session.run("""
+            SHOW CONSTRAINTS YIELD name, labelsOrTypes, properties
+            WHERE (labelsOrTypes = ['File'] AND properties = ['path'])
+               OR (labelsOrTypes = ['Class'] AND properties = ['full_name'])
+            RETURN name
+        """)
+        names = [record['name'] async for record in result]
+        for name in names:
+            logger.info(f"Dropping legacy global constraint {name}")
+            await session.run(f"DROP CONSTRAINT {name} IF EXISTS")
+    
+    async def _check_repository_source(self, repo_name: str, source: str):
+        """Refuse to ingest over a same-named repository from another source, which would replace its graph"""
+        async with self.driver.session() as session:
+            result = await session.run("MATCH (r:Repository {name: $repo_name}) RETURN r.source as source",
+                                       repo_name=repo_name)
+            record = await result.single()
+        
+        # Repositories ingested before sources were recorded are adopted by whoever ingests them next
+        if record and record['source'] and record['source'] != source:
+            raise RepositoryNameClash(
+                f"Repository name '{repo_name}' is already used by {record['source']}; "
+                f"ingest {source} under another name (REPO_NAME) or delete the existing one first"
+            )
+    
+    async def delete_repository(self, repo_name: str):
+        """Delete one repository's subgraph in batched transactions, leaving other repositories untouched"""
+        logger.info(f"Deleting existing graph for {repo_name}...")
+        async with self.driver.session() as session:
+            for label in REPOSITORY_LABELS:
+                # CALL { } IN TRANSACTIONS needs an auto-commit transaction, hence session.run
+                result = await session.run(f"""
+                    MATCH (n:{label} {{repo: $repo}})
+                    CALL {{ WITH n DETACH DELETE n }} IN TRANSACTIONS OF $batch_size ROWS
+                """, repo=repo_name, batch_size=self.batch_size)
+                summary = await result.consume()
+                if summary.counters.nodes_deleted:
+                    logger.info(f"Deleted {summary.counters.nodes_deleted} {label} nodes")
+            await session.run("MATCH (r:Repository {name: $repo}) DETACH DELETE r", repo=repo_name)
+    
     async def close(self):
         """Close Neo4j connection"""
         if self.driver:
             await self.driver.close()
     
-    def clone_repo(self, repo_url: str, target_dir: str) -> str:
-        """Clone repository with shallow clone"""
-        logger.info(f"Cloning repository to: {target_dir}")
-        if os.path.exists(target_dir):
-            logger.info(f"Removing existing directory: {target_dir}")
-            try:
-                def handle_remove_readonly(func, path, exc):
-                    try:
-                        if os.path.exists(path):
-                            os.chmod(path, 0o777)
-                            func(path)
-                    except PermissionError:
-                        logger.warning(f"Could not remove {path} - file in use, skipping")
-                        pass
-                shutil.rmtree(target_dir, onerror=handle_remove_readonly)
-            except Exception as e:
-                logger.warning(f"Could not fully remove {target_dir}: {e}. Proceeding anyway...")
-        
-        logger.info(f"Running git clone from {repo_url}")
-        subprocess.run(['git', 'clone', '--depth', '1', repo_url, target_dir], check=True)
-        logger.info("Repository cloned successfully")
-        return target_dir
+    # Directories never worth parsing
+    exclude_dirs = {
+        'tests', 'test', '__pycache__', '.git', 'venv', 'env',
+        'node_modules', 'build', 'dist', '.pytest_cache', 'docs',
+        'examples', 'example', 'demo', 'benchmark'
+    }
     
     def get_python_files(self, repo_path: str) -> List[Path]:
         """Get Python files, focusing on main source directories"""
-        python_files = []
-        exclude_dirs = {
-            'tests', 'test', '__pycache__', '.git', 'venv', 'env',
-            'node_modules', 'build', 'dist', '.pytest_cache', 'docs',
-            'examples', 'example', 'demo', 'benchmark'
-        }
-        
+        return list(self.iter_python_files(repo_path))
+    
+    def iter_python_files(self, repo_path: str) -> Iterator[Path]:
+        """Yield Python files as they are discovered, so parsing can start before the walk ends"""
         for root, dirs, files in os.walk(repo_path):
-            dirs[:] = [d for d in dirs if d not in exclude_dirs and not d.startswith('.')]
+            dirs[:] = [d for d in dirs if d not in self.exclude_dirs and not d.startswith('.')]
             
             for file in files:
                 if file.endswith('.py') and not file.startswith('test_'):
                     file_path = Path(root) / file
                     if (file_path.stat().st_size < 500_000 and 
                         file not in ['setup.py', 'conftest.py']):
-                        python_files.append(file_path)
-        
-        return python_files
+                        yield file_path
+    
+    def _project_modules(self, repo_path: Path) -> Set[str]:
+        """Top-level packages and modules; needs only the repository root, not the full file list"""
+        project_modules = set()
+        for entry in os.scandir(repo_path):
+            if entry.name.startswith('.'):
+                continue
+            if entry.is_dir() and entry.name not in self.exclude_dirs:
+                project_modules.add(entry.name)
+            elif entry.is_file() and entry.name.endswith('.py'):
+                project_modules.add(entry.name[:-3])
+        return project_modules
     
-    async def analyze_repository(self, repo_url: str, temp_dir: str = None):
-        """Analyze repository and create nodes/relationships in Neo4j"""
-        repo_name = repo_url.split('/')[-1].replace('.git', '')
+    async def analyze_repository(self, repo_url: str, temp_dir: str = None, export_dir: str = None,
+                                 repo_name: str = None):
+        """Analyze repository and create nodes/relationships in Neo4j.
+        
+        With export_dir set, nothing is sent over Bolt: the graph is written as
+        neo4j-admin import CSVs instead, for fast offline initial loads.
+        
+        repo_name defaults to the last component of repo_url. A name already taken by a
+        repository from another source raises RepositoryNameClash.
+        """
+        repo_name = repo_name or repository_name(repo_url)
+        source_id = repository_source(repo_url)
         logger.info(f"Analyzing repository: {repo_name}")
+        if not export_dir:
+            await self._check_repository_source(repo_name, source_id)
         
         # Set default temp_dir to repos folder at script level
+        script_dir = Path(__file__).parent
         if temp_dir is None:
-            script_dir = Path(__file__).parent
             temp_dir = str(script_dir / "repos" / repo_name)
         
-        # Clone and analyze
-        repo_path = Path(self.clone_repo(repo_url, temp_dir))
+        # Local trees are used in place; everything else goes through a persistent mirror
+        source = RepoSource(repo_url, mirrors_dir=script_dir / "repos" / ".mirrors", checkout_dir=Path(temp_dir))
+        repo_path = source.prepare()
+        if self.use_parse_cache:
+            self.parse_cache = ParseCache(Path(self.parse_cache_path), max_bytes=self.parse_cache_max_mb * 1024 * 1024)
         
         try:
-            logger.info("Getting Python files...")
-            python_files = self.get_python_files(str(repo_path))
-            logger.info(f"Found {len(python_files)} Python files to analyze")
-            
             # First pass: identify project modules
             logger.info("Identifying project modules...")
-            project_modules = set()
-            for file_path in python_files:
-                relative_path = str(file_path.relative_to(repo_path))
-                module_parts = relative_path.replace('/', '.').replace('.py', '').split('.')
-                if len(module_parts) > 0 and not module_parts[0].startswith('.'):
-                    project_modules.add(module_parts[0])
-            
+            project_modules = self._project_modules(repo_path)
             logger.info(f"Identified project modules: {sorted(project_modules)}")
             
-            # Second pass: analyze files and collect data
-            logger.info("Analyzing Python files...")
-            modules_data = []
-            for i, file_path in enumerate(python_files):
-                if i % 20 == 0:
-                    logger.info(f"Analyzing file {i+1}/{len(python_files)}: {file_path.name}")
-                
-                analysis = self.analyzer.analyze_python_file(file_path, repo_path, project_modules)
-                if analysis:
-                    modules_data.append(analysis)
+            # Files stream straight from discovery into the pipeline unless incremental planning needs the list
+            commit_sha = self._head_commit(repo_path)
+            # Only a clean tree is exactly its commit; local edits and untracked files are not in it
+            tree_clean = commit_sha is not None and self._is_clean_tree(repo_path)
+            previous = await self._previous_ingest(repo_name) if self.incremental and not export_dir else None
+            files_to_analyze: Iterable[Path] = self.iter_python_files(str(repo_path))
+            deleted_paths = []
+            touched_paths = set()
+            if previous:
+                if tree_clean and previous['commit_sha'] == commit_sha:
+                    print(f"\n=== {repo_name} is already ingested at {commit_sha[:12]}, nothing to do ===")
+                    return
+                python_files = self.get_python_files(str(repo_path))
+                files_to_analyze, deleted_paths = self._plan_incremental(repo_path, python_files, previous)
+                touched_paths = {str(f.relative_to(repo_path)) for f in files_to_analyze}
+                since = previous['commit_sha'][:12] if previous['commit_sha'] else f"the ingest of {previous['ingested_at']}"
+                logger.info(f"Incremental ingest since {since}: "
+                            f"{len(files_to_analyze)} added/changed, {len(deleted_paths)} deleted")
+            
+            start_time = time.perf_counter()
+            if export_dir:
+                writer = CsvExportWriter(export_dir)
+            else:
+                writer = Neo4jBatchWriter(self.driver, batch_size=self.batch_size, concurrency=self.write_concurrency)
+            if previous is None and not export_dir:
+                # A full ingest replaces this repository's subgraph only; other repositories stay as they are
+                await self.delete_repository(repo_name)
+            await writer.write('Repository', [{'name': repo_name, 'source': source_id}])
             
-            logger.info(f"Found {len(modules_data)} files with content")
+            call_graph = CallGraph()
+            if previous:
+                # Drop the stale subgraphs; changed File nodes are kept so incoming IMPORTS survive
+                stale_paths = [path for path in touched_paths if path in previous['files']] + deleted_paths
+                if stale_paths:
+                    await writer.write('CLEAR_FILE', [{'repo': repo_name, 'path': path} for path in stale_paths])
+                if deleted_paths:
+                    await writer.write('DELETE_FILE', [{'repo': repo_name, 'path': path} for path in deleted_paths])
+                # What is left belongs to untouched files: their symbols resolve new calls, and
+                # their recorded calls may now resolve to callables written below
+                for stored in await self._stored_callables(repo_name):
+                    call_graph.add_stored(stored['label'], stored['id'], stored['full_name'], stored['calls'])
             
-            # Create nodes and relationships in Neo4j
-            logger.info("Creating nodes and relationships in Neo4j...")
-            await self._create_graph(repo_name, modules_data)
+            # Second pass: discovery -> parallel parsing -> batched writes, all overlapping
+            logger.info(f"Streaming Python files through {self.workers} analysis workers...")
+            totals, import_rows = await self._run_pipeline(files_to_analyze, repo_path, project_modules,
+                                                           repo_name, writer, commit_sha, call_graph)
+            logger.info(f"Found {totals['files']} files with content")
             
-            # Print summary
-            total_classes = sum(len(mod['classes']) for mod in modules_data)
-            total_methods = sum(len(cls['methods']) for mod in modules_data for cls in mod['classes'])
-            total_functions = sum(len(mod['functions']) for mod in modules_data)
-            total_imports = sum(len(mod['imports']) for mod in modules_data)
+            # Imports are resolved in memory once every module is known, then written in one pass
+            module_index = ModuleIndex()
+            if previous:
+                for path, stored_file in previous['files'].items():
+                    module_index.add(path, stored_file['module_name'])
+                for path in deleted_paths:
+                    module_index.remove(path)
+            for file_path, module_name in totals['modules']:
+                module_index.add(file_path, module_name)
+            import_edges = self._resolve_imports(repo_name, module_index, import_rows)
+            
+            # Unchanged files that import a newly added module need their edges resolved again
+            if previous:
+                import_edges.extend(self._reresolve_import_edges(repo_name, module_index, previous['files'], totals['modules'],
+                                                                 touched_paths | set(deleted_paths)))
+            
+            if import_edges:
+                await writer.write('IMPORTS', import_edges)
             
+            # Calls resolve against the repo-wide symbol table the same way
+            call_edges = call_graph.edges(repo_name)
+            await self._write_concurrently(writer, call_edges)
+            
+            if export_dir:
+                writer.close()
+            else:
+                # A dirty tree is recorded without a commit, so the next run compares every file's hash
+                await self._mark_ingested(repo_name, commit_sha if tree_clean else None)
+            write_stats = self._write_stats(writer, start_time)
+            
+            # Embeddings are computed from the written graph, so only new or changed entities are embedded
+            embedding_stats = None
+            if self.embedder and not export_dir:
+                embedding_stats = await EmbeddingIndexer(self.driver, self.embedder).index_repository(repo_name)
+            
+            # Print summary
             print(f"\\n=== Direct Neo4j Repository Analysis for {repo_name} ===")
-            print(f"Files processed: {len(modules_data)}")
-            print(f"Classes created: {total_classes}")
-            print(f"Methods created: {total_methods}")
-            print(f"Functions created: {total_functions}")
-            print(f"Import relationships: {total_imports}")
+            print(f"Files processed: {totals['files']}")
+            if previous:
+                print(f"Files deleted: {len(deleted_paths)}")
+                print(f"Files unchanged: {len(previous['files']) - len(deleted_paths) - len(touched_paths & set(previous['files']))}")
+            print(f"Classes created: {totals['classes']}")
+            print(f"Methods created: {totals['methods']}")
+            print(f"Functions created: {totals['functions']}")
+            print(f"Import relationships: {len(import_edges)}")
+            print(f"Call relationships: {sum(len(rows) for rows in call_edges.values())}")
+            if totals['first_write_seconds'] is not None:
+                print(f"Time to first node: {totals['first_write_seconds']:.2f}s")
+            if export_dir:
+                print(f"CSV export: {write_stats['nodes_created']} nodes, {write_stats['relationships_created']} "
+                      f"relationships ({write_stats['nodes_per_second']:.0f} nodes/s, "
+                      f"{write_stats['relationships_per_second']:.0f} relationships/s)")
+            else:
+                print(f"Graph write: {write_stats['nodes_created']} nodes, {write_stats['relationships_created']} relationships "
+                      f"in {write_stats['transactions']} transactions ({write_stats['nodes_per_second']:.0f} nodes/s, "
+                      f"{write_stats['relationships_per_second']:.0f} relationships/s)")
+                print(f"Write concurrency: {write_stats['concurrency']} sessions, connection pool of "
+                      f"{self.max_connection_pool_size}, {write_stats['retries']} transient retries")
+            if embedding_stats:
+                print(f"Embeddings ({self.embedder.name}): {embedding_stats['embedded']} embedded, "
+                      f"{embedding_stats['unchanged']} unchanged in {embedding_stats['seconds']:.2f}s")
+            if self.parse_cache:
+                print(f"Parse cache: {self.parse_cache.hits} hits, {self.parse_cache.misses} misses, "
+                      f"{self.parse_cache.evictions} evictions")
+            
+            if export_dir:
+                print(f"Exported CSVs to {export_dir}. Load them with:")
+                print(f"  {writer.import_command()}")
             
             logger.info(f"Successfully created Neo4j graph for {repo_name}")
             
         finally:
-            if os.path.exists(temp_dir):
-                logger.info(f"Cleaning up temporary directory: {temp_dir}")
-                try:
-                    def handle_remove_readonly(func, path, exc):
-                        try:
-                            if os.path.exists(path):
-                                os.chmod(path, 0o777)
-                                func(path)
-                        except PermissionError:
-                            logger.warning(f"Could not remove {path} - file in use, skipping")
-                            pass
-                    
-                    shutil.rmtree(temp_dir, onerror=handle_remove_readonly)
-                    logger.info("Cleanup completed")
-                except Exception as e:
-                    logger.warning(f"Cleanup failed: {e}. Directory may remain at {temp_dir}")
-                    # Don't fail the whole process due to cleanup issues
-    
-    async def _create_graph(self, repo_name: str, modules_data: List[Dict]):
-        """Create all nodes and relationships in Neo4j"""
+            if self.parse_cache:
+                self.parse_cache.close()
+                self.parse_cache = None
+            source.cleanup()
+    
+    def _head_commit(self, repo_path: Path) -> Optional[str]:
+        try:
+            result = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=repo_path,
+                                    check=True, capture_output=True, text=True)
+            return result.stdout.strip()
+        except (subprocess.CalledProcessError, OSError):
+            logger.warning(f"Could not determine commit SHA for {repo_path}")
+            return None
+    
+    def _is_clean_tree(self, repo_path: Path) -> bool:
+        """True when git reports no modified, staged or untracked files"""
+        try:
+            result = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=all'], cwd=repo_path,
+                                    check=True, capture_output=True, text=True)
+        except (subprocess.CalledProcessError, OSError):
+            return False
+        return not result.stdout.strip()
+    
+    async def _previous_ingest(self, repo_name: str) -> Optional[Dict[str, Any]]:
+        """Last completed ingest of this repository: its commit SHA (None for a dirty or non-git tree)
+        and per-file hashes/imports"""
+        async with self.driver.session() as session:
+            result = await session.run("""
+                MATCH (r:Repository {name: $repo_name})
+                OPTIONAL MATCH (r)-[:CONTAINS]->(f:File)
+                RETURN r.commit_sha as commit_sha, toString(r.ingested_at) as ingested_at,
+                       collect({path: f.path, module_name: f.module_name, content_hash: f.content_hash,
+                                imports: f.imports}) as files
+            """, repo_name=repo_name)
+            record = await result.single()
         
+        # ingested_at is set only once an ingest completes, with or without a commit
+        if not record or not record['ingested_at']:
+            logger.info(f"No previous ingest recorded for {repo_name}, analyzing every file")
+            return None
+        
+        return {
+            'commit_sha': record['commit_sha'],
+            'ingested_at': record['ingested_at'],
+            'files': {f['path']: f for f in record['files'] if f['path']}
+        }
+    
+    def _plan_incremental(self, repo_path: Path, python_files: List[Path],
+                          previous: Dict[str, Any]) -> tuple:
+        """Split the working tree into files to re-analyze and paths deleted since the last ingest"""
+        stored = previous['files']
+        local = {str(f.relative_to(repo_path)): f for f in python_files}
+        deleted_paths = sorted(set(stored) - set(local))
+        
+        # With a clean ingested commit, git rules out tracked files identical to it; content hashes
+        # decide for everything else, and for every file when the last ingest had no commit
+        if previous['commit_sha']:
+            git_unchanged = self._git_unchanged_paths(repo_path, previous['commit_sha'])
+            if git_unchanged is not None:
+                local = {path: f for path, f in local.items() if path not in git_unchanged or path not in stored}
+        
+        changed_files = []
+        for path, file_path in local.items():
+            stored_file = stored.get(path)
+            if not stored_file or stored_file['content_hash'] != file_content_hash(file_path.read_bytes()):
+                changed_files.append(file_path)
+        
+        return changed_files, deleted_paths
+    
+    def _git_unchanged_paths(self, repo_path: Path, since_sha: str) -> Optional[Set[str]]:
+        """Tracked paths whose working-tree content is the same as at since_sha, or None if git cannot tell us.
+        
+        The diff runs against the working tree, so commits since since_sha and uncommitted edits
+        both count as changes; untracked and ignored files are never reported unchanged.
+        """
+        try:
+            has_commit = subprocess.run(['git', 'cat-file', '-e', f'{since_sha}^{{commit}}'],
+                                        cwd=repo_path, capture_output=True).returncode == 0
+            if not has_commit:
+                # Shallow clones only contain HEAD, so fetch the previously ingested commit
+                subprocess.run(['git', 'fetch', '--depth', '1', 'origin', since_sha],
+                               cwd=repo_path, check=True, capture_output=True)
+            # -z keeps unusual file names unquoted; --relative matches ls-files when repo_path is a subdirectory
+            diff = subprocess.run(['git', 'diff', '--name-only', '--no-renames', '--relative', '-z', since_sha],
+                                  cwd=repo_path, check=True, capture_output=True, text=True)
+            tracked = subprocess.run(['git', 'ls-files', '-z'], cwd=repo_path, check=True, capture_output=True, text=True)
+        except (subprocess.CalledProcessError, OSError) as e:
+            logger.warning(f"git diff against {since_sha[:12]} unavailable ({e}), comparing content hashes instead")
+            return None
+        
+        return set(tracked.stdout.split('\0')) - set(diff.stdout.split('\0'))
+    
+    def _resolve_imports(self, repo_name: str, module_index: 'ModuleIndex', import_rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Turn (source, import name) rows into (source, target path) edges; unresolvable imports are dropped"""
+        edges = []
+        seen = set()
+        for row in import_rows:
+            target_path = module_index.resolve(row['import_name'], row['source_path'])
+            if target_path and (row['source_path'], target_path) not in seen:
+                seen.add((row['source_path'], target_path))
+                edges.append({'repo': repo_name, 'source_path': row['source_path'], 'target_path': target_path})
+        return edges
+    
+    def _reresolve_import_edges(self, repo_name: str, module_index: 'ModuleIndex', stored_files: Dict[str, Dict],
+                                written_modules: List[tuple], touched_paths: Set[str]) -> List[Dict[str, Any]]:
+        """Edges from untouched files whose recorded imports now resolve to a newly added module"""
+        added_paths = {file_path for file_path, _ in written_modules if file_path not in stored_files}
+        if not added_paths:
+            return []
+        
+        rows = [
+            {'source_path': path, 'import_name': import_name}
+            for path, stored_file in stored_files.items() if path not in touched_paths
+            for import_name in stored_file['imports'] or []
+        ]
+        return [edge for edge in self._resolve_imports(repo_name, module_index, rows) if edge['target_path'] in added_paths]
+    
+    async def _stored_callables(self, repo_name: str) -> List[Dict[str, Any]]:
+        """Methods and functions currently in the graph for this repository, with their recorded calls"""
+        async with self.driver.session() as session:
+            result = await session.run("""
+                MATCH (m:Method {repo: $repo_name})
+                RETURN 'Method' as label, m.method_id as id, m.full_name as full_name, m.calls as calls
+                UNION ALL
+                MATCH (f:Function {repo: $repo_name})
+                RETURN 'Function' as label, f.func_id as id, f.full_name as full_name, f.calls as calls
+            """, repo_name=repo_name)
+            return [dict(record) async for record in result]
+    
+    async def _mark_ingested(self, repo_name: str, commit_sha: Optional[str]):
+        # ingest_version changes on every completed ingest (a counter would restart after a full
+        # re-ingest recreates the node); readers that cache derived data compare it to invalidate
         async with self.driver.session() as session:
-            # Create Repository node
             await session.run(
-                "CREATE (r:Repository {name: $repo_name, created_at: datetime()})",
-                repo_name=repo_name
+                """
+                MATCH (r:Repository {name: $repo_name})
+                SET r.commit_sha = $commit_sha, r.ingested_at = datetime(), r.ingest_version = randomUUID()
+                """,
+                repo_name=repo_name, commit_sha=commit_sha
             )
-            
-            nodes_created = 0
-            relationships_created = 0
-            
-            for i, mod in enumerate(modules_data):
-                # 1. Create File node
-                await session.run("""
-                    CREATE (f:File {
-                        name: $name,
-                        path: $path,
-                        module_name: $module_name,
-                        line_count: $line_count,
-                        created_at: datetime()
-                    })
-                """, 
-                    name=mod['file_path'].split('/')[-1],
-                    path=mod['file_path'],
-                    module_name=mod['module_name'],
-                    line_count=mod['line_count']
-                )
-                nodes_created += 1
-                
-                # 2. Connect File to Repository
-                await session.run("""
-                    MATCH (r:Repository {name: $repo_name})
-                    MATCH (f:File {path: $file_path})
-                    CREATE (r)-[:CONTAINS]->(f)
-                """, repo_name=repo_name, file_path=mod['file_path'])
-                relationships_created += 1
+    
+    async def _run_pipeline(self, python_files: Iterable[Path], repo_path: Path, project_modules: Set[str],
+                            repo_name: str, writer, commit_sha: Optional[str], call_graph: 'CallGraph') -> tuple:
+        """Discovery -> parse workers -> batched graph writer, connected by bounded queues.
+        
+        Memory is bounded by the queue sizes and flush_files rather than by repository size.
+        Only running totals, (path, module) pairs, import rows and the call graph's symbols
+        and call sites are kept for the whole run.
+        """
+        start_time = time.perf_counter()
+        path_queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        result_queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        parser_count = self.workers * 2
+        totals = {'files': 0, 'classes': 0, 'methods': 0, 'functions': 0, 'imports': 0,
+                  'modules': [], 'first_write_seconds': None}
+        import_rows = []
+        
+        async def discover():
+            for file_path in python_files:
+                await path_queue.put(file_path)
+            for _ in range(parser_count):
+                await path_queue.put(None)
+        
+        async def parse(pool, cache_thread):
+            while (file_path := await path_queue.get()) is not None:
+                analysis = await self._analyze_one(pool, cache_thread, file_path, repo_path, project_modules)
+                if analysis:
+                    await result_queue.put(analysis)
+        
+        async def parse_stage(pool, cache_thread):
+            await asyncio.gather(discover(), *[parse(pool, cache_thread) for _ in range(parser_count)])
+            await result_queue.put(None)
+        
+        async def write_stage():
+            pending = []
+            while True:
+                analysis = await result_queue.get()
+                if analysis is not None:
+                    pending.append(analysis)
+                    totals['files'] += 1
+                    totals['classes'] += len(analysis['classes'])
+                    totals['methods'] += sum(len(cls['methods']) for cls in analysis['classes'])
+                    totals['functions'] += len(analysis['functions'])
+                    totals['imports'] += len(analysis['imports'])
+                    totals['modules'].append((analysis['file_path'], analysis['module_name']))
+                    call_graph.add_module(analysis)
+                    if totals['files'] % 100 == 0:
+                        logger.info(f"Analyzed {totals['files']} files")
                 
-                # 3. Create Class nodes and relationships
-                for cls in mod['classes']:
-                    # Create Class node using MERGE to avoid duplicates
-                    await session.run("""
-                        MERGE (c:Class {full_name: $full_name})
-                        ON CREATE SET c.name = $name, c.created_at = datetime()
-                    """, name=cls['name'], full_name=cls['full_name'])
-                    nodes_created += 1
-                    
-                    # Connect File to Class
-                    await session.run("""
-                        MATCH (f:File {path: $file_path})
-                        MATCH (c:Class {full_name: $class_full_name})
-                        MERGE (f)-[:DEFINES]->(c)
-                    """, file_path=mod['file_path'], class_full_name=cls['full_name'])
-                    relationships_created += 1
-                    
-                    # 4. Create Method nodes - use MERGE to avoid duplicates
-                    for method in cls['methods']:
-                        method_full_name = f"{cls['full_name']}.{method['name']}"
-                        # Create method with unique ID to avoid conflicts
-                        method_id = f"{cls['full_name']}::{method['name']}"
-                        # Convert params to simple list format for Neo4j storage
-                        params_list = [f"{p['name']}:{p['type']}" for p in method['params']]
-                        
-                        await session.run("""
-                            MERGE (m:Method {method_id: $method_id})
-                            ON CREATE SET m.name = $name, 
-                                         m.full_name = $full_name,
-                                         m.args = $args,
-                                         m.params_list = $params_list,
-                                         m.return_type = $return_type,
-                                         m.created_at = datetime()
-                        """, 
-                            name=method['name'], 
-                            full_name=method_full_name,
-                            method_id=method_id,
-                            args=method['args'],
-                            params_list=params_list,
-                            return_type=method['return_type']
-                        )
-                        nodes_created += 1
-                        
-                        # Connect Class to Method
-                        await session.run("""
-                            MATCH (c:Class {full_name: $class_full_name})
-                            MATCH (m:Method {method_id: $method_id})
-                            MERGE (c)-[:HAS_METHOD]->(m)
-                        """, 
-                            class_full_name=cls['full_name'], 
-                            method_id=method_id
-                        )
-                        relationships_created += 1
-                    
-                    # 5. Create Attribute nodes - use MERGE to avoid duplicates
-                    for attr in cls['attributes']:
-                        attr_full_name = f"{cls['full_name']}.{attr['name']}"
-                        # Create attribute with unique ID to avoid conflicts
-                        attr_id = f"{cls['full_name']}::{attr['name']}"
-                        await session.run("""
-                            MERGE (a:Attribute {attr_id: $attr_id})
-                            ON CREATE SET a.name = $name,
-                                         a.full_name = $full_name,
-                                         a.type = $type,
-                                         a.created_at = datetime()
-                        """, 
-                            name=attr['name'], 
-                            full_name=attr_full_name,
-                            attr_id=attr_id,
-                            type=attr['type']
-                        )
-                        nodes_created += 1
-                        
-                        # Connect Class to Attribute
-                        await session.run("""
-                            MATCH (c:Class {full_name: $class_full_name})
-                            MATCH (a:Attribute {attr_id: $attr_id})
-                            MERGE (c)-[:HAS_ATTRIBUTE]->(a)
-                        """, 
-                            class_full_name=cls['full_name'], 
-                            attr_id=attr_id
-                        )
-                        relationships_created += 1
+                if pending and (analysis is None or len(pending) >= self.flush_files):
+                    import_rows.extend(await self._write_modules(writer, repo_name, pending, commit_sha))
+                    pending = []
+                    if totals['first_write_seconds'] is None:
+                        totals['first_write_seconds'] = time.perf_counter() - start_time
                 
-                # 6. Create Function nodes (top-level) - use MERGE to avoid duplicates
-                for func in mod['functions']:
-                    func_id = f"{mod['file_path']}::{func['name']}"
-                    await session.run("""
-                        MERGE (f:Function {func_id: $func_id})
-                        ON CREATE SET f.name = $name,
-                                     f.full_name = $full_name,
-                                     f.args = $args,
-                                     f.params_list = $params_list,
-                                     f.return_type = $return_type,
-                                     f.created_at = datetime()
-                    """, 
-                        name=func['name'], 
-                        full_name=func['full_name'],
-                        func_id=func_id,
-                        args=func['args'],
-                        params_list=func['params_list'],
-                        return_type=func['return_type']
-                    )
-                    nodes_created += 1
-                    
-                    # Connect File to Function
-                    await session.run("""
-                        MATCH (file:File {path: $file_path})
-                        MATCH (func:Function {func_id: $func_id})
-                        MERGE (file)-[:DEFINES]->(func)
-                    """, file_path=mod['file_path'], func_id=func_id)
-                    relationships_created += 1
+                if analysis is None:
+                    return
+        
+        # One thread owns every parse cache access, which keeps SQLite (and file hashing) off the event loop
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_analysis_worker,
+                                 initargs=(str(repo_path), project_modules)) as pool, \
+                ThreadPoolExecutor(max_workers=1, thread_name_prefix='parse-cache') as cache_thread:
+            tasks = [asyncio.create_task(parse_stage(pool, cache_thread)), asyncio.create_task(write_stage())]
+            try:
+                await asyncio.gather(*tasks)
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+                raise
+        
+        return totals, import_rows
+    
+    async def _analyze_one(self, pool: ProcessPoolExecutor, cache_thread: ThreadPoolExecutor, file_path: Path,
+                           repo_path: Path, project_modules: Set[str]) -> Optional[Dict[str, Any]]:
+        """Analyze one file in the process pool, going through the parse cache when enabled"""
+        loop = asyncio.get_running_loop()
+        if not self.parse_cache:
+            return await loop.run_in_executor(pool, _analyze_file_in_worker, str(file_path))
+        
+        cache_key, raw, cached = await loop.run_in_executor(
+            cache_thread, self._lookup_parse_cache, file_path, repo_path, project_modules
+        )
+        if cached:
+            return cached
+        
+        # The bytes read for the hash go along, so a miss reads the file only once
+        analysis = await loop.run_in_executor(pool, _analyze_file_in_worker, str(file_path), raw)
+        if analysis and cache_key:
+            await loop.run_in_executor(cache_thread, self.parse_cache.put, cache_key, analysis)
+        return analysis
+    
+    def _lookup_parse_cache(self, file_path: Path, repo_path: Path, project_modules: Set[str]) -> tuple:
+        """(cache key, file bytes, cached analysis or None); runs on the cache thread"""
+        try:
+            raw = file_path.read_bytes()
+        except OSError as e:
+            # The worker reads it again and skips it if it is still unreadable
+            logger.warning(f"Could not read {file_path} for the parse cache: {e}")
+            return None, None, None
+        cache_key = ParseCache.key(file_content_hash(raw), str(file_path.relative_to(repo_path)), project_modules)
+        return cache_key, raw, self.parse_cache.get(cache_key)
+    
+    async def _create_graph(self, repo_name: str, modules_data: List[Dict], writer=None) -> Dict[str, Any]:
+        """Create all nodes and relationships using batched writes (Neo4j unless another writer is given)"""
+        start_time = time.perf_counter()
+        writer = writer or Neo4jBatchWriter(self.driver, batch_size=self.batch_size, concurrency=self.write_concurrency)
+        await writer.write('Repository', [{'name': repo_name}])
+        
+        import_rows = await self._write_modules(writer, repo_name, modules_data)
+        
+        module_index = ModuleIndex()
+        for mod in modules_data:
+            module_index.add(mod['file_path'], mod['module_name'])
+        import_edges = self._resolve_imports(repo_name, module_index, import_rows)
+        if import_edges:
+            await writer.write('IMPORTS', import_edges)
+        
+        call_graph = CallGraph()
+        for mod in modules_data:
+            call_graph.add_module(mod)
+        await self._write_concurrently(writer, call_graph.edges(repo_name))
+        
+        return self._write_stats(writer, start_time)
+    
+    async def _write_modules(self, writer, repo_name: str, modules_data: List[Dict],
+                             commit_sha: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Write everything except imports for a chunk of modules; return their import rows"""
+        # Group everything into one parameter list per node/relationship kind
+        rows = self._graph_rows(repo_name, modules_data, commit_sha)
+        
+        # Every node kind first, then every relationship kind: relationships only MATCH nodes
+        # that are already committed, while independent kinds share the writer's sessions
+        await self._write_concurrently(writer, {kind: rows[kind] for kind in BATCH_QUERIES
+                                                if kind in NODE_KINDS and kind != 'Repository'})
+        await self._write_concurrently(writer, {kind: rows[kind] for kind in BATCH_QUERIES
+                                                if kind not in NODE_KINDS and kind != 'IMPORTS'})
+        
+        return rows['IMPORTS']
+    
+    @staticmethod
+    async def _write_concurrently(writer, rows_by_kind: Dict[str, List[Dict[str, Any]]]):
+        """Write kinds that do not depend on each other; the writer bounds how many batches run at once"""
+        await asyncio.gather(*[writer.write(kind, rows) for kind, rows in rows_by_kind.items() if rows])
+    
+    def _write_stats(self, writer, start_time: float) -> Dict[str, Any]:
+        elapsed = time.perf_counter() - start_time
+        nodes_per_second = writer.nodes_created / elapsed if elapsed > 0 else 0.0
+        relationships_per_second = writer.relationships_created / elapsed if elapsed > 0 else 0.0
+        logger.info(f"Created {writer.nodes_created} nodes and {writer.relationships_created} relationships "
+                    f"in {elapsed:.2f}s ({nodes_per_second:.0f} nodes/s)")
+        
+        return {
+            'nodes_created': writer.nodes_created,
+            'relationships_created': writer.relationships_created,
+            'seconds': elapsed,
+            'nodes_per_second': nodes_per_second,
+            'relationships_per_second': relationships_per_second,
+            # Only the Neo4j writer runs transactions, concurrently and with retries
+            'transactions': getattr(writer, 'transactions', 0),
+            'concurrency': getattr(writer, 'concurrency', 1),
+            'retries': getattr(writer, 'retries', 0)
+        }
+    
+    def _graph_rows(self, repo_name: str, modules_data: List[Dict],
+                    commit_sha: Optional[str] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """Flatten analysis results into UNWIND parameter lists keyed by BATCH_QUERIES kind"""
+        rows = {kind: [] for kind in BATCH_QUERIES}
+        
+        for mod in modules_data:
+            file_path = mod['file_path']
+            
+            # 1. File node and Repository -> File
+            rows['File'].append({
+                'repo': repo_name,
+                'name': file_path.split('/')[-1],
+                'path': file_path,
+                'module_name': mod['module_name'],
+                'line_count': mod['line_count'],
+                'content_hash': mod['content_hash'],
+                'commit_sha': commit_sha,
+                'imports': mod['imports']
+            })
+            rows['CONTAINS'].append({'repo': repo_name, 'file_path': file_path})
+            
+            for cls in mod['classes']:
+                # 2. Class node and File -> Class
+                rows['Class'].append({
+                    'repo': repo_name,
+                    'name': cls['name'],
+                    'full_name': cls['full_name'],
+                    'docstring': cls['docstring'],
+                    'decorators': cls['decorators'],
+                    'line_start': cls['line_start'],
+                    'line_end': cls['line_end']
+                })
+                rows['DEFINES_CLASS'].append({'repo': repo_name, 'file_path': file_path, 'class_full_name': cls['full_name']})
                 
-                # 7. Create Import relationships
-                for import_name in mod['imports']:
-                    # Try to find the target file
-                    await session.run("""
-                        MATCH (source:File {path: $source_path})
-                        OPTIONAL MATCH (target:File) 
-                        WHERE target.module_name = $import_name OR target.module_name STARTS WITH $import_name
-                        WITH source, target
-                        WHERE target IS NOT NULL
-                        MERGE (source)-[:IMPORTS]->(target)
-                    """, source_path=mod['file_path'], import_name=import_name)
-                    relationships_created += 1
+                # 3. Method nodes and Class -> Method
+                for method in cls['methods']:
+                    method_id = method_node_id(cls['full_name'], method['name'])
+                    rows['Method'].append({
+                        'repo': repo_name,
+                        'method_id': method_id,
+                        'name': method['name'],
+                        'full_name': f"{cls['full_name']}.{method['name']}",
+                        'signature': method['signature'],
+                        'return_type': method['return_type'],
+                        'docstring': method['docstring'],
+                        'is_async': method['is_async'],
+                        'calls': method['calls'],
+                        'decorators': method['decorators'],
+                        'line_start': method['line_start'],
+                        'line_end': method['line_end']
+                    })
+                    rows['HAS_METHOD'].append({'repo': repo_name, 'class_full_name': cls['full_name'], 'method_id': method_id})
                 
-                if (i + 1) % 10 == 0:
-                    logger.info(f"Processed {i + 1}/{len(modules_data)} files...")
+                # 4. Attribute nodes and Class -> Attribute
+                for attr in cls['attributes']:
+                    attr_id = f"{cls['full_name']}::{attr['name']}"
+                    rows['Attribute'].append({
+                        'repo': repo_name,
+                        'attr_id': attr_id,
+                        'name': attr['name'],
+                        'full_name': f"{cls['full_name']}.{attr['name']}",
+                        'type': attr['type']
+                    })
+                    rows['HAS_ATTRIBUTE'].append({'repo': repo_name, 'class_full_name': cls['full_name'], 'attr_id': attr_id})
             
-            logger.info(f"Created {nodes_created} nodes and {relationships_created} relationships")
+            # 5. Function nodes (top-level) and File -> Function
+            for func in mod['functions']:
+                func_id = function_node_id(file_path, func['name'])
+                rows['Function'].append({
+                    'repo': repo_name,
+                    'func_id': func_id,
+                    'name': func['name'],
+                    'full_name': func['full_name'],
+                    'signature': func['signature'],
+                    'return_type': func['return_type'],
+                    'docstring': func['docstring'],
+                    'is_async': func['is_async'],
+                    'calls': func['calls'],
+                    'decorators': func['decorators'],
+                    'line_start': func['line_start'],
+                    'line_end': func['line_end']
+                })
+                rows['DEFINES_FUNCTION'].append({'repo': repo_name, 'file_path': file_path, 'func_id': func_id})
+            
+            # 6. Import relationships, resolved against the ModuleIndex once every module is known
+            for import_name in mod['imports']:
+                rows['IMPORTS'].append({'source_path': file_path, 'import_name': import_name})
+        
+        return rows
     
-    async def search_graph(self, query_type: str, **kwargs):
-        """Search the Neo4j graph directly"""
+    async def search_graph(self, query_type: str, repo_name: str, **kwargs):
+        """Search one repository's graph directly; the repo key keeps lookups on the per-repository indexes"""
         async with self.driver.session() as session:
             if query_type == "files_importing":
                 target = kwargs.get('target')
                 result = await session.run("""
-                    MATCH (source:File)-[:IMPORTS]->(target:File)
+                    MATCH (source:File {repo: $repo_name})-[:IMPORTS]->(target:File)
                     WHERE target.module_name CONTAINS $target
                     RETURN source.path as file, target.module_name as imports
-                """, target=target)
+                """, repo_name=repo_name, target=target)
                 return [{"file": record["file"], "imports": record["imports"]} async for record in result]
             
             elif query_type == "classes_in_file":
                 file_path = kwargs.get('file_path')
                 result = await session.run("""
-                    MATCH (f:File {path: $file_path})-[:DEFINES]->(c:Class)
+                    MATCH (f:File {repo: $repo_name, path: $file_path})-[:DEFINES]->(c:Class)
                     RETURN c.name as class_name, c.full_name as full_name
-                """, file_path=file_path)
+                """, repo_name=repo_name, file_path=file_path)
                 return [{"class_name": record["class_name"], "full_name": record["full_name"]} async for record in result]
             
             elif query_type == "methods_of_class":
                 class_name = kwargs.get('class_name')
                 result = await session.run("""
-                    MATCH (c:Class)-[:HAS_METHOD]->(m:Method)
+                    MATCH (c:Class {repo: $repo_name})-[:HAS_METHOD]->(m:Method)
                     WHERE c.name CONTAINS $class_name OR c.full_name CONTAINS $class_name
-                    RETURN m.name as method_name, m.args as args
-                """, class_name=class_name)
-                return [{"method_name": record["method_name"], "args": record["args"]} async for record in result]
+                    RETURN m.name as method_name, m.signature as signature, m.return_type as return_type
+                """, repo_name=repo_name, class_name=class_name)
+                return [{"method_name": record["method_name"], "signature": record["signature"],
+                         "return_type": record["return_type"]} async for record in result]
 
 
 async def main():
@@ -619,35 +1751,53 @@ async def main():
     neo4j_user = os.environ.get('NEO4J_USER', 'neo4j')
     neo4j_password = os.environ.get('NEO4J_PASSWORD', 'password')
     
-    extractor = DirectNeo4jExtractor(neo4j_uri, neo4j_user, neo4j_password)
+    # Set INCREMENTAL_INGEST=true to update the existing graph instead of rebuilding it
+    incremental = os.environ.get('INCREMENTAL_INGEST', 'false').lower() == 'true'
+    
+    # Concurrent write sessions; raise for multi-core Neo4j servers
+    write_concurrency = int(os.environ.get('WRITE_CONCURRENCY', '4'))
+    
+    # EMBEDDER=openai|hashing|none picks how code entities are embedded for semantic search
+    extractor = DirectNeo4jExtractor(neo4j_uri, neo4j_user, neo4j_password, incremental=incremental,
+                                     write_concurrency=write_concurrency, embedder=embedder_from_env())
+    # A remote URL, a local working tree, or a local bare mirror
+    repo_url = os.environ.get('REPO_SOURCE', "https://github.com/pydantic/pydantic-ai.git")
+    # Set REPO_NAME when another repository with the same last path component is already ingested
+    repo_name = os.environ.get('REPO_NAME') or repository_name(repo_url)
+    
+    # Set EXPORT_DIR to write neo4j-admin import CSVs instead of loading over Bolt
+    export_dir = os.environ.get('EXPORT_DIR')
+    if export_dir:
+        await extractor.analyze_repository(repo_url, export_dir=export_dir, repo_name=repo_name)
+        return
     
     try:
         await extractor.initialize()
         
         # Analyze repository - direct Neo4j, no LLM processing!
-        repo_url = "https://github.com/pydantic/pydantic-ai.git"
-        await extractor.analyze_repository(repo_url)
+        await extractor.analyze_repository(repo_url, repo_name=repo_name)
         
         # Direct graph queries
         print("\\n=== Direct Neo4j Queries ===")
         
         # Which files import from models?
-        results = await extractor.search_graph("files_importing", target="models")
+        results = await extractor.search_graph("files_importing", repo_name, target="models")
         print(f"\\nFiles importing from 'models': {len(results)}")
         for result in results[:3]:
             print(f"- {result['file']} imports {result['imports']}")
         
         # What classes are in a specific file?
-        results = await extractor.search_graph("classes_in_file", file_path="pydantic_ai/models/openai.py")
+        results = await extractor.search_graph("classes_in_file", repo_name, file_path="pydantic_ai/models/openai.py")
         print(f"\\nClasses in openai.py: {len(results)}")
         for result in results:
             print(f"- {result['class_name']}")
         
         # What methods does OpenAIModel have?
-        results = await extractor.search_graph("methods_of_class", class_name="OpenAIModel")
+        results = await extractor.search_graph("methods_of_class", repo_name, class_name="OpenAIModel")
         print(f"\\nMethods of OpenAIModel: {len(results)}")
         for result in results[:5]:
-            print(f"- {result['method_name']}({', '.join(result['args'])})")
+            returns = f" -> {result['return_type']}" if result['return_type'] else ""
+            print(f"- {result['method_name']}{result['signature']}{returns}")
     
     finally:
         await extractor.close()
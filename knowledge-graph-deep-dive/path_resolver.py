@@ -0,0 +1,77 @@
+"""
+In-Process File Path Resolution
+
+Maps the file paths an LLM suggests ("agent.py", "src/pydantic_ai/agent.py",
+"pydantic_ai.models.openai") to the paths actually stored in the code graph.
+
+Every path and module name is indexed under each of its component suffixes
+("pkg/models/openai.py" under "openai", "models/openai" and "pkg/models/openai"),
+so a lookup is a handful of dict probes - one per component of the query - no
+matter how many files the repository has. A package's __init__.py is also indexed
+under the package itself, so "pkg/agent/__init__.py" answers to "agent.py".
+"""
+
+from typing import List, Dict, Any, Tuple
+
+
+def _components(name: str) -> Tuple[str, ...]:
+    """Lower-cased path components without the .py suffix; dotted module names split on dots"""
+    name = name.strip().strip('"\'`').replace('\\', '/').strip('/')
+    if name.endswith('.py'):
+        name = name[:-3]
+    elif '/' not in name:
+        name = name.replace('.', '/')
+    return tuple(part.lower() for part in name.split('/') if part and part != '.')
+
+
+def _fold(components: Tuple[str, ...]) -> Tuple[str, ...]:
+    # "agents" and "agent" resolve to each other when neither is spelled exactly
+    last = components[-1]
+    if len(last) > 3 and last.endswith('s') and not last.endswith('ss'):
+        last = last[:-1]
+    return components[:-1] + (last,)
+
+
+class PathResolver:
+    """Suffix index over one repository's file paths and module names"""
+
+    def __init__(self, files: List[Dict[str, Any]]):
+        self.paths = {f['path'] for f in files}
+        self._exact: Dict[Tuple[str, ...], List[str]] = {}
+        self._folded: Dict[Tuple[str, ...], List[str]] = {}
+        for file_info in files:
+            keys = set()
+            for name in (file_info['path'], file_info.get('module_name') or ''):
+                components = _components(name)
+                variants = [components]
+                if len(components) > 1 and components[-1] == '__init__':
+                    variants.append(components[:-1])
+                for variant in variants:
+                    keys.update(variant[-k:] for k in range(1, len(variant) + 1))
+            for key in keys:
+                self._exact.setdefault(key, []).append(file_info['path'])
+            for key in {_fold(key) for key in keys}:
+                self._folded.setdefault(key, []).append(file_info['path'])
+
+        # Shallower paths first, then alphabetical, so ties always break the same way
+        for index in (self._exact, self._folded):
+            for candidates in index.values():
+                candidates.sort(key=lambda path: (path.count('/'), path))
+
+    def resolve(self, query: str, limit: int = 5) -> List[str]:
+        """Best matches for query, best first; [] when not even the file name matches.
+
+        The longest matching suffix wins ("models/openai.py" beats any other "openai.py"),
+        leading directories the repository does not have are ignored, and an exact
+        spelling beats a singular/plural variant of the same length.
+        """
+        if query in self.paths:
+            return [query]
+
+        components = _components(query)
+        for k in range(len(components), 0, -1):
+            suffix = components[-k:]
+            candidates = self._exact.get(suffix) or self._folded.get(_fold(suffix))
+            if candidates:
+                return candidates[:limit]
+        return []
@@ -0,0 +1,194 @@
+"""
+Token-Budgeted Repository Overview
+
+Collapses a repository's file list into a directory tree with aggregate counts and
+expands only the subtrees that match the question, so the file-selection prompt in
+llm_code_explorer.py stays under a fixed token budget however large the repository is.
+
+Relevance comes from a local lexical pre-filter over paths and symbol names
+(optionally boosted by vector-search scores); no LLM call is involved.
+"""
+
+import heapq
+from typing import List, Dict, Any, Optional, Tuple
+
+from code_embeddings import tokenize
+
+
+# Words that say nothing about where code lives
+STOPWORDS = {
+    'the', 'and', 'for', 'how', 'what', 'which', 'where', 'when', 'why', 'who', 'does', 'can',
+    'are', 'with', 'from', 'into', 'that', 'this', 'there', 'use', 'using', 'get', 'set', 'have',
+    'has', 'available', 'instance', 'new', 'all', 'any', 'way', 'should', 'would', 'could', 'about',
+    'python', 'code', 'file', 'files', 'class', 'function', 'method', 'repository', 'repo'
+}
+
+# Files listed per expanded directory, best matches first; the rest are summarized in one line
+MAX_FILES_PER_DIRECTORY = 12
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token for English and code)"""
+    return _chars_to_tokens(len(text))
+
+
+def _chars_to_tokens(chars: int) -> int:
+    return (chars + 3) // 4
+
+
+def _normalize(token: str) -> str:
+    # Crude plural folding so "messages" matches "message"
+    return token[:-1] if len(token) > 3 and token.endswith('s') and not token.endswith('ss') else token
+
+
+def question_terms(question: str) -> List[str]:
+    terms = []
+    for token in tokenize(question):
+        token = _normalize(token)
+        if len(token) >= 3 and token not in STOPWORDS and token not in terms:
+            terms.append(token)
+    return terms
+
+
+def lexical_scores(question: str, files: List[Dict[str, Any]]) -> Dict[str, float]:
+    """Score files by question terms in their file name, directories and symbol names; linear in their size"""
+    terms = set(question_terms(question))
+    if not terms:
+        return {}
+
+    scores = {}
+    for file_info in files:
+        parts = file_info['path'].split('/')
+        name_tokens = {_normalize(t) for t in tokenize(parts[-1].replace('.py', ''))}
+        dir_tokens = {_normalize(t) for part in parts[:-1] for t in tokenize(part)}
+        symbol_tokens = {_normalize(t) for symbol in file_info.get('symbols') or [] for t in tokenize(symbol)}
+
+        score = 3.0 * len(terms & name_tokens) + 2.0 * len(terms & dir_tokens) + 1.0 * len(terms & symbol_tokens)
+        if score:
+            scores[file_info['path']] = score
+    return scores
+
+
+class _Directory:
+    def __init__(self, path: str, depth: int = 0):
+        self.path = path
+        self.depth = depth
+        self.dirs: Dict[str, '_Directory'] = {}
+        self.files: List[Dict[str, Any]] = []
+        self.file_count = 0
+        self.class_count = 0
+        self.function_count = 0
+        self.line_count = 0
+        self.score = 0.0
+
+
+def _build_tree(files: List[Dict[str, Any]], scores: Dict[str, float]) -> _Directory:
+    root = _Directory('')
+    for file_info in files:
+        parts = file_info['path'].split('/')
+        node = root
+        chain = [root]
+        for part in parts[:-1]:
+            child_path = f"{node.path}{part}/"
+            node = node.dirs.setdefault(part, _Directory(child_path, node.depth + 1))
+            chain.append(node)
+        node.files.append(file_info)
+        for directory in chain:
+            directory.file_count += 1
+            directory.class_count += file_info['class_count']
+            directory.function_count += file_info['function_count']
+            directory.line_count += file_info['line_count'] or 0
+            directory.score += scores.get(file_info['path'], 0.0)
+    return root
+
+
+def _summary(name: str, directory: _Directory) -> str:
+    return (f"{name}/ ({directory.file_count} files, {directory.class_count} classes, "
+            f"{directory.function_count} functions, {directory.line_count} lines)")
+
+
+def _render(directory: _Directory, expanded: set, scores: Dict[str, float], depth: int = 0) -> List[str]:
+    lines = []
+    indent = '  ' * depth
+    for name in sorted(directory.dirs, key=lambda n: (-directory.dirs[n].score, n)):
+        child = directory.dirs[name]
+        if child.path in expanded:
+            lines.append(f"{indent}{name}/")
+            lines.extend(_render(child, expanded, scores, depth + 1))
+        else:
+            lines.append(f"{indent}{_summary(name, child)}")
+
+    ranked = sorted(directory.files, key=lambda f: (-scores.get(f['path'], 0.0), f['path']))
+    for file_info in ranked[:MAX_FILES_PER_DIRECTORY]:
+        lines.append(f"{indent}• {file_info['path']} ({file_info['class_count']} classes, "
+                     f"{file_info['function_count']} functions, {file_info['line_count']} lines)")
+    if len(ranked) > MAX_FILES_PER_DIRECTORY:
+        lines.append(f"{indent}… {len(ranked) - MAX_FILES_PER_DIRECTORY} more files")
+    return lines
+
+
+def build_overview(files: List[Dict[str, Any]], question: str, token_budget: int,
+                   boost: Optional[Dict[str, float]] = None) -> Tuple[str, Dict[str, Any]]:
+    """Render the file tree for the prompt within token_budget.
+
+    Directories are expanded best-first: those containing files that match the question
+    (lexically, or through boost such as vector-search scores) before the rest, each only
+    if the whole rendering still fits. Small repositories therefore come out in full.
+    Returns the text and stats about what was included.
+    """
+    scores = lexical_scores(question, files)
+    for path, bonus in (boost or {}).items():
+        scores[path] = scores.get(path, 0.0) + bonus
+
+    root = _build_tree(files, scores)
+    expanded = {''}
+    chars = sum(len(line) + 1 for line in _render(root, expanded, scores))
+
+    # Max-heap on (score, fewer files first) of directories that could be expanded next
+    frontier = []
+    counter = 0
+
+    def push_children(directory: _Directory):
+        nonlocal counter
+        for name, child in directory.dirs.items():
+            heapq.heappush(frontier, (-child.score, child.file_count, counter, name, child))
+            counter += 1
+
+    push_children(root)
+    while frontier:
+        _, _, _, name, directory = heapq.heappop(frontier)
+        # Expanding swaps the directory's summary line for a bare header plus its own (collapsed) listing
+        listing = _render(directory, set(), scores, directory.depth)
+        extra = len(name) + 1 - len(_summary(name, directory)) + sum(len(line) + 1 for line in listing)
+        # chars counts a newline after every line, the joined text has one fewer
+        if _chars_to_tokens(chars + extra - 1) <= token_budget:
+            expanded.add(directory.path)
+            chars += extra
+            push_children(directory)
+
+    lines = _render(root, expanded, scores)
+    text = '\n'.join(lines)
+
+    # Even the collapsed root can be too large (e.g. many matching files at top level)
+    truncated = False
+    marker = '… (truncated to fit the prompt budget)'
+    while len(lines) > 1 and estimate_tokens(text) > token_budget:
+        lines = lines[:max(1, int(len(lines) * token_budget / estimate_tokens(text)) - 1)]
+        text = '\n'.join(lines + [marker])
+        truncated = True
+    if estimate_tokens(text) > token_budget:
+        lines = []
+        text = marker
+        truncated = True
+
+    listed = [line.strip()[2:].rsplit(' (', 1)[0] for line in lines if line.lstrip().startswith('• ')]
+    stats = {
+        'total_files': len(files),
+        'listed_files': len(listed),
+        'matched_files': len(scores),
+        'expanded_directories': len(expanded) - 1,
+        'tokens': estimate_tokens(text),
+        'token_budget': token_budget,
+        'truncated': truncated
+    }
+    return text, stats
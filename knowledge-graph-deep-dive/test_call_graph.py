@@ -0,0 +1,153 @@
+import pytest
+
+pytest.importorskip('dotenv')
+pytest.importorskip('neo4j')
+
+from parse_repo_into_neo4j import CallGraph, Neo4jCodeAnalyzer
+
+FILES = {
+    'pkg/__init__.py': '''
+def configure():
+    return {}
+''',
+    'pkg/helpers.py': '''
+def clean(value):
+    return value
+
+
+def fmt(value):
+    return str(value)
+''',
+    'pkg/router.py': '''
+import pkg.helpers
+import pkg.helpers as h
+from pkg import configure
+from pkg.helpers import clean as scrub
+
+
+def route(path):
+    def wrap(handler):
+        return scrub(handler)
+    return wrap
+
+
+class Router:
+    def __init__(self):
+        self.config = configure()
+
+    @classmethod
+    def create(cls):
+        return cls()
+
+    @route(h.fmt("/"))
+    def handle(self, request):
+        self.log(request)
+        pkg.helpers.fmt(request)
+        return h.clean(request)
+
+    def log(self, request):
+        return print(request)
+
+
+def main():
+    return Router.create().handle(None)
+
+
+def build():
+    return Router()
+''',
+}
+
+
+def analyze(tmp_path, files=FILES):
+    analyzer = Neo4jCodeAnalyzer()
+    modules = {}
+    for path, source in files.items():
+        (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / path).write_text(source)
+    for path in files:
+        modules[path] = analyzer.analyze_python_file(tmp_path / path, tmp_path, {'pkg'})
+    return modules
+
+
+def calls_of(module, name):
+    for func in module['functions']:
+        if func['name'] == name:
+            return func['calls']
+    for cls in module['classes']:
+        for method in cls['methods']:
+            if method['name'] == name:
+                return method['calls']
+    raise KeyError(name)
+
+
+def edges(call_graph):
+    return {(row['caller_id'], row['callee_id']) for rows in call_graph.edges('repo').values() for row in rows}
+
+
+def test_call_sites_are_qualified(tmp_path):
+    router = analyze(tmp_path)['pkg/router.py']
+    # self/cls go to the class, aliases to what they were imported as
+    assert calls_of(router, 'handle') == ['pkg.helpers.clean', 'pkg.helpers.fmt', 'pkg.router.Router.log']
+    assert calls_of(router, 'create') == ['pkg.router.Router']
+    assert calls_of(router, '__init__') == ['pkg.configure']
+    # Decorator calls run at definition time; the nested wrap() counts towards route()
+    assert calls_of(router, 'route') == ['pkg.helpers.clean']
+    # A call on a computed value (the result of create()) has no static name
+    assert calls_of(router, 'main') == ['pkg.router.Router.create']
+
+
+def test_calls_resolve_to_nodes(tmp_path):
+    call_graph = CallGraph()
+    for module in analyze(tmp_path).values():
+        call_graph.add_module(module)
+
+    found = edges(call_graph)
+    router = 'pkg.router.Router'
+    assert (f"{router}::handle", 'pkg/helpers.py::clean') in found
+    assert (f"{router}::handle", f"{router}::log") in found
+    # Names defined in pkg/__init__.py are called as pkg.name
+    assert (f"{router}::__init__", 'pkg/__init__.py::configure') in found
+    # Calling a class runs its __init__
+    assert ('pkg/router.py::build', f"{router}::__init__") in found
+    assert (f"{router}::create", f"{router}::__init__") in found
+    # Builtins and unresolvable attribute chains are dropped
+    assert not any(callee.endswith('print') for _, callee in found)
+    assert len(found) == 8
+
+
+def test_incremental_edges_link_stored_and_new_callables(tmp_path):
+    modules = analyze(tmp_path)
+    call_graph = CallGraph()
+    # Only helpers.py changed; router.py and __init__.py are left in the graph from the last ingest
+    call_graph.add_module(modules['pkg/helpers.py'])
+    for path in ('pkg/__init__.py', 'pkg/router.py'):
+        module = modules[path]
+        for func in module['functions']:
+            call_graph.add_stored('Function', f"{path}::{func['name']}", func['full_name'], func['calls'])
+        for cls in module['classes']:
+            for method in cls['methods']:
+                call_graph.add_stored('Method', f"{cls['full_name']}::{method['name']}",
+                                      f"{cls['full_name']}.{method['name']}", method['calls'])
+
+    # Stored callers are re-linked to the rewritten callees only; their other edges are still in the graph
+    assert edges(call_graph) == {
+        ('pkg.router.Router::handle', 'pkg/helpers.py::clean'),
+        ('pkg.router.Router::handle', 'pkg/helpers.py::fmt'),
+        ('pkg/router.py::route', 'pkg/helpers.py::clean'),
+    }
+
+
+def test_changed_caller_links_to_untouched_callee(tmp_path):
+    modules = analyze(tmp_path)
+    call_graph = CallGraph()
+    # Only router.py changed: its calls must still reach the stored helpers and package functions
+    call_graph.add_module(modules['pkg/router.py'])
+    for path in ('pkg/__init__.py', 'pkg/helpers.py'):
+        for func in modules[path]['functions']:
+            call_graph.add_stored('Function', f"{path}::{func['name']}", func['full_name'], func['calls'])
+
+    found = edges(call_graph)
+    assert ('pkg.router.Router::handle', 'pkg/helpers.py::clean') in found
+    assert ('pkg.router.Router::__init__', 'pkg/__init__.py::configure') in found
+    assert len(found) == 8
@@ -0,0 +1,94 @@
+import asyncio
+
+from code_embeddings import EmbeddingIndexer, HashingEmbedder
+
+
+class FakeResult:
+    def __init__(self, records):
+        self.records = records
+
+    async def single(self):
+        return self.records[0] if self.records else None
+
+    def __aiter__(self):
+        async def records():
+            for record in self.records:
+                yield record
+        return records()
+
+
+class FakeSession:
+    def __init__(self, driver):
+        self.driver = driver
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def run(self, query, **params):
+        self.driver.queries.append((query, params))
+        if 'SHOW INDEXES' in query:
+            return FakeResult([{'exists': self.driver.has_index}])
+        if 'queryNodes' in query:
+            # The global index returns its best candidates from every repository
+            hits = [hit for hit in self.driver.hits[:params['candidates']] if hit['repo'] == params['repo_name']]
+        else:
+            hits = [hit for hit in self.driver.hits if hit['repo'] == params['repo_name']]
+        return FakeResult([{'path': hit['path'], 'labels': ['File'], 'name': hit['path'], 'score': hit['score']}
+                           for hit in hits[:params['k']]])
+
+
+class FakeDriver:
+    """Ranks a fixed list of hits across repositories and logs every query"""
+
+    def __init__(self, hits, has_index=True):
+        self.hits = hits
+        self.has_index = has_index
+        self.queries = []
+
+    def session(self, **config):
+        return FakeSession(self)
+
+    def ran(self, marker):
+        return sum(marker in query for query, params in self.queries)
+
+
+def test_missing_index_gives_no_hits():
+    driver = FakeDriver([{'repo': 'small', 'path': 'a.py', 'score': 0.9}], has_index=False)
+    indexer = EmbeddingIndexer(driver, HashingEmbedder(8))
+    assert asyncio.run(indexer.search('small', 'question')) == []
+    assert driver.ran('queryNodes') == 0
+
+    # The index appears once the repository is ingested with this embedder
+    driver.has_index = True
+    assert [hit['path'] for hit in asyncio.run(indexer.search('small', 'question'))] == ['a.py']
+
+
+def test_index_check_is_cached_once_found():
+    driver = FakeDriver([{'repo': 'small', 'path': 'a.py', 'score': 0.9}])
+    indexer = EmbeddingIndexer(driver, HashingEmbedder(8))
+    asyncio.run(indexer.search('small', 'question', k=1))
+    asyncio.run(indexer.search('small', 'question', k=1))
+    assert driver.ran('SHOW INDEXES') == 1
+
+
+def test_repository_crowded_out_of_the_index_is_searched_directly():
+    # 50 entities of a large repository outrank the small repository's only file
+    hits = [{'repo': 'large', 'path': f"big_{i}.py", 'score': 0.99} for i in range(50)]
+    hits.append({'repo': 'small', 'path': 'a.py', 'score': 0.5})
+    driver = FakeDriver(hits)
+    indexer = EmbeddingIndexer(driver, HashingEmbedder(8), oversample=10)
+
+    assert [hit['path'] for hit in asyncio.run(indexer.search('small', 'question', k=2))] == ['a.py']
+    assert driver.ran('vector.similarity.cosine') == 1
+
+
+def test_index_search_is_enough_when_it_finds_k_hits():
+    hits = [{'repo': 'large', 'path': f"big_{i}.py", 'score': 0.99} for i in range(50)]
+    driver = FakeDriver(hits)
+    indexer = EmbeddingIndexer(driver, HashingEmbedder(8))
+
+    assert len(asyncio.run(indexer.search('large', 'question', k=5))) == 5
+    assert driver.ran('vector.similarity.cosine') == 0
@@ -0,0 +1,93 @@
+import asyncio
+import csv
+
+import pytest
+
+pytest.importorskip('dotenv')
+pytest.importorskip('neo4j')
+
+from parse_repo_into_neo4j import (CSV_ARRAY_DELIMITER, CSV_NODE_COLUMNS, CSV_RELATIONSHIP_COLUMNS,
+                                   DirectNeo4jExtractor)
+
+MODULE = '''
+from pkg import helpers
+
+
+class Router:
+    @route("/a;b")
+    def handle(self):
+        return helpers.clean(self)
+
+
+def main():
+    return Router().handle()
+'''
+
+
+def make_repo(root, name):
+    package = root / name / 'pkg'
+    package.mkdir(parents=True)
+    (package / '__init__.py').write_text('')
+    (package / 'app.py').write_text(MODULE)
+    (package / 'helpers.py').write_text('def clean(value):\n    return value\n')
+    return root / name
+
+
+def read_csv(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+@pytest.fixture
+def exports(tmp_path):
+    """Two repositories with identical paths and module names, exported to separate directories"""
+    export_dirs = []
+    for org in ('org1', 'org2'):
+        repo = make_repo(tmp_path / org, f"{org}-utils")
+        export_dir = tmp_path / 'export' / org
+        extractor = DirectNeo4jExtractor('bolt://unused', 'neo4j', 'unused', workers=1, use_parse_cache=False)
+        asyncio.run(extractor.analyze_repository(str(repo), export_dir=str(export_dir)))
+        export_dirs.append(export_dir)
+    return export_dirs
+
+
+def test_exports_of_two_repositories_import_together(exports):
+    # neo4j-admin import sees every --nodes file of one run in the same ID spaces
+    ids = {}
+    for kind, (file_name, _) in CSV_NODE_COLUMNS.items():
+        for export_dir in exports:
+            if not (export_dir / file_name).exists():
+                continue
+            for row in read_csv(export_dir / file_name):
+                node_id = row[f":ID({kind})"]
+                assert (kind, node_id) not in ids, f"{kind} ID {node_id} exported twice"
+                ids[(kind, node_id)] = row
+
+    files = [row for (kind, _), row in ids.items() if kind == 'File']
+    assert sorted(row['path'] for row in files) == ['pkg/__init__.py', 'pkg/__init__.py', 'pkg/app.py',
+                                                     'pkg/app.py', 'pkg/helpers.py', 'pkg/helpers.py']
+
+    for file_name, _, (_, start_space), (_, end_space) in CSV_RELATIONSHIP_COLUMNS.values():
+        for export_dir in exports:
+            if not (export_dir / file_name).exists():
+                continue
+            for row in read_csv(export_dir / file_name):
+                assert (start_space, row[f":START_ID({start_space})"]) in ids
+                assert (end_space, row[f":END_ID({end_space})"]) in ids
+
+
+def test_import_edges_point_at_the_imported_module(exports):
+    for export_dir in exports:
+        repo = read_csv(export_dir / CSV_NODE_COLUMNS['Repository'][0])[0]['name']
+        edges = {(row[':START_ID(File)'], row[':END_ID(File)'])
+                 for row in read_csv(export_dir / CSV_RELATIONSHIP_COLUMNS['IMPORTS'][0])}
+        # from pkg import helpers is an import of pkg/helpers.py, not of the package
+        assert edges == {(f"{repo}|pkg/app.py", f"{repo}|pkg/helpers.py")}
+
+
+def test_array_values_keep_delimiter_characters(exports):
+    methods = read_csv(exports[0] / CSV_NODE_COLUMNS['Method'][0])
+    handle = next(row for row in methods if row['name'] == 'handle')
+    decorators = handle['decorators:string[]'].split(CSV_ARRAY_DELIMITER)
+    assert len(decorators) == 1 and '/a;b' in decorators[0]
+    assert handle['calls:string[]'].split(CSV_ARRAY_DELIMITER) == ['pkg.helpers.clean']
@@ -0,0 +1,151 @@
+import asyncio
+import subprocess
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip('dotenv')
+pytest.importorskip('neo4j')
+
+from parse_repo_into_neo4j import DirectNeo4jExtractor, file_content_hash
+
+
+class FakeResult:
+    def __init__(self, records):
+        self.records = records
+
+    async def single(self):
+        return self.records[0] if self.records else None
+
+    async def consume(self):
+        return SimpleNamespace(counters=SimpleNamespace(nodes_created=0, relationships_created=0, nodes_deleted=0))
+
+    def __aiter__(self):
+        async def records():
+            for record in self.records:
+                yield record
+        return records()
+
+
+class FakeSession:
+    def __init__(self, driver):
+        self.driver = driver
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def run(self, query, **params):
+        self.driver.queries.append((query, params))
+        if 'as ingested_at' in query:
+            return FakeResult([self.driver.previous] if self.driver.previous else [])
+        return FakeResult([])
+
+    async def execute_write(self, work, *args):
+        return await work(self, *args)
+
+
+class FakeDriver:
+    """Serves a recorded previous ingest and logs every query with its parameters"""
+
+    def __init__(self, previous):
+        self.previous = previous
+        self.queries = []
+
+    def session(self, **config):
+        return FakeSession(self)
+
+    def written_paths(self):
+        return sorted(row['path'] for query, params in self.queries
+                      if 'MERGE (f:File' in query for row in params['rows'])
+
+    def marked_commit(self):
+        return next(params['commit_sha'] for query, params in self.queries if 'r.ingest_version' in query)
+
+
+def git(repo, *args):
+    return subprocess.run(['git', *args], cwd=repo, check=True, capture_output=True, text=True).stdout.strip()
+
+
+def make_tree(root, use_git=True):
+    root.mkdir()
+    (root / 'alpha.py').write_text('def alpha():\n    return 1\n')
+    (root / 'beta.py').write_text('def beta():\n    return 2\n')
+    if use_git:
+        git(root, 'init', '-q')
+        git(root, 'add', '-A')
+        git(root, '-c', 'user.email=dev@example.com', '-c', 'user.name=dev', 'commit', '-qm', 'initial')
+    return root
+
+
+def recorded_ingest(root, commit_sha):
+    """What a completed ingest of the tree as it is now leaves on the Repository node"""
+    files = [{'path': path, 'module_name': path[:-3], 'content_hash': file_content_hash((root / path).read_bytes()),
+              'imports': []} for path in ('alpha.py', 'beta.py')]
+    return {'commit_sha': commit_sha, 'ingested_at': '2026-01-01T00:00:00Z', 'files': files}
+
+
+def ingest(root, previous):
+    extractor = DirectNeo4jExtractor('bolt://unused', 'neo4j', 'unused', workers=1, incremental=True,
+                                     use_parse_cache=False)
+    extractor.driver = FakeDriver(previous)
+    asyncio.run(extractor.analyze_repository(str(root)))
+    return extractor.driver
+
+
+def test_clean_tree_at_the_ingested_commit_is_skipped(tmp_path):
+    root = make_tree(tmp_path / 'repo')
+    driver = ingest(root, recorded_ingest(root, git(root, 'rev-parse', 'HEAD')))
+    assert driver.written_paths() == []
+    assert not any('r.ingest_version' in query for query, _ in driver.queries)
+
+
+def test_uncommitted_edit_at_the_ingested_commit_is_ingested(tmp_path):
+    root = make_tree(tmp_path / 'repo')
+    previous = recorded_ingest(root, git(root, 'rev-parse', 'HEAD'))
+    (root / 'alpha.py').write_text('def alpha():\n    return 10\n')
+    (root / 'gamma.py').write_text('def gamma():\n    return 3\n')
+
+    driver = ingest(root, previous)
+    assert driver.written_paths() == ['alpha.py', 'gamma.py']
+    # The graph no longer matches a commit, so the next run must not take the shortcut
+    assert driver.marked_commit() is None
+
+
+def test_local_edits_count_when_head_has_moved(tmp_path):
+    root = make_tree(tmp_path / 'repo')
+    previous = recorded_ingest(root, git(root, 'rev-parse', 'HEAD'))
+    (root / 'beta.py').write_text('def beta():\n    return 20\n')
+    git(root, '-c', 'user.email=dev@example.com', '-c', 'user.name=dev', 'commit', '-qam', 'change beta')
+    (root / 'alpha.py').write_text('def alpha():\n    return 10\n')
+
+    driver = ingest(root, previous)
+    assert driver.written_paths() == ['alpha.py', 'beta.py']
+
+
+def test_ingest_after_a_dirty_ingest_compares_hashes(tmp_path):
+    root = make_tree(tmp_path / 'repo')
+    (root / 'alpha.py').write_text('def alpha():\n    return 10\n')
+    previous = recorded_ingest(root, None)
+    git(root, 'checkout', '--', 'alpha.py')
+
+    driver = ingest(root, previous)
+    assert driver.written_paths() == ['alpha.py']
+    assert driver.marked_commit() == git(root, 'rev-parse', 'HEAD')
+
+
+def test_directory_without_git_is_ingested_incrementally(tmp_path):
+    root = make_tree(tmp_path / 'tree', use_git=False)
+    previous = recorded_ingest(root, None)
+    (root / 'beta.py').write_text('def beta():\n    return 20\n')
+    (root / 'alpha.py').unlink()
+
+    driver = ingest(root, previous)
+    assert driver.written_paths() == ['beta.py']
+    # No full rebuild: only the deleted file's subgraph is removed
+    assert not any('DETACH DELETE r' in query for query, _ in driver.queries)
+    assert [row['path'] for query, params in driver.queries if 'rows' in params and 'DETACH DELETE f' in query
+            for row in params['rows']] == ['alpha.py']
+    assert driver.marked_commit() is None
@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+
+import llm_cache
+from llm_cache import LLMResponseCache, cache_key
+
+
+def test_key_depends_on_model_prompt_params_and_ingest_version():
+    key = cache_key('gpt-4o-mini', 'prompt', 'v1', temperature=0.1)
+    assert key == cache_key('gpt-4o-mini', 'prompt', 'v1', temperature=0.1)
+    assert key != cache_key('gpt-4o', 'prompt', 'v1', temperature=0.1)
+    assert key != cache_key('gpt-4o-mini', 'other prompt', 'v1', temperature=0.1)
+    assert key != cache_key('gpt-4o-mini', 'prompt', 'v1', temperature=0.7)
+    assert key != cache_key('gpt-4o-mini', 'prompt', 'v2', temperature=0.1)
+
+
+def test_reingest_invalidates_cached_answers():
+    cache = LLMResponseCache()
+    cache.put(cache_key('m', 'prompt', 'v1'), 'answer about the old graph')
+    assert cache.get(cache_key('m', 'prompt', 'v1')) == 'answer about the old graph'
+    assert cache.get(cache_key('m', 'prompt', 'v2')) is None
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(llm_cache.time, 'monotonic', lambda: now[0])
+    cache = LLMResponseCache(ttl_seconds=60)
+    cache.put(('m', 'k', None), 'value')
+    now[0] += 60
+    assert cache.get(('m', 'k', None)) == 'value'
+    now[0] += 1
+    assert cache.get(('m', 'k', None)) is None
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = LLMResponseCache(max_entries=2)
+    cache.put(('m', 'a', None), 'A')
+    cache.put(('m', 'b', None), 'B')
+    assert cache.get(('m', 'a', None)) == 'A'  # 'b' is now the least recently used
+    cache.put(('m', 'c', None), 'C')
+    assert cache.get(('m', 'b', None)) is None
+    assert cache.get(('m', 'a', None)) == 'A'
+    assert cache.summary()['evictions'] == 1
+
+
+def test_identical_requests_in_flight_share_one_call():
+    calls = []
+
+    async def create():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return 'answer'
+
+    async def run():
+        cache = LLMResponseCache()
+        key = cache_key('m', 'prompt', 'v1')
+        results = await asyncio.gather(*(cache.get_or_create(key, create) for _ in range(4)))
+        results.append(await cache.get_or_create(key, create))
+        return cache, results
+
+    cache, results = asyncio.run(run())
+    assert results == ['answer'] * 5
+    assert len(calls) == 1
+    assert cache.summary() == {'hits': 1, 'misses': 1, 'coalesced': 3, 'evictions': 0, 'entries': 1}
+
+
+def test_failures_are_shared_but_not_cached():
+    calls = []
+
+    async def create():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise RuntimeError('rate limited')
+
+    async def run():
+        cache = LLMResponseCache()
+        key = cache_key('m', 'prompt', 'v1')
+        results = await asyncio.gather(cache.get_or_create(key, create), cache.get_or_create(key, create),
+                                       return_exceptions=True)
+        with pytest.raises(RuntimeError):
+            await cache.get_or_create(key, create)
+        return cache, results
+
+    cache, results = asyncio.run(run())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert len(calls) == 2
+    assert len(cache) == 0
+
+
+def test_cancelled_creator_does_not_cancel_waiters():
+    calls = []
+
+    async def create():
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        return 'answer'
+
+    async def run():
+        cache = LLMResponseCache()
+        key = cache_key('m', 'prompt', 'v1')
+        creator = asyncio.create_task(cache.get_or_create(key, create))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(cache.get_or_create(key, create))
+        await asyncio.sleep(0.005)
+        creator.cancel()
+        result = await waiter
+        return cache, creator, result
+
+    cache, creator, result = asyncio.run(run())
+    assert creator.cancelled()
+    assert result == 'answer'
+    # The waiter took over and created the value itself
+    assert len(calls) == 2
+    assert len(cache) == 1
@@ -0,0 +1,73 @@
+import pytest
+
+pytest.importorskip('dotenv')
+pytest.importorskip('neo4j')
+
+from parse_repo_into_neo4j import ModuleIndex, Neo4jCodeAnalyzer, absolute_import_name
+
+FILES = {
+    'pkg/__init__.py': 'from .helpers import clean\n\nName = 1\n',
+    'pkg/helpers.py': 'def clean(value):\n    return value\n',
+    'pkg/sub/__init__.py': '',
+    'pkg/sub/deep.py': 'from ..helpers import clean\n',
+}
+
+
+@pytest.mark.parametrize('import_name, importer, expected', [
+    ('pkg.helpers', 'pkg.app', 'pkg.helpers'),
+    ('.helpers', 'pkg.app', 'pkg.helpers'),
+    ('.', 'pkg.app', 'pkg'),
+    ('.helpers', 'pkg.__init__', 'pkg.helpers'),
+    ('..helpers.clean', 'pkg.sub.deep', 'pkg.helpers.clean'),
+    ('...helpers', 'pkg.app', None),
+])
+def test_absolute_import_name(import_name, importer, expected):
+    assert absolute_import_name(import_name, importer) == expected
+
+
+@pytest.fixture
+def index():
+    index = ModuleIndex()
+    for path in list(FILES) + ['pkg/app.py']:
+        index.add(path, path[:-3].replace('/', '.'))
+    return index
+
+
+@pytest.mark.parametrize('import_name, importer, expected', [
+    ('pkg.helpers', 'pkg/app.py', 'pkg/helpers.py'),
+    ('pkg.helpers.clean', 'pkg/app.py', 'pkg/helpers.py'),
+    ('pkg.Name', 'pkg/app.py', 'pkg/__init__.py'),
+    ('pkg', 'pkg/app.py', 'pkg/__init__.py'),
+    ('pkg.sub', 'pkg/app.py', 'pkg/sub/__init__.py'),
+    ('.helpers', 'pkg/app.py', 'pkg/helpers.py'),
+    ('..helpers', 'pkg/sub/deep.py', 'pkg/helpers.py'),
+    ('.deep', 'pkg/sub/__init__.py', 'pkg/sub/deep.py'),
+    ('requests', 'pkg/app.py', None),
+    ('pkg.app', 'pkg/app.py', None),  # A module importing itself is not an edge
+])
+def test_module_index_resolve(index, import_name, importer, expected):
+    assert index.resolve(import_name, importer) == expected
+
+
+def test_removed_module_no_longer_resolves(index):
+    index.remove('pkg/helpers.py')
+    assert index.resolve('pkg.helpers', 'pkg/app.py') == 'pkg/__init__.py'
+
+
+@pytest.mark.parametrize('statement, targets', [
+    ('from pkg import helpers', ['pkg/helpers.py']),
+    ('from pkg import helpers as h, Name', ['pkg/__init__.py', 'pkg/helpers.py']),
+    ('from pkg.helpers import clean', ['pkg/helpers.py']),
+    ('from pkg.sub import deep', ['pkg/sub/deep.py']),
+    ('from pkg import *', ['pkg/__init__.py']),
+    ('from . import helpers', ['pkg/helpers.py']),
+    ('from .sub import deep', ['pkg/sub/deep.py']),
+    ('import pkg.helpers', ['pkg/helpers.py']),
+    ('from os import path', []),
+])
+def test_import_statements_resolve_to_the_imported_module(tmp_path, index, statement, targets):
+    for path, source in dict(FILES, **{'pkg/app.py': statement + '\n'}).items():
+        (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / path).write_text(source)
+    analysis = Neo4jCodeAnalyzer().analyze_python_file(tmp_path / 'pkg' / 'app.py', tmp_path, {'pkg'})
+    assert sorted({index.resolve(name, 'pkg/app.py') for name in analysis['imports']}) == targets
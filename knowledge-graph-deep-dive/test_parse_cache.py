@@ -0,0 +1,44 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip('dotenv')
+pytest.importorskip('neo4j')
+
+from parse_repo_into_neo4j import DirectNeo4jExtractor, ParseCache, _init_analysis_worker
+
+
+def analyze(extractor, repo, file_path):
+    async def run():
+        with ProcessPoolExecutor(max_workers=1, initializer=_init_analysis_worker, initargs=(str(repo), set())) as pool, \
+                ThreadPoolExecutor(max_workers=1) as cache_thread:
+            return await extractor._analyze_one(pool, cache_thread, file_path, repo, set())
+    return asyncio.run(run())
+
+
+@pytest.fixture
+def extractor(tmp_path):
+    extractor = DirectNeo4jExtractor('bolt://unused', 'neo4j', 'unused', workers=1)
+    extractor.parse_cache = ParseCache(tmp_path / 'cache.sqlite')
+    yield extractor
+    extractor.parse_cache.close()
+
+
+def test_second_analysis_is_served_from_the_cache(tmp_path, extractor):
+    repo = tmp_path / 'repo'
+    repo.mkdir()
+    (repo / 'mod.py').write_text('def f():\n    return 1\n')
+
+    first = analyze(extractor, repo, repo / 'mod.py')
+    second = analyze(extractor, repo, repo / 'mod.py')
+    assert first == second
+    assert [f['name'] for f in second['functions']] == ['f']
+    assert (extractor.parse_cache.hits, extractor.parse_cache.misses) == (1, 1)
+
+
+def test_unreadable_file_is_skipped(tmp_path, extractor):
+    repo = tmp_path / 'repo'
+    repo.mkdir()
+    assert analyze(extractor, repo, repo / 'vanished.py') is None
+    assert extractor.parse_cache.misses == 0
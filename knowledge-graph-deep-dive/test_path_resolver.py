@@ -0,0 +1,42 @@
+from path_resolver import PathResolver
+
+
+def make_resolver(paths):
+    return PathResolver([
+        {'path': path, 'module_name': path[:-3].replace('/', '.')} for path in paths
+    ])
+
+
+def test_exact_path_wins():
+    resolver = make_resolver(['pkg/agent.py', 'tests/agent.py'])
+    assert resolver.resolve('tests/agent.py') == ['tests/agent.py']
+
+
+def test_longest_suffix_and_unknown_leading_directories():
+    resolver = make_resolver(['pkg/models/openai.py', 'pkg/providers/openai.py'])
+    assert resolver.resolve('src/pkg/models/openai.py') == ['pkg/models/openai.py']
+    assert resolver.resolve('openai.py') == ['pkg/models/openai.py', 'pkg/providers/openai.py']
+
+
+def test_dotted_module_name():
+    resolver = make_resolver(['pkg/models/openai.py'])
+    assert resolver.resolve('pkg.models.openai') == ['pkg/models/openai.py']
+
+
+def test_plural_variant_only_without_exact_spelling():
+    resolver = make_resolver(['pkg/messages.py'])
+    assert resolver.resolve('message.py') == ['pkg/messages.py']
+    both = make_resolver(['pkg/agent.py', 'pkg/agents.py'])
+    assert both.resolve('agents.py') == ['pkg/agents.py']
+
+
+def test_package_init_resolves_by_package_name():
+    resolver = make_resolver(['pydantic_ai/agent/__init__.py', 'pydantic_ai/agent/graph.py'])
+    assert resolver.resolve('agent.py') == ['pydantic_ai/agent/__init__.py']
+    assert resolver.resolve('pydantic_ai/agent.py') == ['pydantic_ai/agent/__init__.py']
+    assert resolver.resolve('pydantic_ai.agent') == ['pydantic_ai/agent/__init__.py']
+    assert resolver.resolve('agent/__init__.py') == ['pydantic_ai/agent/__init__.py']
+
+
+def test_no_match():
+    assert make_resolver(['pkg/agent.py']).resolve('nothing.py') == []
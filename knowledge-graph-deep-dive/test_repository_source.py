@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip('dotenv')
+pytest.importorskip('neo4j')
+
+from parse_repo_into_neo4j import DirectNeo4jExtractor, RepositoryNameClash, repository_name, repository_source
+
+
+class FakeResult:
+    def __init__(self, records):
+        self.records = records
+
+    async def single(self):
+        return self.records[0] if self.records else None
+
+
+class FakeSession:
+    def __init__(self, driver):
+        self.driver = driver
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def run(self, query, **params):
+        self.driver.queries.append(query)
+        return FakeResult(self.driver.records)
+
+
+class FakeDriver:
+    """Answers the Repository source lookup with the given records and logs every query"""
+
+    def __init__(self, records):
+        self.records = records
+        self.queries = []
+
+    def session(self, **config):
+        return FakeSession(self)
+
+
+def test_source_identifies_repositories_sharing_a_name(tmp_path, monkeypatch):
+    assert repository_name('https://github.com/org1/utils.git') == repository_name('https://github.com/org2/utils')
+    assert repository_source('https://github.com/org1/utils.git') == 'https://github.com/org1/utils'
+    assert repository_source('https://github.com/org1/utils/') == 'https://github.com/org1/utils'
+    assert repository_source('https://github.com/org1/utils') != repository_source('https://github.com/org2/utils')
+    monkeypatch.chdir(tmp_path)
+    assert repository_source('.') == str(tmp_path.resolve())
+
+
+def test_ingest_over_a_repository_from_another_source_is_refused(tmp_path):
+    repo = tmp_path / 'org2' / 'utils'
+    repo.mkdir(parents=True)
+    extractor = DirectNeo4jExtractor('bolt://unused', 'neo4j', 'unused', workers=1, use_parse_cache=False)
+    extractor.driver = FakeDriver([{'source': str(tmp_path / 'org1' / 'utils')}])
+
+    with pytest.raises(RepositoryNameClash, match='REPO_NAME'):
+        asyncio.run(extractor.analyze_repository(str(repo)))
+    # Nothing was deleted or written
+    assert len(extractor.driver.queries) == 1
+
+
+@pytest.mark.parametrize('records', [[], [{'source': None}], [{'source': 'https://github.com/org1/utils'}]])
+def test_same_source_new_name_or_legacy_node_is_accepted(records):
+    extractor = DirectNeo4jExtractor('bolt://unused', 'neo4j', 'unused')
+    extractor.driver = FakeDriver(records)
+    asyncio.run(extractor._check_repository_source('utils', 'https://github.com/org1/utils'))
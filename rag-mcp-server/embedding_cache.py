@@ -0,0 +1,207 @@
+"""
+Query embedding cache for the RAG MCP server.
+
+Agents often repeat the same search within seconds; each repeat used to cost an
+OpenAI embeddings round trip. EmbeddingCache keeps query embeddings in memory keyed by
+(model, normalized query), bounded in size (least recently used entries go first) and
+expiring after a TTL. Concurrent misses for the same query share one API call.
+
+With a path configured, every new embedding is appended to a JSON-lines file and the
+file is reloaded at startup, so hits survive restarts. Writes run on a background
+thread. The file is rewritten from the cache at startup, at close() and whenever it
+holds more than twice max_entries lines, so it stays bounded however long the server runs.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger('reranking_mcp')
+
+
+def normalize_query(query: str) -> str:
+    """Unicode-normalized query with runs of whitespace collapsed; case is kept since it can carry meaning"""
+    return ' '.join(unicodedata.normalize('NFKC', query).split())
+
+
+class EmbeddingCache:
+    """Size-bounded, TTL-aware cache in front of an AsyncOpenAI-compatible embeddings client"""
+
+    def __init__(self, client, model: str = "text-embedding-3-small", max_entries: int = 1024,
+                 ttl_seconds: float = 86400.0, path: Optional[str] = None):
+        self.client = client
+        self.model = model
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.path = path
+        # Wall-clock timestamps, since entries outlive the process when persisted
+        self._entries: 'OrderedDict[Tuple[str, str], Tuple[float, List[float]]]' = OrderedDict()
+        self._in_flight: Dict[Tuple[str, str], asyncio.Future] = {}
+        self._stats = {'hits': 0, 'misses': 0, 'coalesced': 0, 'evictions': 0, 'api_calls': 0, 'miss_seconds': 0.0}
+        # One thread does all file writes, so appends and rewrites happen in the order they were queued
+        self._writer: Optional[ThreadPoolExecutor] = None
+        self._file_lines = 0
+        if path:
+            self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='embedding-cache')
+            self._load()
+
+    async def embed(self, query: str) -> List[float]:
+        """Embedding for query, from the cache when possible"""
+        return (await self.embed_many([query]))[0]
+
+    async def embed_many(self, queries: List[str]) -> List[List[float]]:
+        """Embeddings for queries in order; every query not cached or in flight goes in one API request"""
+        keys = [(self.model, normalize_query(query)) for query in queries]
+        resolved: Dict[Tuple[str, str], Any] = {}
+        missing = []
+        for key in dict.fromkeys(keys):
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry[0] <= self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                resolved[key] = entry[1]
+            elif key in self._in_flight:
+                self._stats['coalesced'] += 1
+                resolved[key] = self._in_flight[key]
+            else:
+                self._stats['misses'] += 1
+                missing.append(key)
+
+        if missing:
+            resolved.update(await self._fetch(missing))
+        for key, value in resolved.items():
+            if isinstance(value, asyncio.Future):
+                try:
+                    resolved[key] = await asyncio.shield(value)
+                except asyncio.CancelledError:
+                    # The request fetching it was cancelled, not this one: fetch it again
+                    if not value.cancelled():
+                        raise
+                    resolved[key] = await self.embed(key[1])
+        return [resolved[key] for key in keys]
+
+    async def _fetch(self, keys: List[Tuple[str, str]]) -> Dict[Tuple[str, str], List[float]]:
+        loop = asyncio.get_running_loop()
+        futures = {key: loop.create_future() for key in keys}
+        self._in_flight.update(futures)
+        started = time.perf_counter()
+        try:
+            response = await self.client.embeddings.create(input=[key[1] for key in keys], model=self.model)
+            embeddings = [item.embedding for item in response.data]
+        except Exception as e:
+            for future in futures.values():
+                future.set_exception(e)
+                future.exception()  # Waiters re-raise it; nothing is left unretrieved
+            raise
+        except BaseException:
+            # Only this caller was cancelled; waiters fetch the embeddings themselves
+            for future in futures.values():
+                future.cancel()
+            raise
+        else:
+            self._stats['api_calls'] += 1
+            self._stats['miss_seconds'] += time.perf_counter() - started
+            stored_at = time.time()
+            for key, embedding in zip(keys, embeddings):
+                self._store(key, stored_at, embedding)
+                futures[key].set_result(embedding)
+            if self._writer:
+                self._persist([(key, (stored_at, embedding)) for key, embedding in zip(keys, embeddings)])
+            return dict(zip(keys, embeddings))
+        finally:
+            for key in keys:
+                del self._in_flight[key]
+
+    def _store(self, key: Tuple[str, str], stored_at: float, embedding: List[float]):
+        self._entries[key] = (stored_at, embedding)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats['evictions'] += 1
+
+    def _persist(self, entries: list):
+        """Queue new entries for the file; past the size threshold, queue a rewrite of the whole cache instead"""
+        self._file_lines += len(entries)
+        if self._file_lines > 2 * self.max_entries:
+            # Evicted, expired and re-fetched entries pile up in an append-only file
+            snapshot = list(self._entries.items())
+            self._file_lines = len(snapshot)
+            self._writer.submit(self._rewrite, snapshot)
+        else:
+            self._writer.submit(self._append, entries)
+
+    @staticmethod
+    def _lines(entries: list) -> str:
+        return ''.join(json.dumps({'model': model, 'query': query, 'stored_at': stored_at,
+                                   'embedding': embedding}) + '\n'
+                       for (model, query), (stored_at, embedding) in entries)
+
+    def _append(self, entries: list):
+        try:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(self._lines(entries))
+        except OSError as e:
+            logger.warning(f"Could not persist embeddings to {self.path}: {str(e)}")
+
+    def _rewrite(self, entries: list):
+        try:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(self._lines(entries))
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not rewrite embedding cache {self.path}: {str(e)}")
+
+    def _load(self):
+        """Read the persisted entries that are still fresh, then rewrite the file with just those"""
+        if not os.path.exists(self.path):
+            return
+        now = time.time()
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # A line cut short by a crash
+                    if now - record['stored_at'] <= self.ttl_seconds:
+                        self._store((record['model'], record['query']), record['stored_at'], record['embedding'])
+            self._stats['evictions'] = 0
+            logger.info(f"Loaded {len(self._entries)} cached query embeddings from {self.path}")
+        except OSError as e:
+            logger.warning(f"Could not load embedding cache from {self.path}: {str(e)}")
+            return
+        self._rewrite(list(self._entries.items()))
+        self._file_lines = len(self._entries)
+
+    async def close(self):
+        """Wait for queued writes and leave the file holding exactly the cached entries"""
+        if not self._writer:
+            return
+        await asyncio.get_running_loop().run_in_executor(self._writer, self._rewrite, list(self._entries.items()))
+        self._file_lines = len(self._entries)
+        self._writer.shutdown()
+        self._writer = None
+
+    def metrics(self) -> Dict[str, Any]:
+        """Hit rate and the embedding latency saved by hits (estimated from the average API call)"""
+        stats = self._stats
+        lookups = stats['hits'] + stats['coalesced'] + stats['misses']
+        avg_call_seconds = stats['miss_seconds'] / stats['api_calls'] if stats['api_calls'] else 0.0
+        return {
+            'entries': len(self._entries),
+            'hits': stats['hits'],
+            'coalesced': stats['coalesced'],
+            'misses': stats['misses'],
+            'evictions': stats['evictions'],
+            'api_calls': stats['api_calls'],
+            'hit_rate': (stats['hits'] + stats['coalesced']) / lookups if lookups else 0.0,
+            'avg_miss_ms': avg_call_seconds * 1000,
+            'saved_seconds': (stats['hits'] + stats['coalesced']) * avg_call_seconds
+        }
@@ -0,0 +1,191 @@
+"""
+Load test for search_and_rerank against local stand-ins.
+
+Drives run_search_and_rerank from main.py with stand-ins for the OpenAI embeddings
+API, the Supabase RPC and the cross-encoder, each with a configurable latency, and
+reports throughput and latency per concurrency level. No network, API keys or model
+download needed.
+
+The stand-in cross-encoder sleeps in its thread the way PyTorch inference releases the
+GIL, for a fixed cost per predict call plus a cost per pair, so the numbers show how far the
+event loop, the rerank pool and micro-batching let requests overlap.
+
+Usage:
+    python load_test.py
+    python load_test.py --concurrency 1 4 16 64 --requests 200 --workers 4
+    python load_test.py --batch-size 15   # one request per batch, i.e. no micro-batching
+    python load_test.py --batch-queries 8 # compare one batch_search_and_rerank call with 8 single calls
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from main import RerankerContext, run_batch_search_and_rerank, run_search_and_rerank
+from rerank_scheduler import RerankScheduler
+from embedding_cache import EmbeddingCache
+from rerank_cache import RerankScoreCache
+
+
+class StandInEmbeddings:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    async def create(self, input, model):
+        await asyncio.sleep(self.latency)
+        inputs = input if isinstance(input, list) else [input]
+        return SimpleNamespace(data=[SimpleNamespace(embedding=[0.0] * 1536) for _ in inputs])
+
+
+class StandInOpenAI:
+    def __init__(self, latency: float):
+        self.embeddings = StandInEmbeddings(latency)
+
+
+class StandInRPC:
+    def __init__(self, latency: float, params: dict):
+        self.latency = latency
+        self.params = params
+
+    async def execute(self):
+        await asyncio.sleep(self.latency)
+        return SimpleNamespace(data=[{'text': f"document {i}"} for i in range(self.params['match_count'])])
+
+
+class StandInSupabase:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def rpc(self, name: str, params: dict):
+        return StandInRPC(self.latency, params)
+
+
+class StandInCrossEncoder:
+    def __init__(self, seconds_per_call: float, seconds_per_pair: float):
+        self.seconds_per_call = seconds_per_call
+        self.seconds_per_pair = seconds_per_pair
+
+    def predict(self, pairs):
+        time.sleep(self.seconds_per_call + self.seconds_per_pair * len(pairs))
+        return [1.0 / (i + 1) for i in range(len(pairs))]
+
+
+async def run_level(context: RerankerContext, concurrency: int, requests: int, match_count: int,
+                    distinct_queries: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i: int):
+        async with semaphore:
+            start = time.perf_counter()
+            query = f"query {i % distinct_queries if distinct_queries else i}"
+            result = await run_search_and_rerank(context, query, match_count=match_count, top_k=5)
+            latencies.append(time.perf_counter() - start)
+            if result.startswith("Error"):
+                raise RuntimeError(result)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'concurrency': concurrency,
+        'requests': requests,
+        'seconds': elapsed,
+        'requests_per_second': requests / elapsed,
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p95_ms': latencies[int(len(latencies) * 0.95) - 1] * 1000
+    }
+
+
+def reset(context: RerankerContext, executor: ThreadPoolExecutor, args):
+    """Fresh caches and scheduler, so each measurement starts cold and reports only itself"""
+    context.embeddings = EmbeddingCache(context.openai_client)
+    context.rerank_scores = RerankScoreCache('stand-in')
+    context.reranker = RerankScheduler(context.model, executor, workers=args.workers,
+                                       max_batch_size=args.batch_size, window_ms=args.window_ms)
+
+
+async def compare_batch(context: RerankerContext, executor: ThreadPoolExecutor, args):
+    """Latency of one query, of N queries as sequential single calls, and of N queries in one batch call"""
+    queries = [f"batch query {i}" for i in range(args.batch_queries)]
+
+    async def single():
+        await run_search_and_rerank(context, queries[0], match_count=args.documents)
+
+    async def sequential():
+        for query in queries:
+            await run_search_and_rerank(context, query, match_count=args.documents)
+
+    async def batch():
+        await run_batch_search_and_rerank(context, queries, match_count=args.documents)
+
+    print()
+    for label, run in (('1 query, single call', single),
+                       (f"{len(queries)} queries, sequential calls", sequential),
+                       (f"{len(queries)} queries, one batch call", batch)):
+        reset(context, executor, args)
+        start = time.perf_counter()
+        await run()
+        elapsed = time.perf_counter() - start
+        await context.reranker.close()
+        print(f"{label:>28}: {elapsed * 1000:7.1f} ms")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Load test search_and_rerank with local stand-ins")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    parser.add_argument('--requests', type=int, default=64, help="requests per concurrency level")
+    parser.add_argument('--documents', type=int, default=15, help="documents returned by the vector search")
+    parser.add_argument('--distinct-queries', type=int, default=0,
+                        help="cycle through this many queries so repeats hit the caches (0: all distinct)")
+    parser.add_argument('--embed-latency-ms', type=float, default=80.0)
+    parser.add_argument('--db-latency-ms', type=float, default=40.0)
+    parser.add_argument('--rerank-ms-per-call', type=float, default=15.0)
+    parser.add_argument('--rerank-ms-per-doc', type=float, default=1.0)
+    parser.add_argument('--workers', type=int, default=2, help="rerank thread pool size (RERANK_WORKERS)")
+    parser.add_argument('--batch-size', type=int, default=64, help="max pairs per predict call (RERANK_BATCH_SIZE)")
+    parser.add_argument('--window-ms', type=float, default=5.0, help="batching window (RERANK_WINDOW_MS)")
+    parser.add_argument('--batch-queries', type=int, default=5,
+                        help="queries for the batch_search_and_rerank comparison (0: skip it)")
+    args = parser.parse_args()
+
+    # main.py logs every request at INFO
+    logging.getLogger('reranking_mcp').setLevel(logging.WARNING)
+
+    executor = ThreadPoolExecutor(max_workers=args.workers, thread_name_prefix='rerank')
+    model = StandInCrossEncoder(args.rerank_ms_per_call / 1000, args.rerank_ms_per_doc / 1000)
+    context = RerankerContext(
+        model=model,
+        supabase=StandInSupabase(args.db_latency_ms / 1000),
+        openai_client=StandInOpenAI(args.embed_latency_ms / 1000),
+        embeddings=None,
+        reranker=None,
+        rerank_scores=None
+    )
+
+    print(f"{'concurrency':>11} {'req/s':>8} {'p50 (ms)':>9} {'p95 (ms)':>9} {'req/batch':>10} {'fill':>6} "
+          f"{'wait (ms)':>10} {'emb hits':>9} {'score hits':>11}")
+    try:
+        for concurrency in args.concurrency:
+            reset(context, executor, args)
+            level = await run_level(context, concurrency, args.requests, args.documents, args.distinct_queries)
+            metrics = context.reranker.metrics()
+            await context.reranker.close()
+            print(f"{level['concurrency']:>11} {level['requests_per_second']:>8.1f} "
+                  f"{level['p50_ms']:>9.1f} {level['p95_ms']:>9.1f} {metrics['avg_requests_per_batch']:>10.1f} "
+                  f"{metrics['avg_batch_fill']:>6.0%} {metrics['avg_queue_wait_ms']:>10.1f} "
+                  f"{context.embeddings.metrics()['hit_rate']:>9.0%} {context.rerank_scores.metrics()['hit_rate']:>11.0%}")
+        if args.batch_queries:
+            await compare_batch(context, executor, args)
+    finally:
+        executor.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
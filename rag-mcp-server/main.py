@@ -1,14 +1,18 @@
 from sentence_transformers import CrossEncoder
 from mcp.server.fastmcp import FastMCP, Context
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
-from supabase import create_client, Client
+from supabase import acreate_client, AsyncClient
 from collections.abc import AsyncIterator
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 from dataclasses import dataclass
 from dotenv import load_dotenv
 from pydantic import BaseModel
-from openai import OpenAI
+from openai import AsyncOpenAI
 from pathlib import Path
+from rerank_scheduler import RerankScheduler
+from embedding_cache import EmbeddingCache
+from rerank_cache import RerankScoreCache
 import numpy as np
 import asyncio
 import logging
@@ -35,12 +39,20 @@ logging.getLogger().setLevel(logging.INFO)
 
 logger = logging.getLogger('reranking_mcp')
 
+RERANK_MODEL_NAME = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
 @dataclass
 class RerankerContext:
     """Context for the Reranker MCP server."""
     model: CrossEncoder
-    supabase: Client
-    openai_client: OpenAI
+    supabase: AsyncClient
+    openai_client: AsyncOpenAI
+    # Query embeddings, served from memory (or the persisted file) for repeated queries
+    embeddings: EmbeddingCache
+    # Batches pairs from concurrent requests into predict calls on a thread pool, off the event loop
+    reranker: RerankScheduler
+    # Scores of pairs already seen; only the rest reach the reranker
+    rerank_scores: RerankScoreCache
 
 @asynccontextmanager
 async def reranker_lifespan(server: FastMCP) -> AsyncIterator[RerankerContext]:
@@ -53,22 +65,40 @@ async def reranker_lifespan(server: FastMCP) -> AsyncIterator[RerankerContext]:
         RerankerContext: The context containing the Reranker model, Supabase client, and OpenAI client
     """
     # Load the cross-encoder model
-    model = CrossEncoder("cross-encoder/ms-marco-MiniLM-L-6-v2")
+    model = CrossEncoder(RERANK_MODEL_NAME)
     
     # Get Supabase URL and key from environment variables
     supabase_url = os.getenv('SUPABASE_URL')
     supabase_key = os.getenv('SUPABASE_KEY')
-    supabase = create_client(supabase_url, supabase_key)
+    supabase = await acreate_client(supabase_url, supabase_key)
 
     # Create the OpenAI client for embeddings
     openai_api_key = os.getenv('OPENAI_API_KEY')    
-    openai_client = OpenAI(api_key=openai_api_key)    
+    openai_client = AsyncOpenAI(api_key=openai_api_key)    
+    embeddings = EmbeddingCache(openai_client, model="text-embedding-3-small",
+                                max_entries=int(os.getenv('EMBEDDING_CACHE_SIZE', '1024')),
+                                ttl_seconds=float(os.getenv('EMBEDDING_CACHE_TTL', '86400')),
+                                path=os.getenv('EMBEDDING_CACHE_PATH') or None)
+
+    # PyTorch releases the GIL during inference, so a few threads rerank in parallel;
+    # more workers than cores only adds contention
+    rerank_workers = int(os.getenv('RERANK_WORKERS', '2'))
+    rerank_executor = ThreadPoolExecutor(max_workers=rerank_workers, thread_name_prefix='rerank')
+    reranker = RerankScheduler(model, rerank_executor, workers=rerank_workers,
+                               max_batch_size=int(os.getenv('RERANK_BATCH_SIZE', '64')),
+                               window_ms=float(os.getenv('RERANK_WINDOW_MS', '5')))
+    rerank_scores = RerankScoreCache(RERANK_MODEL_NAME, max_entries=int(os.getenv('RERANK_CACHE_SIZE', '10000')))
 
     try:
-        yield RerankerContext(model=model, supabase=supabase, openai_client=openai_client)
+        yield RerankerContext(model=model, supabase=supabase, openai_client=openai_client,
+                              embeddings=embeddings, reranker=reranker, rerank_scores=rerank_scores)
     finally:
-        # No cleanup needed in this case, just showing this is where you would do that for things like DB connections!
-        pass
+        logger.info(f"Embedding cache: {embeddings.metrics()}")
+        logger.info(f"Rerank score cache: {rerank_scores.metrics()}")
+        await reranker.close()
+        rerank_executor.shutdown(wait=False, cancel_futures=True)
+        await embeddings.close()
+        await openai_client.close()
 
 # Initialize FastMCP server with the Reranker model as context
 mcp = FastMCP(
@@ -79,36 +109,69 @@ mcp = FastMCP(
     port=os.getenv("PORT", "8050")
 )
 
-@mcp.tool()
-async def search_and_rerank(ctx: Context, query: str, collection_name: str = "documents_reranking", match_count: int = 15, top_k: int = 15) -> str:
-    """Search documents from Supabase and rerank them based on relevance to the query.
+async def rerank_many(context: RerankerContext, searches: List[Tuple[str, List[str]]]) -> List[List[Dict[str, Any]]]:
+    """Score each (query, documents) search with the cross-encoder; one best-first list per search.
 
-    This tool performs a two-step process:
-    1. Retrieves relevant documents from Supabase using vector similarity search
-    2. Reranks the retrieved documents using a cross-encoder model
+    Pairs scored before come from the score cache. All the rest, across every search, go to the
+    reranker as one request, so they share a batched predict call (with whatever other requests
+    are reranking at the same moment) on the rerank thread pool while the event loop keeps serving.
+    """
+    keys = [[context.rerank_scores.key(query, doc) for doc in documents] for query, documents in searches]
+    scores = [[context.rerank_scores.get(key) for key in search_keys] for search_keys in keys]
 
-    Args:
-        ctx: The MCP server context containing the Supabase client, OpenAI client, and Reranker model
-        query: The search query
-        collection_name: Name of the Supabase collection to search in (default: "documents_reranking")
-        match_count: Number of documents to retrieve from vector search 
-        top_k: Number of top documents to return after reranking
+    # Each uncached pair is scored once, even if the same text came back twice
+    missing = {}
+    for (query, documents), search_keys, search_scores in zip(searches, keys, scores):
+        for doc, key, score in zip(documents, search_keys, search_scores):
+            if score is None and key not in missing:
+                missing[key] = [query, doc]
+    if missing:
+        fresh = await context.reranker.score(list(missing.values()))
+        for key, score in zip(missing, fresh):
+            context.rerank_scores.put(key, score)
+        fresh_by_key = dict(zip(missing, fresh))
+        scores = [
+            [fresh_by_key[key] if score is None else score for key, score in zip(search_keys, search_scores)]
+            for search_keys, search_scores in zip(keys, scores)
+        ]
+
+    ranked = []
+    for (query, documents), search_scores in zip(searches, scores):
+        scored = [
+            {"text": doc, "score": float(score)}
+            for doc, score in zip(documents, search_scores)
+        ]
+        ranked.append(sorted(scored, key=lambda x: x["score"], reverse=True))
+    return ranked
+
+async def rerank_documents(context: RerankerContext, query: str, documents: List[str]) -> List[Dict[str, Any]]:
+    """Score documents against the query with the cross-encoder, best first."""
+    return (await rerank_many(context, [(query, documents)]))[0]
+
+async def search_documents(context: RerankerContext, query_embedding: List[float], match_count: int) -> List[str]:
+    """Texts of the match_count documents most similar to the embedding, from the Supabase vector search"""
+    result = await context.supabase.rpc(
+        'match_documents_reranking',
+        {
+            'query_embedding': query_embedding,
+            'match_count': match_count
+        }
+    ).execute()
+    return [item['text'] for item in result.data or []]
+
+async def run_search_and_rerank(context: RerankerContext, query: str, collection_name: str = "documents_reranking",
+                                match_count: int = 15, top_k: int = 15) -> str:
+    """Core of the search_and_rerank tool, independent of the MCP request so it can be driven directly.
+
+    Every step awaits: the OpenAI and Supabase calls use async clients and reranking is offloaded,
+    so concurrent requests interleave instead of queueing behind each other.
     """
     try:
         logger.info(f"Processing search and rerank request - Query: {query}, Collection: {collection_name}, Match count: {match_count}, Top-k: {top_k}")
         
-        # Get Supabase client and model from context
-        supabase = ctx.request_context.lifespan_context.supabase
-        model = ctx.request_context.lifespan_context.model
-        openai_client = ctx.request_context.lifespan_context.openai_client
-        
         try:
-            # Generate query embedding using OpenAI
-            response = openai_client.embeddings.create(
-                input=query,
-                model="text-embedding-3-small"
-            )
-            query_embedding = response.data[0].embedding
+            # Generate query embedding using OpenAI, unless the same query was embedded recently
+            query_embedding = await context.embeddings.embed(query)
             
         except Exception as e:
             logger.error(f"Failed to generate embedding: {str(e)}")
@@ -117,33 +180,15 @@ async def search_and_rerank(ctx: Context, query: str, collection_name: str = "do
         # Perform vector similarity search
         try:
             # Perform the vector search
-            result = supabase.rpc(
-                'match_documents_reranking',
-                {
-                    'query_embedding': query_embedding,
-                    'match_count': match_count
-                }
-            ).execute()
+            documents = await search_documents(context, query_embedding, match_count)
                         
-            if not result.data:
+            if not documents:
                 logger.warning(f"No documents found in collection {collection_name}")
                 return "No matching documents found"
                 
-            documents = [item['text'] for item in result.data]
             logger.info(f"Retrieved {len(documents)} documents from Supabase")
             
-            # Pair each doc with the query for reranking
-            pairs = [[query, doc] for doc in documents]
-            
-            # Predict relevance scores
-            scores = model.predict(pairs)
-            
-            # Combine and sort results
-            scored = [
-                {"text": doc, "score": float(score)}
-                for doc, score in zip(documents, scores)
-            ]
-            scored_sorted = sorted(scored, key=lambda x: x["score"], reverse=True)
+            scored_sorted = await rerank_documents(context, query, documents)
             
             logger.info(f"Successfully reranked documents. Top score: {scored_sorted[0]['score'] if scored_sorted else 'N/A'}")
             return str(scored_sorted[:top_k])
@@ -156,6 +201,109 @@ async def search_and_rerank(ctx: Context, query: str, collection_name: str = "do
         logger.error(f"Error during search and rerank: {str(e)}")
         return f"Error processing request: {str(e)}"
 
+@mcp.tool()
+async def search_and_rerank(ctx: Context, query: str, collection_name: str = "documents_reranking", match_count: int = 15, top_k: int = 15) -> str:
+    """Search documents from Supabase and rerank them based on relevance to the query.
+
+    This tool performs a two-step process:
+    1. Retrieves relevant documents from Supabase using vector similarity search
+    2. Reranks the retrieved documents using a cross-encoder model
+
+    Args:
+        ctx: The MCP server context containing the Supabase client, OpenAI client, and Reranker model
+        query: The search query
+        collection_name: Name of the Supabase collection to search in (default: "documents_reranking")
+        match_count: Number of documents to retrieve from vector search 
+        top_k: Number of top documents to return after reranking
+    """
+    return await run_search_and_rerank(ctx.request_context.lifespan_context, query, collection_name, match_count, top_k)
+
+async def run_batch_search_and_rerank(context: RerankerContext, queries: List[str],
+                                      collection_name: str = "documents_reranking",
+                                      match_count: int = 15, top_k: int = 15) -> str:
+    """Core of the batch_search_and_rerank tool: several queries for roughly the latency of one.
+
+    One embeddings request covers every query not already cached, the vector searches run
+    concurrently, and all (query, document) pairs are reranked as a single batch.
+    """
+    try:
+        logger.info(f"Processing batch search and rerank request - Queries: {len(queries)}, Collection: {collection_name}, Match count: {match_count}, Top-k: {top_k}")
+        if not queries:
+            return str([])
+        
+        try:
+            query_embeddings = await context.embeddings.embed_many(queries)
+        except Exception as e:
+            logger.error(f"Failed to generate embeddings: {str(e)}")
+            raise
+        
+        # A failed search only fails its own query
+        searches = await asyncio.gather(
+            *(search_documents(context, embedding, match_count) for embedding in query_embeddings),
+            return_exceptions=True
+        )
+        succeeded = [(query, documents) for query, documents in zip(queries, searches)
+                     if not isinstance(documents, Exception)]
+        ranked = iter(await rerank_many(context, succeeded))
+        
+        results = []
+        for query, documents in zip(queries, searches):
+            if isinstance(documents, Exception):
+                logger.error(f"Error during Supabase search for '{query}': {str(documents)}")
+                results.append({"query": query, "error": f"Error searching documents: {str(documents)}"})
+            else:
+                results.append({"query": query, "results": next(ranked)[:top_k]})
+        
+        logger.info(f"Successfully reranked documents for {len(succeeded)} of {len(queries)} queries")
+        return str(results)
+        
+    except Exception as e:
+        logger.error(f"Error during batch search and rerank: {str(e)}")
+        return f"Error processing request: {str(e)}"
+
+@mcp.tool()
+async def batch_search_and_rerank(ctx: Context, queries: List[str], collection_name: str = "documents_reranking", match_count: int = 15, top_k: int = 15) -> str:
+    """Search and rerank documents for several queries in one call.
+
+    Use this instead of repeated search_and_rerank calls when you have more than one query:
+    the queries are embedded together, searched concurrently and reranked in one batch, so
+    the call takes about as long as a single query.
+
+    Args:
+        ctx: The MCP server context containing the Supabase client, OpenAI client, and Reranker model
+        queries: The search queries
+        collection_name: Name of the Supabase collection to search in (default: "documents_reranking")
+        match_count: Number of documents to retrieve from vector search for each query
+        top_k: Number of top documents to return for each query after reranking
+
+    Returns a list with one entry per query, in order: {"query", "results"} with the top-k
+    documents and their scores, or {"query", "error"} if that query's search failed.
+    """
+    return await run_batch_search_and_rerank(ctx.request_context.lifespan_context, queries, collection_name,
+                                             match_count, top_k)
+
+@mcp.tool()
+async def rerank_metrics(ctx: Context) -> str:
+    """Report how well concurrent reranking requests are being batched.
+
+    Returns batch fill (pairs per predict call relative to the maximum batch size), requests
+    per batch, time requests spend queued before their batch starts, and predict time.
+
+    Args:
+        ctx: The MCP server context containing the rerank scheduler
+    """
+    return str(ctx.request_context.lifespan_context.reranker.metrics())
+
+@mcp.tool()
+async def cache_metrics(ctx: Context) -> str:
+    """Report hit rates of the server's caches and the latency they saved.
+
+    Args:
+        ctx: The MCP server context containing the caches
+    """
+    context = ctx.request_context.lifespan_context
+    return str({'embeddings': context.embeddings.metrics(), 'rerank_scores': context.rerank_scores.metrics()})
+
 async def main():
     try:
         transport = os.getenv("TRANSPORT", "sse")
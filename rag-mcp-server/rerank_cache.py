@@ -0,0 +1,58 @@
+"""
+Cross-encoder score cache for the RAG MCP server.
+
+A cross-encoder score depends only on the model and the exact (query, document) texts,
+and agents re-ask the same questions and get the same documents back from the vector
+search. RerankScoreCache remembers scores under (model, sha256(query), sha256(document))
+so only pairs it has not seen are sent to the model. It is bounded by entry count, least
+recently used first; scores never go stale, so there is no TTL.
+"""
+
+import hashlib
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class RerankScoreCache:
+    """LRU cache of cross-encoder scores keyed by model and hashed pair texts"""
+
+    def __init__(self, model_name: str, max_entries: int = 10000):
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self._scores: 'OrderedDict[Tuple[str, str, str], float]' = OrderedDict()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def key(self, query: str, document: str) -> Tuple[str, str, str]:
+        return self.model_name, _digest(query), _digest(document)
+
+    def get(self, key: Tuple[str, str, str]) -> Optional[float]:
+        score = self._scores.get(key)
+        if score is None:
+            self._stats['misses'] += 1
+            return None
+        self._scores.move_to_end(key)
+        self._stats['hits'] += 1
+        return score
+
+    def put(self, key: Tuple[str, str, str], score: float):
+        self._scores[key] = score
+        self._scores.move_to_end(key)
+        while len(self._scores) > self.max_entries:
+            self._scores.popitem(last=False)
+            self._stats['evictions'] += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        """Pair-level hit rate; every hit is one pair the model did not have to score"""
+        stats = self._stats
+        lookups = stats['hits'] + stats['misses']
+        return {
+            'entries': len(self._scores),
+            'hits': stats['hits'],
+            'misses': stats['misses'],
+            'evictions': stats['evictions'],
+            'hit_rate': stats['hits'] / lookups if lookups else 0.0
+        }
@@ -0,0 +1,156 @@
+"""
+Micro-batching scheduler for cross-encoder reranking.
+
+Concurrent search_and_rerank requests each need ~15 (query, document) pairs scored.
+Instead of one model.predict call per request, the scheduler gathers pairs from all
+requests that arrive within a short window (or until a batch is full), scores them in
+a single predict call on the rerank thread pool and routes each score back to the
+request that asked for it.
+
+While every worker is busy, new requests keep queueing and the next batch leaves
+fuller, so batching adapts to load without a longer window.
+"""
+
+import asyncio
+import time
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+
+@dataclass
+class _Request:
+    pairs: List[List[str]]
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+class RerankScheduler:
+    """Batches (query, document) pairs from concurrent requests into shared predict calls"""
+
+    def __init__(self, model, executor: Executor, workers: int, max_batch_size: int = 64, window_ms: float = 5.0):
+        self.model = model
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.window = window_ms / 1000
+        # At most one batch per executor worker is in flight; the rest wait here and batch up
+        self._slots = asyncio.Semaphore(workers)
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._carry: Optional[_Request] = None
+        # Requests taken off the queue for the batch being put together, until it is handed to _score_batch
+        self._forming: List[_Request] = []
+        self._loop_task: Optional[asyncio.Task] = None
+        self._batch_tasks = set()
+        self._stats = {
+            'requests': 0, 'pairs': 0, 'batches': 0,
+            'queue_wait_seconds': 0.0, 'max_queue_wait_seconds': 0.0, 'predict_seconds': 0.0
+        }
+
+    async def score(self, pairs: List[List[str]]) -> List[float]:
+        """Relevance scores for pairs, in order; resolved once the batch holding them is scored"""
+        if not pairs:
+            return []
+        if self._loop_task is None:
+            self._loop_task = asyncio.create_task(self._batch_loop())
+
+        request = _Request(pairs, asyncio.get_running_loop().create_future())
+        self._queue.put_nowait(request)
+        return await request.future
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            first = self._carry or await self._queue.get()
+            self._carry = None
+            batch = self._forming = [first]
+            await self._slots.acquire()
+
+            size = len(first.pairs)
+            # The window runs from the first request's arrival, so time spent waiting for a worker counts
+            deadline = loop.time() + max(0.0, self.window - (time.perf_counter() - first.enqueued_at))
+            while size < self.max_batch_size:
+                timeout = deadline - loop.time()
+                try:
+                    if timeout <= 0:
+                        request = self._queue.get_nowait()
+                    else:
+                        request = await asyncio.wait_for(self._queue.get(), timeout)
+                except (asyncio.QueueEmpty, asyncio.TimeoutError):
+                    break
+                if size + len(request.pairs) > self.max_batch_size:
+                    # Requests are never split; this one opens the next batch
+                    self._carry = request
+                    break
+                batch.append(request)
+                size += len(request.pairs)
+
+            self._forming = []
+            task = asyncio.create_task(self._score_batch(batch))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    async def _score_batch(self, batch: List[_Request]):
+        try:
+            started = time.perf_counter()
+            for request in batch:
+                wait = started - request.enqueued_at
+                self._stats['queue_wait_seconds'] += wait
+                self._stats['max_queue_wait_seconds'] = max(self._stats['max_queue_wait_seconds'], wait)
+
+            pairs = [pair for request in batch for pair in request.pairs]
+            try:
+                scores = await asyncio.get_running_loop().run_in_executor(self.executor, self.model.predict, pairs)
+            except Exception as e:
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+                return
+
+            self._stats['predict_seconds'] += time.perf_counter() - started
+            self._stats['requests'] += len(batch)
+            self._stats['pairs'] += len(pairs)
+            self._stats['batches'] += 1
+
+            offset = 0
+            for request in batch:
+                # A caller that gave up (cancelled) simply does not get its scores
+                if not request.future.done():
+                    request.future.set_result([float(s) for s in scores[offset:offset + len(request.pairs)]])
+                offset += len(request.pairs)
+        finally:
+            self._slots.release()
+
+    def metrics(self) -> Dict[str, Any]:
+        """Batch-fill and queue-wait figures since startup"""
+        stats = self._stats
+        batches = stats['batches'] or 1
+        requests = stats['requests'] or 1
+        return {
+            'requests': stats['requests'],
+            'pairs': stats['pairs'],
+            'batches': stats['batches'],
+            'max_batch_size': self.max_batch_size,
+            'window_ms': self.window * 1000,
+            'avg_pairs_per_batch': stats['pairs'] / batches,
+            'avg_requests_per_batch': stats['requests'] / batches,
+            'avg_batch_fill': stats['pairs'] / batches / self.max_batch_size,
+            'avg_queue_wait_ms': stats['queue_wait_seconds'] / requests * 1000,
+            'max_queue_wait_ms': stats['max_queue_wait_seconds'] * 1000,
+            'avg_predict_ms': stats['predict_seconds'] / batches * 1000,
+            'queued_requests': self._queue.qsize() + len(self._forming) + (1 if self._carry else 0)
+        }
+
+    async def close(self):
+        """Stop batching; requests still waiting are cancelled"""
+        if self._loop_task:
+            self._loop_task.cancel()
+            await asyncio.gather(self._loop_task, return_exceptions=True)
+            self._loop_task = None
+        await asyncio.gather(*self._batch_tasks, return_exceptions=True)
+        pending = self._forming + ([self._carry] if self._carry else [])
+        while not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        for request in pending:
+            request.future.cancel()
+        self._forming = []
+        self._carry = None
@@ -0,0 +1,173 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import embedding_cache
+from embedding_cache import EmbeddingCache
+
+
+class FakeEmbeddings:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = []
+
+    async def create(self, input, model):
+        self.calls.append(list(input))
+        await asyncio.sleep(self.delay)
+        return SimpleNamespace(data=[SimpleNamespace(embedding=[float(len(text))]) for text in input])
+
+
+def make_cache(delay: float = 0.0, **kwargs):
+    embeddings = FakeEmbeddings(delay)
+    return EmbeddingCache(SimpleNamespace(embeddings=embeddings), **kwargs), embeddings
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(embedding_cache.time, 'time', lambda: now[0])
+    return now
+
+
+def test_repeat_and_normalized_queries_hit(clock):
+    cache, embeddings = make_cache()
+    assert asyncio.run(cache.embed('find  users')) == [10.0]
+    assert asyncio.run(cache.embed(' find users ')) == [10.0]
+    assert embeddings.calls == [['find users']]
+    assert cache.metrics()['hits'] == 1
+
+
+def test_entries_expire_after_ttl(clock):
+    cache, embeddings = make_cache(ttl_seconds=60)
+    asyncio.run(cache.embed('query'))
+    clock[0] += 60
+    asyncio.run(cache.embed('query'))
+    clock[0] += 1
+    asyncio.run(cache.embed('query'))
+    assert len(embeddings.calls) == 2
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache, embeddings = make_cache(max_entries=2)
+    asyncio.run(cache.embed('a'))
+    asyncio.run(cache.embed('b'))
+    asyncio.run(cache.embed('a'))  # 'b' is now the least recently used
+    asyncio.run(cache.embed('c'))
+    asyncio.run(cache.embed('a'))
+    asyncio.run(cache.embed('b'))
+    assert embeddings.calls == [['a'], ['b'], ['c'], ['b']]
+    assert cache.metrics()['evictions'] == 2
+
+
+def test_concurrent_misses_share_one_call(clock):
+    async def run():
+        cache, embeddings = make_cache(delay=0.01)
+        results = await asyncio.gather(*(cache.embed('same query') for _ in range(5)))
+        return cache, embeddings, results
+
+    cache, embeddings, results = asyncio.run(run())
+    assert results == [[10.0]] * 5
+    assert embeddings.calls == [['same query']]
+    assert cache.metrics()['coalesced'] == 4
+
+
+def test_failed_call_is_shared_but_not_cached(clock):
+    class Failing:
+        calls = 0
+
+        async def create(self, input, model):
+            Failing.calls += 1
+            await asyncio.sleep(0.01)
+            raise RuntimeError('rate limited')
+
+    async def run():
+        cache = EmbeddingCache(SimpleNamespace(embeddings=Failing()))
+        results = await asyncio.gather(cache.embed('q'), cache.embed('q'), return_exceptions=True)
+        with pytest.raises(RuntimeError):
+            await cache.embed('q')
+        return results
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert Failing.calls == 2
+
+
+def test_embed_many_sends_only_misses_in_one_call(clock):
+    cache, embeddings = make_cache()
+    asyncio.run(cache.embed('cached'))
+    result = asyncio.run(cache.embed_many(['one', 'cached', 'three', 'one']))
+    assert result == [[3.0], [6.0], [5.0], [3.0]]
+    assert embeddings.calls == [['cached'], ['one', 'three']]
+
+
+def read_queries(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line)['query'] for line in f]
+
+
+def run_and_close(cache, *queries):
+    """Embed each query in turn, then close the cache so every queued write has reached the file"""
+    async def run():
+        for query in queries:
+            await cache.embed(query)
+        await cache.close()
+    asyncio.run(run())
+
+
+def test_persisted_entries_survive_a_restart(clock, tmp_path):
+    path = str(tmp_path / 'embeddings.jsonl')
+    cache, _ = make_cache(path=path, ttl_seconds=60)
+    asyncio.run(cache.embed_many(['old', 'fresh']))
+    asyncio.run(cache.close())
+
+    clock[0] += 30
+    cache, _ = make_cache(path=path, ttl_seconds=60)
+    run_and_close(cache, 'newer')
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"model": "text-embedding')  # A write cut short by a crash
+
+    clock[0] += 40  # 'old' and 'fresh' are now 70s old, 'newer' 40s
+    restarted, embeddings = make_cache(path=path, ttl_seconds=60)
+    # Loading rewrote the file down to the entries that were still fresh
+    assert read_queries(path) == ['newer']
+    assert asyncio.run(restarted.embed('newer')) == [5.0]
+    assert embeddings.calls == []
+    run_and_close(restarted, 'old')
+    assert embeddings.calls == [['old']]
+    assert read_queries(path) == ['newer', 'old']
+
+
+def test_file_is_rewritten_once_it_outgrows_the_cache(clock, tmp_path):
+    path = str(tmp_path / 'embeddings.jsonl')
+    cache, _ = make_cache(path=path, max_entries=2)
+
+    async def run():
+        for query in ['a', 'b', 'c', 'd']:
+            await cache.embed(query)
+        # Wait for the queued writes without closing
+        await asyncio.get_running_loop().run_in_executor(cache._writer, lambda: None)
+        appended = read_queries(path)
+        await cache.embed('e')  # Five lines for two entries: past the threshold
+        await asyncio.get_running_loop().run_in_executor(cache._writer, lambda: None)
+        return appended
+
+    assert asyncio.run(run()) == ['a', 'b', 'c', 'd']
+    assert read_queries(path) == ['d', 'e']
+
+
+def test_cancelled_fetch_does_not_cancel_waiters(clock):
+    async def run():
+        cache, embeddings = make_cache(delay=0.02)
+        fetching = asyncio.create_task(cache.embed('query'))
+        await asyncio.sleep(0)
+        waiting = asyncio.create_task(cache.embed('query'))
+        await asyncio.sleep(0.005)
+        fetching.cancel()
+        return fetching, await waiting, embeddings
+
+    fetching, result, embeddings = asyncio.run(run())
+    assert fetching.cancelled()
+    assert result == [5.0]
+    assert embeddings.calls == [['query'], ['query']]
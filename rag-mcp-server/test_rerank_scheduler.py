@@ -0,0 +1,55 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from rerank_scheduler import RerankScheduler
+
+
+class SlowModel:
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.calls = []
+
+    def predict(self, pairs):
+        self.calls.append(len(pairs))
+        time.sleep(self.seconds)
+        return [float(i) for i in range(len(pairs))]
+
+
+def pairs(n):
+    return [['query', f"document {i}"] for i in range(n)]
+
+
+def test_concurrent_requests_share_one_predict_call():
+    async def run():
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            model = SlowModel(0.0)
+            scheduler = RerankScheduler(model, executor, workers=1, window_ms=20)
+            results = await asyncio.gather(scheduler.score(pairs(2)), scheduler.score(pairs(3)))
+            await scheduler.close()
+            return model, results
+
+    model, results = asyncio.run(run())
+    assert model.calls == [5]
+    assert results == [[0.0, 1.0], [2.0, 3.0, 4.0]]
+
+
+def test_close_cancels_requests_of_a_forming_batch():
+    async def run():
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            scheduler = RerankScheduler(SlowModel(0.1), executor, workers=1, window_ms=0)
+            scored = asyncio.create_task(scheduler.score(pairs(2)))
+            await asyncio.sleep(0.02)
+            # The only worker is busy, so this request waits in the next batch for a slot
+            waiting = asyncio.create_task(scheduler.score(pairs(2)))
+            await asyncio.sleep(0.02)
+            assert scheduler.metrics()['queued_requests'] == 1
+
+            await scheduler.close()
+            done, _ = await asyncio.wait([scored, waiting], timeout=1)
+            return scored, waiting, done
+
+    scored, waiting, done = asyncio.run(run())
+    assert done == {scored, waiting}
+    assert scored.result() == [0.0, 1.0]
+    assert waiting.cancelled()